@@ -2,21 +2,38 @@
 EmotionLLM - Enhanced Mental Health Companion (Fixed Dynamic Theme)
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-from pathlib import Path
+from datetime import date, timedelta
 
 # ==================== IMPORT FROM UTILS ====================
 from utils import (
-    EmotionDetector,
-    EmotionLogger,
+    get_detector,
+    get_logger,
     get_reframe,
     get_affirmation,
     play_emotion_sound,
-    EMOTION_THEMES  # Import the themes dictionary
+    split_sentences,
+    stream_sentence_emotions,
+    combine_sentence_emotions,
+    summarize_rollups,
+    apply_app_theme,
+    theme_for,
+    label_id,
+    by_label,
+    DISTRESS,
 )
+from utils import metrics
+from utils.auth import auth_configured, is_admin, journal_user_id
+
+# Spotify playlist per canonical label ID
+PLAYLISTS = by_label({
+    "happy": "https://open.spotify.com/playlist/37i9dQZF1DXdPec7aLTmlC",
+    "sad": "https://open.spotify.com/playlist/37i9dQZF1DWVrtsSlLKzro",
+    "angry": "https://open.spotify.com/playlist/37i9dQZF1DWYxwmBaMqxsl",
+    "anxious": "https://open.spotify.com/playlist/37i9dQZF1DX3rxVfibe1L0",
+    "love": "https://open.spotify.com/playlist/37i9dQZF1DX50QitC6Oqtn",
+    "surprise": "https://open.spotify.com/playlist/37i9dQZF1DX3rxVfibe1L0",
+    "neutral": "https://open.spotify.com/playlist/37i9dQZF1DWZUAeYvs88zc"
+})
 
 # ==================== PAGE CONFIG ====================
 st.set_page_config(
@@ -32,189 +49,37 @@ if 'current_emotion' not in st.session_state:
 if 'theme_applied' not in st.session_state:
     st.session_state.theme_applied = False
 
+# ==================== SIGN-IN ====================
+# The journal partition belongs to the logged-in account (never to a URL
+# parameter); without [auth] in secrets.toml the app is single-user
+user_id = journal_user_id(st.user, required=auth_configured())
+if user_id is None:
+    st.markdown("<h1 style='text-align:center; color: #E2E8F0;'>💙 EmotionLLM</h1>", unsafe_allow_html=True)
+    st.info("🔒 Log in to open your private journal")
+    st.button("Log in", on_click=st.login)
+    st.stop()
+
 # ==================== INITIALIZE CORE CLASSES ====================
-detector = EmotionDetector()
-logger = EmotionLogger()
+# Shared per process and reused by every rerun/session. The detector is
+# fetched on the Home page, so other pages never wait for the model to load.
+# Plotly and pandas are likewise imported by the pages that draw with them.
+logger = get_logger()
+
+# This user's journal partition; shared journal backends ignore the id and
+# return the same store for everyone
+journal = logger.store.for_user(user_id)
 
 # ==================== DYNAMIC THEME FUNCTION ====================
+# All themes are precompiled into one content-hashed stylesheet (see
+# utils/ui_theme.py); a rerun only ships the stylesheet link and a marker
+# naming the emotion. The slot keeps one marker per run even when the theme
+# changes after a prediction.
+theme_slot = st.empty()
+
 def apply_dynamic_theme(emotion=None):
     """Apply theme that changes based on emotion"""
-    
-    # Default dark theme
-    if emotion is None or emotion not in EMOTION_THEMES:
-        gradient = "linear-gradient(135deg, #0F172A 0%, #1E293B 100%)"
-        primary = "#3B82F6"
-        emoji = "🧠"
-        message = "Share your feelings"
-    else:
-        theme = EMOTION_THEMES[emotion]
-        gradient = theme['gradient']
-        primary = theme['primary']
-        emoji = theme['emoji']
-        message = theme['message']
-    
-    css = f"""
-    <style>
-    /* Main Background - Changes with emotion */
-    .stApp {{
-        background: {gradient} !important;
-        transition: background 1.5s ease-in-out;
-    }}
-    
-    /* Sidebar */
-    [data-testid="stSidebar"] {{
-        background: linear-gradient(180deg, #0F172A 0%, #1E293B 100%) !important;
-        border-right: 1px solid rgba(255,255,255,0.1);
-    }}
-    
-    [data-testid="stSidebar"] * {{
-        color: #E2E8F0 !important;
-    }}
-    
-    /* Hide Streamlit branding */
-    #MainMenu {{visibility: hidden;}}
-    footer {{visibility: hidden;}}
-    header {{visibility: hidden;}}
-    
-    /* Text colors for main content */
-    .stMarkdown, .stMarkdown p, .stMarkdown h1, .stMarkdown h2, .stMarkdown h3 {{
-        color: #E2E8F0 !important;
-    }}
-    
-    /* Input boxes */
-    .stTextArea textarea {{
-        background-color: rgba(30, 41, 59, 0.8) !important;
-        color: #E2E8F0 !important;
-        border: 1px solid rgba(255,255,255,0.2) !important;
-        border-radius: 16px !important;
-        font-size: 1.05rem !important;
-        backdrop-filter: blur(10px);
-    }}
-    
-    .stTextArea textarea:focus {{
-        border-color: {primary} !important;
-        box-shadow: 0 0 0 1px {primary} !important;
-    }}
-    
-    /* Buttons */
-    .stButton > button {{
-        background: linear-gradient(135deg, {primary} 0%, #8B5CF6 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 0.75rem 2rem !important;
-        font-weight: 600 !important;
-        font-size: 1.05rem !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.3) !important;
-        width: 100%;
-    }}
-    
-    .stButton > button:hover {{
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(0,0,0,0.4) !important;
-    }}
-    
-    /* Progress bars */
-    .stProgress > div > div {{
-        background-color: {primary} !important;
-    }}
-    
-    /* Metrics */
-    [data-testid="stMetricValue"] {{
-        color: {primary} !important;
-    }}
-    
-    /* Info/Success boxes */
-    .stAlert {{
-        background-color: rgba(30, 41, 59, 0.6) !important;
-        backdrop-filter: blur(10px) !important;
-        border-left: 4px solid {primary} !important;
-        color: #E2E8F0 !important;
-    }}
-    
-    /* Emotion card */
-    .emotion-display-card {{
-        background: rgba(255, 255, 255, 0.1);
-        backdrop-filter: blur(20px);
-        border: 1px solid rgba(255,255,255,0.2);
-        border-radius: 24px;
-        padding: 2.5rem;
-        text-align: center;
-        margin: 2rem auto;
-        max-width: 600px;
-        animation: fadeIn 0.6s ease;
-    }}
-    
-    @keyframes fadeIn {{
-        from {{ opacity: 0; transform: translateY(20px); }}
-        to {{ opacity: 1; transform: translateY(0); }}
-    }}
-    
-    .emotion-emoji-large {{
-        font-size: 5rem;
-        animation: bounce 2s ease-in-out infinite;
-        display: block;
-        margin-bottom: 1rem;
-    }}
-    
-    @keyframes bounce {{
-        0%, 100% {{ transform: translateY(0); }}
-        50% {{ transform: translateY(-15px); }}
-    }}
-    
-    .emotion-title {{
-        font-size: 2rem;
-        font-weight: 700;
-        color: #FFFFFF;
-        margin: 1rem 0;
-        text-shadow: 0 2px 10px rgba(0,0,0,0.3);
-    }}
-    
-    .emotion-subtitle {{
-        font-size: 1.2rem;
-        color: rgba(255,255,255,0.9);
-        font-weight: 400;
-    }}
-    
-    /* Expander */
-    .streamlit-expanderHeader {{
-        background-color: rgba(30, 41, 59, 0.6) !important;
-        border-radius: 10px !important;
-        color: #E2E8F0 !important;
-    }}
-    
-    /* Radio buttons */
-    .stRadio > label {{
-        color: #E2E8F0 !important;
-    }}
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab"] {{
-        color: #94A3B8 !important;
-    }}
-    
-    .stTabs [aria-selected="true"] {{
-        color: {primary} !important;
-    }}
-    
-    /* Scrollbar */
-    ::-webkit-scrollbar {{
-        width: 10px;
-    }}
-    
-    ::-webkit-scrollbar-track {{
-        background: #1E293B;
-    }}
-    
-    ::-webkit-scrollbar-thumb {{
-        background: {primary};
-        border-radius: 5px;
-    }}
-    </style>
-    """
-    
-    st.markdown(css, unsafe_allow_html=True)
+    with metrics.span("apply_theme"):
+        apply_app_theme(emotion, theme_slot)
 
 # Apply initial theme
 apply_dynamic_theme(st.session_state.current_emotion)
@@ -233,26 +98,51 @@ with st.sidebar:
 
     st.markdown("---")
 
-    # Today's stats
-    try:
-        df = pd.read_csv('data/emotion_journal.csv')
-        if not df.empty:
-            st.markdown("### 📈 Today's Stats")
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            today_df = df[df['timestamp'].dt.date == datetime.now().date()]
-            st.metric("Check-ins", len(today_df))
-            if not today_df.empty:
-                st.metric("Dominant", today_df['emotion'].mode()[0].capitalize())
-    except:
-        st.info("No journal entries yet")
+    # Today's stats (one rollup row per emotion, not a scan of the journal)
+    today_counts, _ = summarize_rollups(journal.daily_rollups(start=date.today()))
+    if today_counts:
+        st.markdown("### 📈 Today's Stats")
+        st.metric("Check-ins", sum(today_counts.values()))
+        st.metric("Dominant", next(iter(today_counts)).capitalize())
+    else:
+        st.info("No journal entries yet today")
 
     st.markdown("---")
     
     # Settings
     sound_on = st.checkbox("🔊 Emotion Sounds", value=True)
+    small_sounds = st.checkbox("📶 Low-Data Sounds", value=False, disabled=not sound_on)
     theme_on = st.checkbox("🎨 Adaptive Theme", value=True)
+    sentence_on = st.checkbox("🧩 Sentence-by-Sentence", value=True)
     
     st.markdown("---")
+
+    # Admin panel (logged-in EMOTION_ADMINS only): this process's span
+    # timings and counters, as of the end of the previous rerun
+    if is_admin(st.user):
+        with st.expander("🛠️ Performance Metrics"):
+            metrics.set_enabled(st.toggle("Collect metrics", value=metrics.enabled()))
+            spans, counters = metrics.snapshot()
+            if spans:
+                st.dataframe([
+                    {
+                        'span': name,
+                        'calls': s['count'],
+                        'mean ms': round(s['sum_seconds'] / s['count'] * 1000, 2),
+                        'p50 ≤ ms': s['p50_seconds'] * 1000,
+                        'p99 ≤ ms': s['p99_seconds'] * 1000,
+                    }
+                    for name, s in spans.items()
+                ], hide_index=True, use_container_width=True)
+            else:
+                st.caption("Nothing recorded yet")
+            for name, value in counters.items():
+                st.caption(f"{name}: {value:,}")
+            st.download_button("⬇️ Prometheus text", metrics.render_prometheus(),
+                               file_name="emotionllm.prom", mime="text/plain")
+        st.markdown("---")
+    if st.user.get("is_logged_in"):
+        st.button("🚪 Log out", on_click=st.logout)
     st.caption("Built with ❤️ for emotional intelligence")
 
 # ==================== HOME PAGE ====================
@@ -272,10 +162,28 @@ if page == "🏠 Home":
     with col2:
         analyze_btn = st.button("🔍 Understand My Emotion", use_container_width=True)
 
+    # Loaded and warmed up once per process (or a client for a shared
+    # utils.inference_server when EMOTION_DETECTOR_URL is set)
+    detector = get_detector()
+
     if analyze_btn and user_input.strip():
+        sentences = None
+        if sentence_on and len(split_sentences(user_input)) > 1:
+            # Show each sentence as soon as its batch is scored, then label
+            # the entry as a whole from all of them
+            st.markdown("### 🧩 Sentence by Sentence")
+            sentences = []
+            for result in stream_sentence_emotions(detector, user_input):
+                sentences.append(result)
+                emoji = theme_for(result['emotion'])['emoji']
+                st.markdown(f"{emoji} **{result['emotion'].capitalize()}** ({result['confidence']:.0%}) — {result['text']}")
+
         with st.spinner("🧠 Analyzing your emotions..."):
             # Get emotion prediction
-            emotion, confidence, probs = detector.predict_emotion(user_input)
+            if sentences:
+                emotion, confidence, probs = combine_sentence_emotions(sentences)
+            else:
+                emotion, confidence, probs = detector.predict_emotion(user_input)
             
             # Update session state
             st.session_state.current_emotion = emotion
@@ -286,19 +194,19 @@ if page == "🏠 Home":
             
             # Play sound
             if sound_on:
-                play_emotion_sound(emotion)
+                play_emotion_sound(emotion, small=small_sounds)
             
+            # Earlier entries like this one (looked up before it is logged,
+            # so it never matches itself)
+            similar = journal.similar(user_input, k=3)
+
             # Log emotion
-            logger.log_emotion(emotion, confidence, user_input, probs)
+            logger.log_emotion(emotion, confidence, user_input, probs, user_id=user_id, sentences=sentences)
             
             st.markdown("---")
             
             # Display emotion card with proper theme
-            theme = EMOTION_THEMES.get(emotion, {
-                'emoji': '😌',
-                'message': 'Emotion detected',
-                'primary': '#3B82F6'
-            })
+            theme = theme_for(emotion)
             
             st.markdown(f"""
             <div class="emotion-display-card">
@@ -327,34 +235,46 @@ if page == "🏠 Home":
             with col2:
                 # Emotion breakdown chart
                 st.markdown("### 🎚️ Emotion Breakdown")
+                import plotly.graph_objects as go
                 
-                fig = go.Figure(data=[
-                    go.Bar(
-                        x=list(probs.keys()),
-                        y=list(probs.values()),
-                        text=[f"{v:.1%}" for v in probs.values()],
-                        textposition="auto",
-                        marker=dict(
-                            color=list(probs.values()),
-                            colorscale='Viridis',
-                            showscale=False
+                with metrics.span("figure_breakdown"):
+                    fig = go.Figure(data=[
+                        go.Bar(
+                            x=list(probs.keys()),
+                            y=list(probs.values()),
+                            text=[f"{v:.1%}" for v in probs.values()],
+                            textposition="auto",
+                            marker=dict(
+                                color=list(probs.values()),
+                                colorscale='Viridis',
+                                showscale=False
+                            )
                         )
+                    ])
+                    
+                    fig.update_layout(
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font=dict(color='#E2E8F0'),
+                        xaxis=dict(title="Emotions", gridcolor='rgba(255,255,255,0.1)'),
+                        yaxis=dict(title="Probability", gridcolor='rgba(255,255,255,0.1)'),
+                        height=300
                     )
-                ])
-                
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#E2E8F0'),
-                    xaxis=dict(title="Emotions", gridcolor='rgba(255,255,255,0.1)'),
-                    yaxis=dict(title="Probability", gridcolor='rgba(255,255,255,0.1)'),
-                    height=300
-                )
                 
                 st.plotly_chart(fig, use_container_width=True)
             
+            # Similar past entries (approximate nearest neighbours, not a journal scan)
+            if not similar.empty:
+                st.markdown("---")
+                st.markdown("### 🔁 You've Felt Like This Before")
+                for _, row in similar.iterrows():
+                    past = theme_for(row['emotion'])
+                    ts = row['timestamp'].strftime("%B %d, %Y • %I:%M %p")
+                    with st.expander(f"{past['emoji']} **{str(row['emotion']).capitalize()}** — {ts} ({row['similarity']:.0%} similar)"):
+                        st.info(row['text'] if isinstance(row['text'], str) and row['text'] else 'No text recorded')
+            
             # Breathing exercise for negative emotions
-            if emotion.lower() in ['sad', 'sadness', 'fear', 'anger', 'angry']:
+            if label_id(emotion) in DISTRESS:
                 st.markdown("---")
                 st.warning(f"😰 Feeling {emotion}? Let's try a calming technique.")
                 
@@ -378,132 +298,143 @@ if page == "🏠 Home":
             st.markdown("---")
             st.markdown("### 🎵 Mood-Based Music Therapy")
             
-            playlists = {
-                "joy": "https://open.spotify.com/playlist/37i9dQZF1DXdPec7aLTmlC",
-                "happy": "https://open.spotify.com/playlist/37i9dQZF1DXdPec7aLTmlC",
-                "sad": "https://open.spotify.com/playlist/37i9dQZF1DWVrtsSlLKzro",
-                "sadness": "https://open.spotify.com/playlist/37i9dQZF1DWVrtsSlLKzro",
-                "anger": "https://open.spotify.com/playlist/37i9dQZF1DWYxwmBaMqxsl",
-                "angry": "https://open.spotify.com/playlist/37i9dQZF1DWYxwmBaMqxsl",
-                "fear": "https://open.spotify.com/playlist/37i9dQZF1DX3rxVfibe1L0",
-                "love": "https://open.spotify.com/playlist/37i9dQZF1DX50QitC6Oqtn",
-                "surprise": "https://open.spotify.com/playlist/37i9dQZF1DX3rxVfibe1L0",
-                "neutral": "https://open.spotify.com/playlist/37i9dQZF1DWZUAeYvs88zc"
-            }
-            
-            url = playlists.get(emotion.lower(), playlists["neutral"])
+            url = PLAYLISTS[label_id(emotion)]
             st.markdown(f"🎧 [Listen to a **{emotion.capitalize()}** Playlist on Spotify]({url})")
 
 # ==================== ANALYTICS PAGE ====================
 elif page == "📊 Analytics":
+    from utils.analytics_charts import analytics_figures
+
     st.markdown("<h1 style='text-align:center; color: #E2E8F0;'>📊 Your Emotional Journey</h1>", unsafe_allow_html=True)
 
-    if Path("data/emotion_journal.csv").exists():
-        df = pd.read_csv("data/emotion_journal.csv")
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['date'] = df['timestamp'].dt.date
+    # Any span: the range picks hour/day/week/month rollups, so even
+    # multi-year views read a few hundred rows and never raw entries
+    picked = st.date_input(
+        "📅 Date range",
+        value=(date.today() - timedelta(days=30), date.today()),
+        max_value=date.today()
+    )
+    start = picked[0] if len(picked) > 0 else date.today() - timedelta(days=30)
+    end = (picked[1] if len(picked) > 1 else start) + timedelta(days=1)
 
-            # Metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Logs", len(df))
-            with col2:
-                st.metric("Most Frequent", df['emotion'].mode()[0].capitalize())
-            with col3:
-                avg_conf = df['intensity'].mean() if 'intensity' in df.columns else 0
-                st.metric("Avg Confidence", f"{avg_conf:.0%}")
-            with col4:
-                st.metric("Unique Emotions", df['emotion'].nunique())
+    # Downsampled and cached until the journal changes
+    charts = analytics_figures(journal, start=start, end=end)
+    counts = charts['counts']
+    if counts:
+        # Metrics
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Logs", sum(counts.values()))
+        with col2:
+            st.metric("Most Frequent", next(iter(counts)).capitalize())
+        with col3:
+            st.metric("Avg Confidence", f"{charts['avg_confidence']:.0%}")
+        with col4:
+            st.metric("Unique Emotions", len(counts))
+
+        st.markdown("---")
+
+        # Timeline
+        st.markdown(f"### 📈 Emotion Timeline ({start:%b %d, %Y} – {end - timedelta(days=1):%b %d, %Y})")
+        st.caption(f"Grouped by {charts['resolution']}")
+        st.plotly_chart(charts['timeline'], use_container_width=True)
+
+        # Distribution
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 🥧 Emotion Distribution")
+            st.plotly_chart(charts['distribution'], use_container_width=True)
+        
+        with col2:
+            st.markdown("### 📊 Intensity Over Time")
+            st.plotly_chart(charts['intensity'], use_container_width=True)
 
+        # Mixed feelings, from the full probability vector of every check-in
+        if charts['mean_distribution'] is not None:
             st.markdown("---")
+            st.markdown("### 🎲 Mixed Feelings")
+            st.caption("Average probability of each emotion across your check-ins")
+            st.plotly_chart(charts['mean_distribution'], use_container_width=True)
 
-            # Timeline
-            st.markdown("### 📈 Emotion Timeline (Last 30 Days)")
-            df_recent = df[df['timestamp'] >= datetime.now() - pd.Timedelta(days=30)]
-            daily = df_recent.groupby(['date', 'emotion']).size().reset_index(name='count')
-
-            fig = px.line(
-                daily,
-                x='date',
-                y='count',
-                color='emotion',
-                title='Daily Emotion Trends',
-                markers=True
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#E2E8F0'),
-                xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
-            )
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Distribution
             col1, col2 = st.columns(2)
-            
             with col1:
-                st.markdown("### 🥧 Emotion Distribution")
-                counts = df['emotion'].value_counts()
-                pie = px.pie(
-                    names=counts.index,
-                    values=counts.values,
-                    hole=0.4
-                )
-                pie.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#E2E8F0')
-                )
-                st.plotly_chart(pie, use_container_width=True)
-            
+                st.markdown("### 🌫️ Uncertainty Over Time")
+                st.caption("Entropy: how spread out the feelings were. Ambivalence: how close the runner-up came.")
+                st.plotly_chart(charts['uncertainty'], use_container_width=True)
             with col2:
-                st.markdown("### 📊 Intensity Over Time")
-                if 'intensity' in df.columns:
-                    intensity_trend = df_recent.groupby('date')['intensity'].mean().reset_index()
-                    fig = px.line(intensity_trend, x='date', y='intensity', markers=True)
-                    fig.update_layout(
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color='#E2E8F0'),
-                        xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                        yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("📝 No emotion data yet. Start tracking on the Home page!")
+                st.markdown("### 🥈 Second-Choice Emotions")
+                st.caption("When one emotion came out on top, which one came next")
+                st.plotly_chart(charts['second_choice'], use_container_width=True)
+    elif charts['has_data']:
+        st.info("📭 No check-ins in this date range. Try a wider one!")
     else:
-        st.info("📝 No emotion logs found. Start your first check-in!")
+        st.info("📝 No emotion data yet. Start tracking on the Home page!")
 
 # ==================== JOURNAL PAGE ====================
 elif page == "📝 Journal":
+    import pandas as pd
+
     st.markdown("<h1 style='text-align:center; color: #E2E8F0;'>📝 Your Emotion Journal</h1>", unsafe_allow_html=True)
 
-    if Path("data/emotion_journal.csv").exists():
-        df = pd.read_csv("data/emotion_journal.csv")
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp', ascending=False)
-            
-            st.write(f"**Showing {min(20, len(df))} most recent entries**")
+    if 'journal_pages' not in st.session_state:
+        st.session_state.journal_pages = 1
+
+    # Search (full-text index, newest matches first)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        query = st.text_input("🔎 Search your entries", placeholder="e.g. work, sleep, family")
+    with col2:
+        emotions, _ = summarize_rollups(journal.daily_rollups())
+        emotion_filter = st.selectbox("Emotion", ["All"] + sorted(emotions))
+    with col3:
+        date_range = st.date_input("Date range", value=())
+
+    cursor = None
+    if query.strip():
+        start = date_range[0] if len(date_range) > 0 else None
+        end = date_range[1] + timedelta(days=1) if len(date_range) > 1 else None
+        df = journal.search(
+            query,
+            emotion=None if emotion_filter == "All" else emotion_filter,
+            start=start,
+            end=end,
+            limit=50
+        )
+        heading = f"**{len(df)} matching entries**"
+    else:
+        # Cursor pagination: each page is a constant-time read of 20 rows
+        pages = []
+        for _ in range(st.session_state.journal_pages):
+            page_df, cursor = journal.page(20, cursor)
+            pages.append(page_df)
+            if cursor is None:
+                break
+        df = pd.concat(pages, ignore_index=True)
+        heading = f"**Showing {len(df)} most recent entries**"
+
+    if not df.empty:
+        st.write(heading)
+        
+        for _, row in df.iterrows():
+            emotion = row['emotion']
+            theme = theme_for(emotion)
+            ts = row['timestamp'].strftime("%B %d, %Y • %I:%M %p")
             
-            for _, row in df.head(20).iterrows():
-                emotion = row['emotion']
-                theme = EMOTION_THEMES.get(emotion, {'emoji': '😌'})
-                ts = row['timestamp'].strftime("%B %d, %Y • %I:%M %p")
-                
-                with st.expander(f"{theme['emoji']} **{emotion.capitalize()}** — {ts}"):
-                    intensity = row.get('intensity', row.get('confidence', 0))
-                    st.write(f"**Confidence:** {intensity:.1%}")
-                    st.progress(intensity)
-                    st.markdown("**What you wrote:**")
-                    text = row.get('note', row.get('text', 'No text recorded'))
-                    st.info(text)
-        else:
-            st.info("📔 Your journal is empty. Start logging on the Home page!")
+            with st.expander(f"{theme['emoji']} **{emotion.capitalize()}** — {ts}"):
+                confidence = float(row['confidence'])
+                st.write(f"**Confidence:** {confidence:.1%}")
+                st.progress(confidence)
+                st.markdown("**What you wrote:**")
+                st.info(row['text'] if isinstance(row['text'], str) and row['text'] else 'No text recorded')
+
+        if cursor is not None and st.button("⬇️ Load 20 older entries"):
+            st.session_state.journal_pages += 1
+            st.rerun()
+    elif query.strip():
+        st.info("🔎 No entries match your search.")
     else:
-        st.info("📔 No journal file found. Log emotions to create one.")
+        st.info("📔 Your journal is empty. Start logging on the Home page!")
 
 # ==================== RESOURCES PAGE ====================
 elif page == "📚 Resources":
@@ -0,0 +1,3 @@
+"""
+Performance benchmarks and budgets (run as `python -m benchmarks.<name>`)
+"""
@@ -0,0 +1,239 @@
+"""
+Baseline timings of the app's hot paths, as JSON for tracking regressions
+
+* predict: predict_emotion latency (one text per call) and predict_emotions
+  latency per batch, p50/p99, with the prediction cache off
+* log: log_emotion throughput into a fresh CSV journal, synchronous and
+  with the write-behind queue
+* per synthetic journal size (see benchmarks.synthetic_journal):
+  - load: cold parse of the whole CSV into the typed frame
+  - sidebar: today's stats from the daily rollup, cold (rollup built from
+    the raw journal) and warm
+  - analytics: analytics_figures() over the last week, the last 90 days and
+    everything, with the figure cache cleared before each run
+  - similar: building the similarity index from the journal, then
+    similar() top-5 queries against it
+
+Each journal is copied into a temporary directory first, so the sidecars
+(rollups, indexes) are built from scratch every run and the cached inputs
+under benchmarks/data stay clean.
+
+    python -m benchmarks.hot_paths --sizes 10k 100k --out bench.json
+"""
+import argparse
+import json
+import math
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.synthetic_journal import (
+    SPAN, START, iter_records, parse_size, size_label, synthetic_journal
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def summarize(samples_ms):
+    """min / p50 / p99 / mean of millisecond samples (nearest-rank percentiles)"""
+    ordered = sorted(samples_ms)
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    return {
+        'n': len(ordered),
+        'min_ms': ordered[0],
+        'p50_ms': rank(0.50),
+        'p99_ms': rank(0.99),
+        'mean_ms': sum(ordered) / len(ordered),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_predict(model_path, calls=500, batch_size=64, batches=50, seed=0):
+    from utils.emotion_helpers import EmotionDetector
+
+    detector = EmotionDetector(model_path)
+    texts = [text for _, _, _, text in iter_records(max(calls, batch_size * batches), seed)]
+    detector.predict_emotions(texts[:batch_size])  # first-call allocations
+
+    single = []
+    for text in texts[:calls]:
+        start = time.perf_counter()
+        detector.predict_emotion(text)
+        single.append((time.perf_counter() - start) * 1000)
+
+    batched = []
+    for i in range(batches):
+        batch = texts[i * batch_size:(i + 1) * batch_size]
+        start = time.perf_counter()
+        detector.predict_emotions(batch)
+        batched.append((time.perf_counter() - start) * 1000)
+    batch_stats = summarize(batched)
+    return {
+        'model': str(model_path),
+        'single': summarize(single),
+        'batched': {
+            **batch_stats,
+            'batch_size': batch_size,
+            'texts_per_second': batch_size * 1000 / batch_stats['mean_ms'],
+        },
+    }
+
+
+def bench_log(work_dir, records=2_000, async_mode=False, seed=0):
+    from utils.emotion_helpers import EmotionLogger
+    from utils.journal_store import CsvJournalStore
+
+    mode = 'async' if async_mode else 'sync'
+    store = CsvJournalStore(Path(work_dir) / f"log-{mode}.csv")
+    logger = EmotionLogger(store, async_mode=async_mode,
+                           breakdown_path=Path(work_dir) / f"log-{mode}.breakdown.jsonl")
+    rows = list(iter_records(records, seed))
+    calls = []
+    start = time.perf_counter()
+    for _, emotion, confidence, text in rows:
+        call = time.perf_counter()
+        logger.log_emotion(emotion, float(confidence), text)
+        calls.append((time.perf_counter() - call) * 1000)
+    logger.flush()
+    elapsed = time.perf_counter() - start
+    logger.close()
+    return {
+        'records': records,
+        'seconds': elapsed,
+        'records_per_second': records / elapsed,
+        'call': summarize(calls),
+    }
+
+
+def bench_journal(source, repeat=5):
+    import pandas as pd
+
+    from utils import analytics_charts
+    from utils.journal_repository import JournalRepository
+    from utils.journal_store import CsvJournalStore, summarize_rollups
+
+    with tempfile.TemporaryDirectory(prefix="emotion-bench-") as tmp:
+        path = Path(tmp) / "emotion_journal.csv"
+        shutil.copyfile(source, path)
+        result = {'bytes': path.stat().st_size}
+
+        frames = []
+        load = timed(lambda: frames.append(JournalRepository(path).frame()), repeat)
+        result['rows'] = len(frames[-1])
+        result['load'] = {**summarize(load), 'rows_per_second': result['rows'] * 1000 / min(load)}
+        frames.clear()
+
+        # The app's "today" is the journal's last day here
+        last_day = (START + SPAN).date() - timedelta(days=1)
+        store = CsvJournalStore(path)
+        cold = timed(lambda: summarize_rollups(store.daily_rollups(start=last_day)), 1)
+        warm = timed(lambda: summarize_rollups(store.daily_rollups(start=last_day)), repeat)
+        result['sidebar'] = {'cold_ms': cold[0], 'warm': summarize(warm)}
+
+        end = pd.Timestamp(START + SPAN)
+        windows = {
+            'week': (end - pd.Timedelta(days=7), end),
+            '90_days': (end - pd.Timedelta(days=90), end),
+            'all': (pd.Timestamp(START), end),
+        }
+        # Period rollups are built on first use; keep that out of the window timings
+        result['analytics'] = {'rollup_build_ms': timed(lambda: store.rollups('month'), 1)[0]}
+        for name, (start, stop) in windows.items():
+            def build():
+                analytics_charts._figure_cache.clear()
+                return analytics_charts.analytics_figures(store, start.date(), stop.date())
+
+            result['analytics'][name] = {
+                'resolution': build()['resolution'],
+                **summarize(timed(build, repeat)),
+            }
+
+        queries = [text for _, _, _, text in iter_records(max(repeat, 20), seed=1)]
+        build_ms = timed(store.similar_index.ensure, 1)[0]
+        samples = [timed(lambda: store.similar(text, k=5), 1)[0] for text in queries]
+        result['similar'] = {'index_build_ms': build_ms, **summarize(samples)}
+        return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark prediction, logging and journal aggregation")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "100k"],
+                        help="synthetic journal sizes (10k, 100k, 1m, 10m or a row count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per journal measurement")
+    parser.add_argument("--model", type=Path, help="model to benchmark (default: the one the app loads)")
+    parser.add_argument("--skip-predict", action="store_true")
+    parser.add_argument("--log-records", type=int, default=2_000)
+    parser.add_argument("--out", type=Path, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+    }
+
+    if not args.skip_predict:
+        from utils.emotion_helpers import default_model_path
+
+        model_path = args.model or default_model_path()
+        if model_path.exists():
+            report['predict'] = bench_predict(model_path, seed=args.seed)
+        else:
+            report['predict'] = {'skipped': f"no model at {model_path}"}
+
+    with tempfile.TemporaryDirectory(prefix="emotion-bench-") as tmp:
+        report['log'] = {
+            mode: bench_log(tmp, args.log_records, async_mode=mode == 'async', seed=args.seed)
+            for mode in ('sync', 'async')
+        }
+
+    report['journals'] = {}
+    for size in args.sizes:
+        rows = parse_size(size)
+        start = time.perf_counter()
+        source = synthetic_journal(rows, args.seed)
+        generate_seconds = time.perf_counter() - start
+        result = bench_journal(source, args.repeat)
+        result['generate_seconds'] = generate_seconds  # ~0 when the file was already cached
+        report['journals'][size_label(rows)] = result
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Startup import-time and time-to-first-render budget
+
+Two measurements, each in a fresh interpreter so nothing is already cached
+in sys.modules:
+
+* import time: `python -X importtime` over the imports app.py does before
+  it draws anything. The per-module report is parsed to get the total and
+  the slowest modules. The run also fails if a module that should be
+  deferred (plotly, scikit-learn, ...) is imported.
+* first render: wall time from interpreter start until Streamlit's AppTest
+  has finished the first run of app.py.
+
+Prints a JSON report and exits with status 1 when a budget is exceeded:
+
+    python -m benchmarks.startup --import-budget-ms 600 --render-budget-ms 4000
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What app.py imports at module level, in the same order
+STARTUP_IMPORTS = """
+import streamlit
+from utils import get_detector, get_logger, get_reframe, get_affirmation
+from utils import split_sentences, stream_sentence_emotions, combine_sentence_emotions
+from utils import play_emotion_sound, summarize_rollups, apply_app_theme
+from utils import theme_for, label_id, by_label, DISTRESS
+from utils import metrics
+"""
+
+# Must only be imported by the pages/functions that use them
+DEFERRED_MODULES = ("plotly", "sklearn", "scipy", "joblib")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+FIRST_RENDER = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout={timeout})
+at.run()
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "exceptions": [str(e.value) for e in at.exception],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """-X importtime report -> [(module, self_us, cumulative_us, depth)]"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def measure_imports(code=STARTUP_IMPORTS, top=10):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = parse_importtime(result.stderr)
+    total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    modules = {module for module, _, _, _ in rows}
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return {
+        'total_ms': total_us / 1000,
+        'modules': len(modules),
+        'deferred_imported': sorted(
+            name for name in DEFERRED_MODULES
+            if any(module == name or module.startswith(name + ".") for module in modules)
+        ),
+        'slowest_self_ms': {module: self_us / 1000 for module, self_us, _, _ in slowest},
+    }
+
+
+def measure_first_render(timeout=60):
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER.format(timeout=timeout)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return {'ms': report['seconds'] * 1000, 'exceptions': report['exceptions']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check app startup against an import/render time budget")
+    parser.add_argument("--import-budget-ms", type=float, default=800.0)
+    parser.add_argument("--render-budget-ms", type=float, default=5000.0)
+    parser.add_argument("--skip-render", action="store_true", help="only measure imports")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    args = parser.parse_args(argv)
+
+    runs = [measure_imports() for _ in range(args.repeat)]
+    imports = min(runs, key=lambda r: r['total_ms'])
+    report = {'imports': imports, 'budgets': {'import_ms': args.import_budget_ms}}
+    failures = []
+    if imports['total_ms'] > args.import_budget_ms:
+        failures.append(f"startup imports took {imports['total_ms']:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    if imports['deferred_imported']:
+        failures.append(f"imported at startup: {', '.join(imports['deferred_imported'])}")
+
+    if not args.skip_render:
+        render = min((measure_first_render() for _ in range(args.repeat)), key=lambda r: r['ms'])
+        report['first_render'] = render
+        report['budgets']['render_ms'] = args.render_budget_ms
+        if render['exceptions']:
+            failures.append(f"first render raised: {render['exceptions'][0]}")
+        if render['ms'] > args.render_budget_ms:
+            failures.append(f"first render took {render['ms']:.0f} ms (budget {args.render_budget_ms:.0f} ms)")
+
+    report['failures'] = failures
+    print(json.dumps(report, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Deterministic synthetic journals in the current CSV schema
+
+The same (rows, seed) always gives a byte-identical file, so benchmark runs
+on different machines or commits read exactly the same input. Every journal
+covers the same three years, oldest first, so larger ones are denser rather
+than longer and Analytics always charts the same number of periods.
+Emotions are skewed the way real check-ins are, and the text is one to
+three short sentences from per-emotion phrase pools.
+
+    python -m benchmarks.synthetic_journal 100k              # -> benchmarks/data/journal-100k-s0.csv
+    python -m benchmarks.synthetic_journal 1m --out big.csv --seed 7
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils.journal_repository import JOURNAL_COLUMNS, TIMESTAMP_FORMAT
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+START = datetime(2023, 1, 1)
+SPAN = timedelta(days=3 * 365)
+WRITE_ROWS = 50_000
+
+EMOTION_WEIGHTS = {'neutral': 30, 'happy': 25, 'anxious': 20, 'sad': 15, 'angry': 10}
+PHRASES = {
+    'happy': ["had a great day", "feeling grateful for my friends", "finally finished the project",
+              "the sun was out all afternoon", "laughed a lot at dinner"],
+    'sad': ["miss my family", "feeling low and tired", "nothing went right today",
+            "cried after the call", "lonely in the evening"],
+    'anxious': ["worried about the deadline", "can't stop overthinking", "nervous about tomorrow",
+                "my chest feels tight", "too many things to handle at work"],
+    'angry': ["so frustrated with my manager", "people keep interrupting me", "the train was late again",
+              "annoyed that nobody listened", "furious about the bill"],
+    'neutral': ["went to work as usual", "cooked pasta for dinner", "read a few chapters",
+                "nothing special happened", "did some laundry and cleaned up"],
+}
+FILLERS = ["today", "again", "this morning", "tonight", "at the office", "honestly", "I think"]
+
+
+def parse_size(value):
+    """'100k' / '1m' / '2500' -> row count"""
+    value = str(value).lower()
+    if value in SIZES:
+        return SIZES[value]
+    if value[-1:] in ('k', 'm'):
+        return int(float(value[:-1]) * (1_000 if value[-1] == 'k' else 1_000_000))
+    return int(value)
+
+
+def size_label(rows):
+    for label, count in SIZES.items():
+        if count == rows:
+            return label
+    return str(rows)
+
+
+def iter_records(rows, seed=0, start=START, span=SPAN):
+    """(timestamp string, emotion, confidence string, text) rows, oldest first"""
+    rng = random.Random(seed)
+    emotions = list(EMOTION_WEIGHTS)
+    cumulative = []
+    total = 0
+    for emotion in emotions:
+        total += EMOTION_WEIGHTS[emotion]
+        cumulative.append(total)
+    # One slot per row; each entry lands at a random second of its slot
+    slot = span.total_seconds() / max(rows, 1)
+    for i in range(rows):
+        ts = start + timedelta(seconds=int(slot * i + rng.random() * slot))
+        emotion = rng.choices(emotions, cum_weights=cumulative)[0]
+        pool = PHRASES[emotion]
+        sentences = [rng.choice(pool) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.5:
+            sentences[-1] = f"{sentences[-1]} {rng.choice(FILLERS)}"
+        text = ". ".join(s[0].upper() + s[1:] for s in sentences) + "."
+        yield ts.strftime(TIMESTAMP_FORMAT), emotion, f"{rng.uniform(0.35, 0.99):.4f}", text
+
+
+def write_journal(path, rows, seed=0):
+    """Write a synthetic journal to path (atomically) and return path"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(JOURNAL_COLUMNS)
+        batch = []
+        for record in iter_records(rows, seed):
+            batch.append(record)
+            if len(batch) == WRITE_ROWS:
+                writer.writerows(batch)
+                batch.clear()
+        writer.writerows(batch)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def synthetic_journal(rows, seed=0, data_dir=DATA_DIR):
+    """Path of the (rows, seed) journal under data_dir, generated on first use"""
+    path = Path(data_dir) / f"journal-{size_label(rows)}-s{seed}.csv"
+    if not path.exists():
+        write_journal(path, rows, seed)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic emotion journal")
+    parser.add_argument("size", help=f"row count, or one of {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help=f"output CSV (default: under {DATA_DIR})")
+    args = parser.parse_args(argv)
+
+    rows = parse_size(args.size)
+    path = write_journal(args.out, rows, args.seed) if args.out else synthetic_journal(rows, args.seed)
+    print(f"Wrote {rows:,} rows to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,22 @@
-import pandas as pd, csv, os
+import argparse, os
 
-path = "data/emotion_journal.csv"
+from utils.journal_migrate import migrate_journal
 
-if not os.path.exists(path):
+parser = argparse.ArgumentParser(description="Repair the journal and migrate it to the current schema")
+parser.add_argument("path", nargs="?", default="data/emotion_journal.csv")
+parser.add_argument("--chunk-rows", type=int, default=10_000)
+parser.add_argument("--restart", action="store_true", help="ignore any checkpoint from an interrupted run")
+args = parser.parse_args()
+
+if not os.path.exists(args.path):
     print("❌ No CSV file found!")
 else:
     try:
-        df = pd.read_csv(path, on_bad_lines='skip')
-        if len(df.columns) < 4:
-            df.columns = ['timestamp', 'emotion', 'confidence', 'text'][:len(df.columns)]
-        elif len(df.columns) > 4:
-            df = df.iloc[:, :4]
-            df.columns = ['timestamp', 'emotion', 'confidence', 'text']
-        df.to_csv(path, index=False, quoting=csv.QUOTE_ALL)
-        print("✅ Fixed CSV successfully!")
+        result = migrate_journal(args.path, chunk_rows=args.chunk_rows, resume=not args.restart)
+        if result['resumed']:
+            print("↪️ Resumed from checkpoint")
+        print(f"✅ Fixed CSV successfully! {result['rows_kept']} rows kept")
+        if result['rows_quarantined']:
+            print(f"⚠️ {result['rows_quarantined']} bad rows quarantined in {result['quarantine_file']}")
     except Exception as e:
         print("❌ Error:", e)
-
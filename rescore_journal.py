@@ -0,0 +1,48 @@
+import argparse, os, sys
+
+from utils.journal_rescore import CHUNK_ROWS, apply_rescored, journal_paths, rescore_journal
+
+parser = argparse.ArgumentParser(description="Re-score the whole journal with the current emotion model")
+parser.add_argument("path", nargs="?", default=None,
+                    help="CSV or SQLite journal (default: every journal file of EMOTION_JOURNAL_BACKEND)")
+parser.add_argument("--model", default=None, help="model pickle or compact export (default: newest available)")
+parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+parser.add_argument("--restart", action="store_true", help="ignore chunks finished by an interrupted run")
+parser.add_argument("--apply", action="store_true",
+                    help="then write the new labels into the journal (otherwise only <stem>.rescored.csv is written)")
+args = parser.parse_args()
+
+
+def report(done, total):
+    print(f"\r⏳ {done}/{total} rows", end="", flush=True)
+
+
+if args.path:
+    paths = [args.path]
+else:
+    try:
+        paths = journal_paths()
+    except ValueError as e:
+        print("❌ Error:", e)
+        sys.exit(2)
+
+paths = [path for path in paths if os.path.exists(path)]
+if not paths:
+    print("❌ No journal file found!")
+
+for path in paths:
+    try:
+        result = rescore_journal(
+            path, model_path=args.model, workers=args.workers,
+            chunk_rows=args.chunk_rows, resume=not args.restart, progress=report
+        )
+        print()
+        if result['resumed_chunks']:
+            print(f"↪️ Resumed: {result['resumed_chunks']}/{result['chunks']} chunks were already done")
+        print(f"✅ Re-scored {result['rows']} rows with {result['model_version']}")
+        print(f"📄 {result['output_file']}")
+        if args.apply:
+            print(f"🔁 Applied new labels to {apply_rescored(path)} rows of {path}")
+    except Exception as e:
+        print(f"\n❌ Error ({path}):", e)
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+# The app runs from the repository root; make `utils` importable the same way
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+TRAINING = [
+    ("I am so happy and excited today", "joy"), ("what a wonderful sunny day", "joy"),
+    ("laughed all evening with friends", "joy"), ("I feel so sad and alone", "sadness"),
+    ("cried after the call with mom", "sadness"), ("I miss them so much", "sadness"),
+    ("I'm scared about tomorrow's exam", "fear"), ("nervous and worried about work", "fear"),
+    ("this is terrible, I'm furious", "anger"), ("so angry at my manager", "anger"),
+    ("a normal day, nothing special", "neutral"), ("went to the store and back", "neutral"),
+]
+
+
+@pytest.fixture(scope="session")
+def training_texts():
+    return [text for text, _ in TRAINING]
+
+
+@pytest.fixture(scope="session")
+def emotion_model(tmp_path_factory, training_texts):
+    """A small fitted TF-IDF + logistic regression pipeline, pickled like models/emotion_model.pkl"""
+    model = make_pipeline(TfidfVectorizer(ngram_range=(1, 2)), LogisticRegression(max_iter=1000))
+    model.fit(training_texts, [label for _, label in TRAINING])
+    path = tmp_path_factory.mktemp("model") / "emotion_model.pkl"
+    joblib.dump(model, path)
+    return path
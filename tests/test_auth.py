@@ -0,0 +1,37 @@
+from utils.auth import is_admin, journal_user_id
+from utils.journal_partitions import DEFAULT_USER
+
+ALICE = {
+    "is_logged_in": True, "iss": "https://accounts.example.com", "sub": "1234",
+    "email": "Alice@example.com", "email_verified": True,
+}
+
+
+def test_single_user_app_uses_the_default_journal():
+    assert journal_user_id({}, required=False) == DEFAULT_USER
+
+
+def test_anonymous_visitor_must_log_in():
+    assert journal_user_id({"is_logged_in": False}) is None
+    assert journal_user_id({"is_logged_in": True}) is None
+
+
+def test_journal_id_is_the_issuer_qualified_subject():
+    assert journal_user_id(ALICE) == "https://accounts.example.com|1234"
+    assert journal_user_id({**ALICE, "iss": "https://other.example.com"}) != journal_user_id(ALICE)
+
+
+def test_admin_needs_a_verified_listed_email():
+    admins = {"alice@example.com"}
+    assert is_admin(ALICE, admins)
+    assert not is_admin({**ALICE, "email_verified": False}, admins)
+    assert not is_admin({k: v for k, v in ALICE.items() if k != "email_verified"}, admins)
+    assert not is_admin({**ALICE, "is_logged_in": False}, admins)
+    assert not is_admin(ALICE, set())
+
+
+def test_admins_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("EMOTION_ADMINS", " bob@example.com, ALICE@example.com ")
+    assert is_admin(ALICE)
+    monkeypatch.delenv("EMOTION_ADMINS")
+    assert not is_admin(ALICE)
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import make_pipeline
+
+from utils.compact_model import CompactEmotionModel, compare_models, export_compact_model
+
+WORDS = {
+    'joy': "happy excited wonderful laughed sunny great love smile celebrate proud",
+    'sadness': "sad alone cried miss lonely tears lost grief empty down",
+    'fear': "scared nervous worried exam afraid panic anxious dread shaking tomorrow",
+    'anger': "furious angry manager hate unfair yelled rage annoyed slammed terrible",
+    'neutral': "normal store went back lunch bus meeting email errands weather",
+}
+FILLER = "i the a and today was so my with at it felt really after about".split()
+
+
+def corpus(n, seed):
+    """Sentences mixing one emotion's words with filler and a few other emotions' words"""
+    rng = random.Random(seed)
+    labels = sorted(WORDS)
+    texts, targets = [], []
+    for _ in range(n):
+        label = rng.choice(labels)
+        words = rng.choices(WORDS[label].split(), k=3) + rng.choices(FILLER, k=4)
+        words += rng.choices(WORDS[rng.choice(labels)].split(), k=rng.randint(0, 2))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+        targets.append(label)
+    return texts, targets
+
+
+VECTORIZERS = {
+    'tfidf': lambda: [TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)],
+    'count+tfidf': lambda: [CountVectorizer(), TfidfTransformer()],
+}
+CLASSIFIERS = {
+    'logreg': lambda: LogisticRegression(max_iter=1000),
+    'sgd': lambda: SGDClassifier(loss='log_loss', random_state=0),
+    'nb': lambda: MultinomialNB(),
+}
+
+
+def fit(vectorizer, classifier):
+    texts, targets = corpus(400, seed=1)
+    return make_pipeline(*VECTORIZERS[vectorizer](), CLASSIFIERS[classifier]()).fit(texts, targets)
+
+
+@pytest.mark.parametrize("classifier", sorted(CLASSIFIERS))
+@pytest.mark.parametrize("vectorizer", sorted(VECTORIZERS))
+def test_float_export_matches_the_pipeline(tmp_path, vectorizer, classifier):
+    model = fit(vectorizer, classifier)
+    compact = CompactEmotionModel(export_compact_model(model, tmp_path))
+    texts = corpus(300, seed=2)[0] + ["", "zzz unseen words only", "HAPPY Happy happy!"]
+
+    assert list(compact.classes_) == list(model.classes_)
+    result = compare_models(model, compact, texts)
+    assert result['label_agreement'] == 1.0
+    assert result['max_prob_diff'] < 1e-6
+
+
+def test_int8_export_stays_close(tmp_path):
+    model = fit('count+tfidf', 'nb')
+    compact = CompactEmotionModel(export_compact_model(model, tmp_path, quantize=True))
+
+    result = compare_models(model, compact, corpus(500, seed=3)[0])
+    assert result['label_agreement'] >= 0.95
+
+
+def test_unsupported_pipelines_are_refused(tmp_path):
+    texts, targets = corpus(50, seed=4)
+    with pytest.raises(ValueError, match="log_loss"):
+        export_compact_model(make_pipeline(TfidfVectorizer(), SGDClassifier()).fit(texts, targets), tmp_path)
+    with pytest.raises(ValueError, match="word analyzer"):
+        model = make_pipeline(TfidfVectorizer(analyzer='char'), LogisticRegression()).fit(texts, targets)
+        export_compact_model(model, tmp_path)
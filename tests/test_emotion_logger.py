@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.emotion_helpers import EmotionLogger
+from utils.journal_store import CsvJournalStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CsvJournalStore(tmp_path / "journal.csv")
+
+
+def make_logger(store, tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval", 0.01)
+    return EmotionLogger(
+        store, async_mode=True, retry_backoff=0.001,
+        breakdown_path=tmp_path / "breakdown.jsonl", spill_path=tmp_path / "spill.jsonl", **kwargs
+    )
+
+
+def fail(store, times):
+    """Make store.append_many raise `times` times, then work again"""
+    append_many = store.append_many
+    calls = {'failed': 0}
+
+    def flaky(*args, **kwargs):
+        if calls['failed'] < times:
+            calls['failed'] += 1
+            raise OSError("disk full")
+        return append_many(*args, **kwargs)
+
+    store.append_many = flaky
+    return calls
+
+
+def test_queued_check_ins_are_group_committed(store, tmp_path):
+    logger = make_logger(store, tmp_path, flush_interval=0.2)
+    for i in range(5):
+        logger.log_emotion("happy", 0.9, f"entry {i}", probs={"happy": 0.9, "sad": 0.1})
+    logger.flush()
+    stats = logger.stats()
+    assert stats['records'] == 5 and stats['commits'] == 1 and stats['queue_depth'] == 0
+    assert list(store.entries()['text']) == [f"entry {i}" for i in range(5)]
+    assert len(store.probabilities()) == 5
+    logger.close()
+
+
+def test_failed_write_is_retried(store, tmp_path):
+    calls = fail(store, 2)
+    logger = make_logger(store, tmp_path)
+    logger.log_emotion("sad", 0.6, "rainy day")
+    logger.flush()
+    assert calls['failed'] == 2
+    assert list(store.entries()['text']) == ["rainy day"]
+    assert logger.stats()['retried_writes'] == 2
+    assert not (tmp_path / "spill.jsonl").exists()
+    logger.close()
+
+
+def test_persistent_failure_spills_and_replays(store, tmp_path):
+    calls = fail(store, 100)
+    logger = make_logger(store, tmp_path, retries=1)
+    sentences = [{'text': "rainy day", 'emotion': "sad", 'confidence': 0.6}]
+    logger.log_emotion("sad", 0.6, "rainy day", probs={"sad": 0.6, "happy": 0.4}, sentences=sentences)
+    logger.flush()
+    assert store.entries().empty
+    spilled = [json.loads(line) for line in (tmp_path / "spill.jsonl").read_text().splitlines()]
+    assert [entry['record'][3] for entry in spilled] == ["rainy day"]
+    assert logger.stats()['spilled_records'] == 1
+
+    calls['failed'] = 100 - 1  # the disk has space again after one more failure
+    logger.log_emotion("happy", 0.9, "sun came out")
+    logger.flush()
+    logger.close()
+    assert sorted(store.entries()["text"]) == ["rainy day", "sun came out"]
+    assert len(store.probabilities()) == 1
+    assert not (tmp_path / "spill.jsonl").exists()
+    breakdowns = (tmp_path / "breakdown.jsonl").read_text().splitlines()
+    assert [json.loads(line)['sentences'][0]['text'] for line in breakdowns] == ["rainy day"]
+    assert logger.stats()['replayed_records'] == 1
+
+
+def test_full_queue_writes_inline(store, tmp_path):
+    release = threading.Event()
+    append_many = store.append_many
+
+    def slow_writer(*args, **kwargs):
+        if threading.current_thread().name == "emotion-log-writer":
+            release.wait(5)
+        return append_many(*args, **kwargs)
+
+    store.append_many = slow_writer
+    logger = make_logger(store, tmp_path, queue_size=1, put_timeout=0.01, flush_interval=0)
+    logger.log_emotion("happy", 0.9, "first")
+    while logger.stats()['queue_depth']:
+        time.sleep(0.001)  # the writer holds "first"
+    logger.log_emotion("happy", 0.9, "second")  # fills the queue
+    logger.log_emotion("happy", 0.9, "third")  # written inline
+    assert list(store.entries()['text']) == ["third"]
+    release.set()
+    logger.close()
+    assert logger.stats()['inline_writes'] == 1
+    assert sorted(store.entries()['text']) == ["first", "second", "third"]
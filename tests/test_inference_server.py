@@ -0,0 +1,160 @@
+import http.client
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from utils.emotion_helpers import RemoteEmotionDetector
+from utils.inference_server import MicroBatcher, PredictHandler
+
+LABELS = ['happy', 'sad']
+
+
+class FakeDetector:
+    """Scores every text as happy; can be made to block or fail"""
+
+    labels = LABELS
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+        self.scored = []
+
+    def predict_emotions(self, texts):
+        self.started.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        self.scored.extend(texts)
+        probs = np.tile([0.9, 0.1], (len(texts), 1))
+        return np.zeros(len(texts), dtype=np.int8), probs.max(axis=1), probs
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(detector, **options):
+        PredictHandler.batcher = MicroBatcher(detector, **options)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PredictHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(port, body):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/predict", body=body if isinstance(body, bytes) else json.dumps(body).encode())
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+def test_predict(serve):
+    port = serve(FakeDetector())
+    status, payload = post(port, {'texts': ["a fine day", "another"]})
+    assert status == 200
+    assert payload['emotions'] == ['happy', 'happy']
+    assert payload['confidences'] == pytest.approx([0.9, 0.9])
+
+
+@pytest.mark.parametrize("body", [[1], "x", b"not json", {'text': "a"}, {'texts': [1]}])
+def test_bad_requests_get_400(serve, body):
+    port = serve(FakeDetector())
+    status, payload = post(port, body)
+    assert status == 400
+    assert payload['error']
+
+
+def test_detector_failure_gets_500(serve):
+    detector = FakeDetector()
+    detector.error = RuntimeError("model exploded")
+    port = serve(detector)
+    status, payload = post(port, {'texts': ["a"]})
+    assert status == 500
+    assert "model exploded" in payload['error']
+
+
+def test_queue_timeout_gets_504(serve):
+    detector = FakeDetector()
+    detector.release.clear()
+    port = serve(detector, window=0, max_batch=1, queue_timeout=0.05)
+    first = threading.Thread(target=post, args=(port, {'texts': ["first"]}))
+    first.start()
+    assert detector.started.wait(5)
+    threading.Timer(0.3, detector.release.set).start()
+    status, _ = post(port, {'texts': ["waits too long"]})
+    first.join()
+    assert status == 504
+
+
+def test_overload_gets_503_and_cancels_queued_texts(serve):
+    detector = FakeDetector()
+    detector.release.clear()
+    port = serve(detector, window=0, max_batch=1, max_queue=2)
+    first = threading.Thread(target=post, args=(port, {'texts': ["first"]}))
+    first.start()
+    assert detector.started.wait(5)
+    second = threading.Thread(target=post, args=(port, {'texts': ["waiting"]}))
+    second.start()
+    while PredictHandler.batcher.snapshot()['queue_depth'] < 1:
+        time.sleep(0.01)
+
+    status, _ = post(port, {'texts': ["queued", "rejected"]})
+    assert status == 503
+    detector.release.set()
+    first.join()
+    second.join()
+    # Let the batcher reach the cancelled text
+    assert post(port, {'texts': ["later"]})[0] == 200
+    assert detector.scored == ["first", "waiting", "later"]
+
+
+def test_request_larger_than_the_queue_gets_413(serve):
+    port = serve(FakeDetector(), max_queue=2)
+    status, payload = post(port, {'texts': ["a", "b", "c"]})
+    assert status == 413
+    assert "at most 2" in payload['error']
+
+
+def test_remote_detector_splits_large_batches(serve):
+    detector = FakeDetector()
+    port = serve(detector, max_queue=4)
+    remote = RemoteEmotionDetector(f"http://127.0.0.1:{port}", max_texts=100)
+    assert remote.max_texts == 4
+
+    texts = [f"text {i}" for i in range(10)]
+    label_ids, confidences, probs = remote.predict_emotions(texts)
+    assert probs.shape == (10, 2)
+    assert label_ids.tolist() == [0] * 10
+    assert confidences == pytest.approx([0.9] * 10)
+    assert detector.scored[-10:] == texts
+
+
+def test_remote_detector_retries_a_bad_json_body(serve, monkeypatch):
+    port = serve(FakeDetector())
+    remote = RemoteEmotionDetector(f"http://127.0.0.1:{port}")
+    real_read = http.client.HTTPResponse.read
+    bodies = [b"{truncated"]
+
+    def flaky_read(response, *args):
+        body = real_read(response, *args)
+        return bodies.pop() if bodies else body
+
+    monkeypatch.setattr(http.client.HTTPResponse, "read", flaky_read)
+    assert remote.predict_emotions(["a"])[0].tolist() == [0]
+
+    bodies[:] = [b"not json", b"not json"]
+    with pytest.raises(ValueError):
+        remote.predict_emotions(["a"])
@@ -0,0 +1,104 @@
+import csv
+import json
+
+import pytest
+
+from utils import journal_migrate
+from utils.journal_migrate import SCHEMA_VERSION, migrate_journal, schema_version
+
+LEGACY = [
+    ["Date", "Label", "Intensity", "Note"],
+    ["2024-03-01 09:00:00", "Joy", "0.9", "sunny walk"],
+    ["2024-03-01T10:00:00", "sadness", "", "no score"],
+    ["yesterday", "joy", "0.5", "bad timestamp"],
+    ["2024-03-01 11:00:00", "", "0.5", "no emotion"],
+    ["2024-03-01 12:00:00", "anger", "1.5", "out of range"],
+    ["2024-03-01 13:00:00", "fear"],
+    [],
+    ["2024-03-01 14:00:00", "neutral", "0.25", "errands, then lunch"],
+]
+
+
+def write(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+
+
+def read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_repairs_rows_and_quarantines_the_rest(tmp_path):
+    path = tmp_path / "journal.csv"
+    write(path, LEGACY)
+    (tmp_path / "journal.offsets").write_bytes(b"stale")
+
+    result = migrate_journal(path)
+
+    assert read(path) == [
+        ["timestamp", "emotion", "confidence", "text"],
+        ["2024-03-01 09:00:00", "happy", "0.9000", "sunny walk"],
+        ["2024-03-01 10:00:00", "sad", "0.0000", "no score"],
+        ["2024-03-01 14:00:00", "neutral", "0.2500", "errands, then lunch"],
+    ]
+    assert result['rows_kept'] == 3
+    assert result['rows_quarantined'] == 4
+    assert not result['resumed']
+
+    header, *bad = read(result['quarantine_file'])
+    assert header == ["line", "reason", "raw"]
+    assert [int(line) for line, _, _ in bad] == [4, 5, 6, 7]
+    assert [reason for _, reason, _ in bad] == [
+        "bad timestamp 'yesterday'", "missing emotion",
+        "confidence out of range: 1.5", "expected 4 fields, got 2",
+    ]
+    assert json.loads(bad[0][2]) == LEGACY[3]
+
+    assert schema_version(path) == SCHEMA_VERSION
+    assert not (tmp_path / "journal.offsets").exists()
+    assert not (tmp_path / "journal.migrate-checkpoint.json").exists()
+
+
+def test_headerless_journal_is_read_positionally(tmp_path):
+    path = tmp_path / "journal.csv"
+    write(path, [["2024-03-01 09:00:00", "joy", "0.9", "first line is data"]])
+    result = migrate_journal(path)
+    assert read(path)[1] == ["2024-03-01 09:00:00", "happy", "0.9000", "first line is data"]
+    assert result['quarantine_file'] is None
+    assert not (tmp_path / "journal.quarantine.csv").exists()
+
+
+def test_interrupted_run_resumes_from_the_last_checkpoint(tmp_path, monkeypatch):
+    rows = [["timestamp", "emotion", "confidence", "text"]]
+    rows += [[f"2024-03-01 09:{i:02d}:00", "joy", "0.5", f"entry {i}"] for i in range(20)]
+    rows[8][1] = ""  # one quarantined row in the first, checkpointed chunks
+    expected_path = tmp_path / "expected.csv"
+    write(expected_path, rows)
+    expected = migrate_journal(expected_path, chunk_rows=3)
+
+    path = tmp_path / "journal.csv"
+    write(path, rows)
+    normalize = journal_migrate.normalize_row
+    calls = []
+
+    def crash_mid_chunk(row, columns):
+        calls.append(row)
+        if len(calls) == 11:  # two rows into the fourth chunk
+            raise KeyboardInterrupt
+        return normalize(row, columns)
+
+    monkeypatch.setattr(journal_migrate, "normalize_row", crash_mid_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        migrate_journal(path, chunk_rows=3)
+    checkpoint = json.loads((tmp_path / "journal.migrate-checkpoint.json").read_text())
+    assert checkpoint['rows_read'] == 9
+    assert read(path) == rows  # the original is untouched until the rename
+
+    monkeypatch.setattr(journal_migrate, "normalize_row", normalize)
+    result = migrate_journal(path, chunk_rows=3)
+
+    assert result['resumed']
+    assert (result['rows_kept'], result['rows_quarantined']) == (19, 1)
+    assert read(path) == read(expected_path)
+    assert read(result['quarantine_file']) == read(expected['quarantine_file'])
@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from utils import journal_partitions
+from utils.journal_partitions import PartitionedJournalStore, _user_dir_name, get_partitioned_store
+
+
+@pytest.mark.parametrize("user_id", ["..", ".", ".hidden", "../escape", "a/../../b"])
+def test_user_dir_stays_under_root(tmp_path, user_id):
+    root = tmp_path / "journal"
+    store = PartitionedJournalStore(root, user_id)
+    assert not _user_dir_name(user_id).startswith('.')
+    assert store.dir.resolve().parent == root.resolve()
+
+
+def test_plain_user_ids_keep_their_name():
+    assert _user_dir_name("alice") == "alice"
+    assert _user_dir_name("alice") != _user_dir_name("alice/")
+
+
+def test_reads_do_not_create_user_dir(tmp_path):
+    store = PartitionedJournalStore(tmp_path, "visitor")
+    assert store.latest(5).empty
+    assert store.search("anything").empty
+    assert store.similar("anything").empty
+    assert not store.dir.exists()
+
+    store.append(datetime(2024, 3, 1, 9), "happy", 0.9, "first entry")
+    assert (store.dir / "2024-03.csv").exists()
+    assert list(store.latest(5)['text']) == ["first entry"]
+
+
+def test_registry_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_partitions, "MAX_CACHED_USERS", 3)
+    monkeypatch.setattr(journal_partitions, "_partitioned", journal_partitions.OrderedDict())
+    first = get_partitioned_store(tmp_path, "u0")
+    for i in range(1, 6):
+        get_partitioned_store(tmp_path, f"u{i}")
+    assert len(journal_partitions._partitioned) == 3
+    assert get_partitioned_store(tmp_path, "u0") is not first
+    assert not any(tmp_path.iterdir())
+
+
+def filled_store(tmp_path):
+    store = PartitionedJournalStore(tmp_path, "writer")
+    for month in (1, 2, 3):
+        store.append_many([(datetime(2024, month, day, 9), "happy", 0.5, f"{month}/{day}") for day in (1, 2)])
+    return store
+
+
+def test_compaction_removes_the_sources_and_their_rescore_outputs(tmp_path):
+    store = filled_store(tmp_path)
+    (store.dir / "2024-01.rescored.csv").write_text("emotion\n")
+    (store.dir / "2024-02.rescore").mkdir()
+    (store.dir / "2024-02.rescore" / "manifest.json").write_text("{}")
+
+    assert store.compact(min_rows=5) == ["2024-01_2024-03.csv"]
+    leftovers = [p.name for p in store.dir.iterdir() if p.name.startswith(("2024-01.", "2024-02.", "2024-03."))]
+    assert leftovers == []
+    assert len(store.entries()) == 6
+
+
+def test_append_during_compaction_lands_in_the_merged_partition(tmp_path, monkeypatch):
+    store = filled_store(tmp_path)
+    writer = PartitionedJournalStore(tmp_path, "writer")  # another session's store
+    late = threading.Thread(target=writer.append, args=(datetime(2024, 2, 20, 9), "sad", 0.5, "late entry"))
+    merge = journal_partitions.ProbabilityLog.merge
+
+    def merge_while_appending(paths, target):
+        # Sources are copied; an append now must wait for the compaction
+        late.start()
+        late.join(0.2)
+        assert late.is_alive()
+        return merge(paths, target)
+
+    monkeypatch.setattr(journal_partitions.ProbabilityLog, "merge", staticmethod(merge_while_appending))
+    store.compact(min_rows=5)
+    late.join(5)
+
+    assert [p[2].name for p in store._partitions()] == ["2024-01_2024-03.csv"]
+    assert len(store.entries()) == 7
+    assert "late entry" in set(store.entries()['text'])
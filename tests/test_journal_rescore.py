@@ -0,0 +1,163 @@
+import csv
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import journal_partitions, journal_rescore, journal_store
+from utils.journal_store import CsvJournalStore, SqliteJournalStore
+
+START = datetime(2024, 1, 1, 8)
+TEXTS = ["I am so happy and excited today", "I feel so sad and alone", "nervous and worried about work", "so angry at my manager"]
+
+
+def fill(store, n):
+    store.append_many([(START + timedelta(hours=i), "neutral", 0.5, TEXTS[i % len(TEXTS)]) for i in range(n)])
+
+
+def rescored(result):
+    with open(result['output_file'], newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_backend_lists_the_csv_journal(tmp_path, monkeypatch):
+    path = tmp_path / "emotion_journal.csv"
+    monkeypatch.setattr(journal_store, "CSV_PATH", path)
+    assert journal_rescore.journal_paths("csv") == []
+    path.write_text("timestamp,text,emotion\n")
+    assert journal_rescore.journal_paths("csv") == [path]
+
+
+def test_partitioned_backend_lists_every_partition(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_partitions, "PARTITION_ROOT", tmp_path)
+    for name in ("alice/2024-02.csv", "alice/2024-01.csv", "alice/2024-01.rescored.csv",
+                 "bob/2023-11_2023-12.csv", "bob/search.db"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("")
+    monkeypatch.setenv("EMOTION_JOURNAL_BACKEND", "partitioned")
+    assert [p.relative_to(tmp_path).as_posix() for p in journal_rescore.journal_paths()] == [
+        "alice/2024-01.csv", "alice/2024-02.csv", "bob/2023-11_2023-12.csv"]
+
+
+def test_sqlite_backend_lists_the_database(tmp_path, monkeypatch):
+    path = tmp_path / "emotion_journal.db"
+    monkeypatch.setattr(journal_store, "SQLITE_PATH", path)
+    assert journal_rescore.journal_paths("sqlite") == []
+    SqliteJournalStore(path)
+    assert journal_rescore.journal_paths("sqlite") == [path]
+
+
+def test_unknown_backend_is_refused(monkeypatch):
+    monkeypatch.setenv("EMOTION_JOURNAL_BACKEND", "postgres")
+    with pytest.raises(ValueError):
+        journal_rescore.journal_paths()
+
+
+@pytest.mark.parametrize("kind", ["csv", "sqlite"])
+def test_every_row_is_rescored(tmp_path, emotion_model, kind):
+    if kind == "csv":
+        store = CsvJournalStore(tmp_path / "journal.csv")
+    else:
+        store = SqliteJournalStore(tmp_path / "journal.db")
+    fill(store, 23)
+    result = journal_rescore.rescore_journal(store.path, emotion_model, workers=2, chunk_rows=5)
+    assert (result['rows'], result['chunks'], result['resumed_chunks']) == (23, 5, 0)
+    rows = rescored(result)
+    assert [row['timestamp'] for row in rows] == [
+        (START + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M:%S") for i in range(23)
+    ]
+    assert rows[0]['new_emotion'] == "happy" and rows[1]['new_emotion'] == "sad"
+    assert all(row['emotion'] == "neutral" for row in rows)
+    assert float(rows[0]['prob_happy']) == pytest.approx(float(rows[0]['new_confidence']), abs=1e-4)
+
+
+def test_sqlite_gaps_in_ids_are_skipped(tmp_path, emotion_model):
+    store = SqliteJournalStore(tmp_path / "journal.db")
+    fill(store, 12)
+    with store._conn() as conn:
+        conn.execute("DELETE FROM entries WHERE id BETWEEN 3 AND 7")
+    result = journal_rescore.rescore_journal(store.path, emotion_model, workers=1, chunk_rows=5)
+    assert result['rows'] == 7
+    assert [int(row['row']) for row in rescored(result)] == [1, 2, 8, 9, 10, 11, 12]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt(done, total):
+    if done:
+        raise Interrupted
+
+
+def interrupted_run(path, emotion_model):
+    with pytest.raises(Interrupted):
+        journal_rescore.rescore_journal(path, emotion_model, workers=1, chunk_rows=5, progress=interrupt)
+
+
+def test_interrupted_run_resumes(tmp_path, emotion_model):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    fill(store, 12)
+    interrupted_run(store.path, emotion_model)
+    fill(store, 3)  # appends since the interrupted run are left for the next one
+    result = journal_rescore.rescore_journal(store.path, emotion_model, workers=1, chunk_rows=5)
+    assert result['resumed_chunks'] > 0
+    assert result['rows'] == 12
+
+
+def test_rewritten_journal_is_not_resumed(tmp_path, emotion_model):
+    path = tmp_path / "journal.csv"
+    store = CsvJournalStore(path)
+    fill(store, 12)
+    interrupted_run(path, emotion_model)
+    # Same row count and size, different rows
+    path.write_text(path.read_text(encoding='utf-8').replace("sad and alone", "sad and afraid"), encoding='utf-8')
+    result = journal_rescore.rescore_journal(path, emotion_model, workers=1, chunk_rows=5)
+    assert result['resumed_chunks'] == 0
+
+
+def test_rewritten_sqlite_journal_is_not_resumed(tmp_path, emotion_model):
+    store = SqliteJournalStore(tmp_path / "journal.db")
+    fill(store, 12)
+    interrupted_run(store.path, emotion_model)
+    with store._conn() as conn:
+        conn.execute("UPDATE entries SET confidence = 0.9 WHERE id = 2")
+    result = journal_rescore.rescore_journal(store.path, emotion_model, workers=1, chunk_rows=5)
+    assert result['resumed_chunks'] == 0
+
+
+@pytest.mark.parametrize("kind", ["csv", "sqlite"])
+def test_apply_promotes_new_labels(tmp_path, emotion_model, kind):
+    if kind == "csv":
+        store = CsvJournalStore(tmp_path / "journal.csv")
+    else:
+        store = SqliteJournalStore(tmp_path / "journal.db")
+    fill(store, 8)
+    result = journal_rescore.rescore_journal(store.path, emotion_model, workers=1)
+    late = START + timedelta(days=1)
+    store.append(late, "love", 0.99, "appended after the run", probs={"love": 0.99, "happy": 0.01})
+
+    assert journal_rescore.apply_rescored(store.path) == 8
+    if kind == "csv":
+        store = CsvJournalStore(store.path)
+    entries = store.entries()
+    assert list(entries['emotion'].astype(str)) == [row['new_emotion'] for row in rescored(result)] + ["love"]
+    assert entries['confidence'].iloc[0] == pytest.approx(float(rescored(result)[0]['new_confidence']), abs=1e-4)
+    counts, _ = journal_store.summarize_rollups(store.daily_rollups())
+    assert "neutral" not in counts and counts["love"] == 1
+    probs = store.probabilities()
+    assert len(probs) == 9
+    assert probs['probs'][-1].max() == pytest.approx(0.99)
+
+
+def test_apply_refuses_a_changed_journal(tmp_path, emotion_model):
+    path = tmp_path / "journal.csv"
+    store = CsvJournalStore(path)
+    fill(store, 4)
+    journal_rescore.rescore_journal(path, emotion_model, workers=1)
+    lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    path.write_text(lines[0] + "".join(lines[2:]), encoding='utf-8')
+    before = path.read_bytes()
+    with pytest.raises(ValueError):
+        journal_rescore.apply_rescored(path)
+    assert path.read_bytes() == before
+    assert not (tmp_path / "journal.applying.csv").exists()
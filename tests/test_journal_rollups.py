@@ -0,0 +1,106 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.journal_rollups import (
+    RollupLog, choose_resolution, period_bounds, period_frame, period_key, rollup_deltas
+)
+
+START = datetime(2024, 2, 26, 22, 0)
+
+
+def records(n, seed):
+    rng = random.Random(seed)
+    return [
+        ((START + timedelta(minutes=rng.randrange(60 * 24 * 40))).strftime("%Y-%m-%d %H:%M:%S"),
+         rng.choice(["happy", "sad", "anxious"]), rng.random(), "")
+        for _ in range(n)
+    ]
+
+
+def assert_same(totals, expected):
+    assert totals.keys() == expected.keys()
+    for key, (count, conf_sum, conf_sq_sum) in expected.items():
+        assert totals[key][0] == count
+        assert totals[key][1:] == pytest.approx([conf_sum, conf_sq_sum])
+
+
+def test_period_keys():
+    assert period_key("2024-03-03 21:15:00", 'hour') == "2024-03-03 21"
+    assert period_key("2024-03-03 21:15:00", 'day') == "2024-03-03"
+    assert period_key("2024-03-03 21:15:00", 'week') == "2024-02-26"
+    assert period_key("2024-03-03 21:15:00", 'month') == "2024-03"
+    assert period_bounds(datetime(2024, 3, 1), datetime(2024, 3, 4), 'day') == ("2024-03-01", "2024-03-03")
+    assert choose_resolution(datetime(2024, 3, 1), datetime(2024, 3, 2)) == 'hour'
+    assert choose_resolution(datetime(2020, 1, 1), datetime(2024, 1, 1)) == 'week'
+    assert choose_resolution(None, None) == 'month'
+
+
+def test_replayed_deltas_match_a_full_recompute(tmp_path):
+    batches = [records(n, seed) for seed, n in enumerate([1, 17, 5, 40, 3])]
+    writer = RollupLog(tmp_path / "journal.csv")
+    reader = RollupLog(tmp_path / "journal.csv")
+    seen = []
+    for batch in batches:
+        writer.append(batch)
+        seen += batch
+        # The reader folds in only the rows added since its last read
+        assert_same(reader.totals(), rollup_deltas(seen))
+    assert_same(writer.totals(), rollup_deltas(seen))
+
+
+def test_compaction_and_rebuild_keep_the_totals(tmp_path):
+    log = RollupLog(tmp_path / "journal.csv")
+    reader = RollupLog(tmp_path / "journal.csv")
+    first, second = records(30, 1), records(30, 2)
+    log.append(first)
+    reader.totals()
+
+    log._rows = 10**6  # pretend the deltas piled up
+    log.append(second)
+    # One row per key, and readers notice the file was replaced
+    with open(log.path) as f:
+        assert sum(1 for _ in f) == 1 + len(rollup_deltas(first + second))
+    assert_same(reader.totals(), rollup_deltas(first + second))
+
+    assert log.rebuild(first) == len(rollup_deltas(first))
+    assert_same(reader.totals(), rollup_deltas(first))
+
+
+def test_partial_delta_rows_wait_for_their_newline(tmp_path):
+    log = RollupLog(tmp_path / "journal.csv")
+    log.append(records(3, 1))
+    with open(log.path, 'a') as f:
+        f.write("day,2024-03-01,happy,1,0.5")
+    assert_same(log.totals(), rollup_deltas(records(3, 1)))
+
+    with open(log.path, 'a') as f:
+        f.write(",0.25\n")
+    expected = rollup_deltas(records(3, 1))
+    stats = expected.setdefault(('day', "2024-03-01", "happy"), [0, 0.0, 0.0])
+    stats[0] += 1
+    stats[1] += 0.5
+    stats[2] += 0.25
+    assert_same(log.totals(), expected)
+
+
+def test_period_frame_filters_one_resolution_and_range():
+    totals = rollup_deltas(records(50, 3))
+    frame = period_frame(totals, 'day', datetime(2024, 3, 1), datetime(2024, 3, 8))
+    assert list(frame['period']) == sorted(frame['period'])
+    assert frame['period'].between("2024-03-01", "2024-03-07").all()
+    expected = sum(stats[0] for (res, period, _), stats in totals.items()
+                   if res == 'day' and "2024-03-01" <= period <= "2024-03-07")
+    assert frame['count'].sum() == expected
+
+
+def test_totals_are_a_snapshot(tmp_path):
+    log = RollupLog(tmp_path / "journal.csv")
+    record = ("2024-03-01 09:00:00", "happy", 0.5, "")
+    log.append([record])
+    before = log.totals()
+    log.append([record])
+
+    assert before[('day', "2024-03-01", "happy")] == (1, 0.5, 0.25)
+    assert log.totals()[('day', "2024-03-01", "happy")] == (2, 1.0, 0.5)
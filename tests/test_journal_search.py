@@ -0,0 +1,70 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.journal_migrate import migrate_journal
+from utils.journal_search import fts_query
+from utils.journal_store import CsvJournalStore, SqliteJournalStore
+
+START = datetime(2024, 5, 1, 7)
+TEXTS = ["walked the dog by the river", "rain all day", "dog park with friends", "quiet evening reading"]
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def store(request, tmp_path):
+    store = (CsvJournalStore(tmp_path / "journal.csv") if request.param == "csv"
+             else SqliteJournalStore(tmp_path / "journal.db"))
+    store.append_many([(START + timedelta(hours=i), "neutral", 0.5, text) for i, text in enumerate(TEXTS)])
+    return store
+
+
+def test_search_newest_first(store):
+    found = store.search("dog")
+    assert list(found['text']) == ["dog park with friends", "walked the dog by the river"]
+
+
+def test_search_prefix_and_filters(store):
+    assert list(store.search("riv")['text']) == ["walked the dog by the river"]
+    assert store.search("dog", end=START + timedelta(hours=1))['text'].tolist() == ["walked the dog by the river"]
+    assert store.search("dog", emotion="happy").empty
+    assert store.search("   ").empty
+
+
+def test_page_walks_back_in_order(store):
+    first, cursor = store.page(3)
+    assert list(first['text']) == TEXTS[::-1][:3]
+    rest, cursor = store.page(3, cursor)
+    assert list(rest['text']) == TEXTS[:1]
+    assert cursor is None
+
+
+def test_fts_query_quotes_terms():
+    assert fts_query('dog "park') == '"dog" "park"*'
+    assert fts_query("  ") is None
+
+
+def test_indexes_survive_migration_underneath(tmp_path):
+    path = tmp_path / "journal.csv"
+    store = CsvJournalStore(path)
+    store.append_many([(START + timedelta(hours=i), "neutral", 0.5, text) for i, text in enumerate(TEXTS)])
+    assert len(store.search("dog")) == 2
+    assert not store.similar("walked the dog by the river").empty
+
+    migrate_journal(path)
+    assert not store.search_index.path.exists()
+
+    results = {}
+
+    def query():
+        # A thread that never had a connection to either index
+        results['search'] = store.search("dog")
+        results['similar'] = store.similar("walked the dog by the river")
+
+    thread = threading.Thread(target=query)
+    thread.start()
+    thread.join()
+    assert len(results['search']) == 2
+    assert results['similar']['text'].iloc[0] == "walked the dog by the river"
+    # And the thread whose connections point at the deleted files
+    assert len(store.search("dog")) == 2
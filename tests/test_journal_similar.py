@@ -0,0 +1,115 @@
+import csv
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.journal_migrate import migrate_journal
+from utils.journal_similar import terms
+from utils.journal_store import CsvJournalStore
+
+BACKGROUND = [
+    "went to work as usual", "cooked pasta for dinner", "read a few chapters",
+    "feeling low and tired", "cried after the call", "so frustrated with my manager",
+    "the train was late again", "nervous about tomorrow", "laughed a lot at dinner",
+    "did some laundry and cleaned up", "my chest feels tight", "miss my family",
+]
+START = datetime(2024, 1, 1, 8)
+
+
+def fill(store, texts):
+    store.append_many([
+        (START + timedelta(hours=i), "neutral", 0.5, text) for i, text in enumerate(texts)
+    ])
+
+
+@pytest.mark.parametrize("entry, query", [
+    ("had a great day with friends", "great day with my friends"),
+    ("worried about the deadline", "worried about the deadline today"),
+    ("I can't sleep because of the exam tomorrow", "can't sleep, exam tomorrow"),
+])
+def test_paraphrases_are_found(tmp_path, entry, query):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    fill(store, BACKGROUND * 20 + [entry])
+    found = store.similar(query, k=3)
+    assert found['text'].iloc[0] == entry
+    assert 0.3 <= found['similarity'].iloc[0] <= 1.0
+
+
+def test_unrelated_text_finds_nothing(tmp_path):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    fill(store, BACKGROUND)
+    assert store.similar("quantum chromodynamics lecture notes", k=3).empty
+    assert store.similar("   ", k=3).empty
+
+
+def test_new_entries_are_indexed_incrementally(tmp_path):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    fill(store, BACKGROUND)
+    store.similar_index.ensure()
+    when = START + timedelta(days=30)
+    store.append(when, "happy", 0.9, "hiking in the mountains with my dog")
+    store.similar_index.add(when, "happy", 0.9, "hiking in the mountains with my dog")
+    found = store.similar("mountain hiking with my dog", k=1)
+    assert list(found['text']) == ["hiking in the mountains with my dog"]
+    assert found['timestamp'].iloc[0] == when
+
+
+def test_csv_hits_are_read_by_row_without_parsing_the_journal(tmp_path, monkeypatch):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    fill(store, BACKGROUND * 5)
+    store.similar_index.ensure()  # rebuilt from the journal, with row numbers
+    when = START + timedelta(days=30)
+    rows = store.append(when, "happy", 0.9, "hiking in the mountains with my dog")
+    store.similar_index.add(when, "happy", 0.9, "hiking in the mountains with my dog", row=rows[0])
+    assert rows == [len(BACKGROUND) * 5]
+
+    def no_scan():
+        raise AssertionError("similar() parsed the whole journal")
+
+    monkeypatch.setattr(store, "_load", no_scan)
+    assert store.similar("mountain hiking with my dog", k=1)['text'].tolist() == ["hiking in the mountains with my dog"]
+    assert store.similar("cried after the call", k=1)['text'].tolist() == ["cried after the call"]
+
+
+def test_stale_row_numbers_fall_back_to_timestamps(tmp_path):
+    path = tmp_path / "journal.csv"
+    store = CsvJournalStore(path)
+    fill(store, BACKGROUND)
+    store.similar_index.ensure()
+    # Rewritten outside the store: a row inserted before all the others
+    lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    lines.insert(1, '"2023-12-31 08:00:00","neutral","0.5000","new year plans"\n')
+    path.write_text("".join(lines), encoding='utf-8')
+    found = store.similar("cried after the call", k=1)
+    assert found['text'].tolist() == ["cried after the call"]
+
+
+def test_index_holds_no_text(tmp_path):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    fill(store, ["a very private sentence"])
+    store.similar_index.ensure()
+    conn = sqlite3.connect(store.similar_index.path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+    assert 'text' not in columns
+    assert b"private" not in store.similar_index.path.read_bytes()
+
+
+def test_migration_drops_quarantined_rows_from_index(tmp_path):
+    path = tmp_path / "journal.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(['timestamp', 'emotion', 'confidence', 'text'])
+        writer.writerow(['2024-01-01 08:00:00', 'sad', '0.8', 'lost my keys on the bus'])
+        writer.writerow(['2024-01-01 09:00:00', 'sad', '7', 'lost my wallet on the bus'])
+    store = CsvJournalStore(path)
+    assert len(store.similar("lost my wallet on the bus", k=5)) == 2
+
+    assert migrate_journal(path)['rows_quarantined'] == 1
+    assert not store.similar_index.path.exists()
+    texts = list(CsvJournalStore(path).similar("lost my wallet on the bus", k=5)['text'])
+    assert texts == ['lost my keys on the bus']
+
+
+def test_terms_include_word_pairs():
+    assert terms("Great day, great day") == {'great': 2, 'day': 2, 'great day': 2, 'day great': 1}
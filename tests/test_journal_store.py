@@ -0,0 +1,103 @@
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from utils.emotion_helpers import EmotionLogger
+from utils.journal_partitions import PartitionedJournalStore
+from utils.journal_store import CsvJournalStore, SqliteJournalStore, summarize_rollups
+from utils.labels import LABELS, label_id
+
+DAY = datetime(2024, 3, 1, 9, 30)
+
+
+@pytest.fixture(params=["csv", "sqlite", "partitioned"])
+def store(request, tmp_path):
+    if request.param == "csv":
+        return CsvJournalStore(tmp_path / "journal.csv")
+    if request.param == "sqlite":
+        return SqliteJournalStore(tmp_path / "journal.db")
+    return PartitionedJournalStore(tmp_path / "journal", "tester")
+
+
+def test_first_append_counts_once(store):
+    store.append(DAY, "joy", 0.9, "a good morning")
+    rollups = store.daily_rollups()
+    assert list(rollups['emotion']) == ["happy"]
+    assert list(rollups['count']) == [1]
+    assert rollups['confidence_sum'].iloc[0] == pytest.approx(0.9)
+
+
+def test_first_check_in_through_logger(store, tmp_path):
+    logger = EmotionLogger(store, breakdown_path=tmp_path / "breakdown.jsonl")
+    logger.log_emotion("joy", 0.8, "sunny walk", user_id="tester")
+    counts, _ = summarize_rollups(store.daily_rollups())
+    assert counts == {"happy": 1}
+
+
+def test_similar_resolves_rows_from_the_journal(store, tmp_path):
+    logger = EmotionLogger(store, breakdown_path=tmp_path / "breakdown.jsonl")
+    logger.log_emotion("sad", 0.7, "missed the last bus home", user_id="tester")
+    logger.log_emotion("happy", 0.9, "baked bread with my grandmother", user_id="tester")
+    found = store.similar("baked bread with my grandmother again", k=2)
+    assert list(found['text'])[:1] == ["baked bread with my grandmother"]
+    assert found['emotion'].iloc[0] == "happy"
+    assert found['confidence'].iloc[0] == pytest.approx(0.9)
+
+
+def test_daily_rollups_match_day_periods(store):
+    store.append_many([
+        (DAY, "happy", 0.9, "one"),
+        (DAY.replace(hour=18), "sad", 0.4, "two"),
+        (DAY.replace(day=2), "happy", 0.7, "three"),
+    ])
+    daily = store.daily_rollups()
+    periods = store.rollups('day')
+    assert list(daily['day']) == list(periods['period'])
+    assert list(daily['count']) == list(periods['count']) == [1, 1, 1]
+    assert list(store.daily_rollups(start=DAY.replace(day=2))['day']) == ["2024-03-02"]
+    assert list(store.daily_rollups(end=DAY.replace(day=2))['emotion']) == ["happy", "sad"]
+
+
+def test_csv_keeps_one_rollup_sidecar(tmp_path):
+    store = CsvJournalStore(tmp_path / "journal.csv")
+    store.append(DAY, "happy", 0.9, "one")
+    assert not (tmp_path / "journal.rollup.csv").exists()
+    assert store.rebuild_rollups() == 1
+    assert list(store.daily_rollups()['count']) == [1]
+
+
+def test_probabilities_come_back_per_label(store):
+    store.append_many([
+        (DAY, "happy", 0.7, "one"),
+        (DAY.replace(hour=10), "sad", 0.5, "no probabilities"),
+        (DAY.replace(day=2), "sad", 0.6, "two"),
+    ], [{"joy": 0.7, "sad": 0.3}, None, {"sadness": 0.6, "fear": 0.4}])
+    rows = store.probabilities()
+    assert list(rows['timestamp'].astype(str)) == ["2024-03-01T09:30:00", "2024-03-02T09:30:00"]
+    assert rows['probs'].shape == (2, len(LABELS))
+    assert rows['probs'][0, label_id("happy")] == pytest.approx(0.7)
+    assert rows['probs'][1, label_id("anxious")] == pytest.approx(0.4)
+    assert rows['probs'].sum(axis=1) == pytest.approx([1.0, 1.0])
+    assert len(store.probabilities(start=DAY.replace(day=2))) == 1
+
+
+def test_sqlite_moves_probability_blobs_into_label_columns(tmp_path):
+    path = tmp_path / "journal.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SqliteJournalStore.SCHEMA)
+    conn.execute("ALTER TABLE entries ADD COLUMN probs BLOB")
+    vector = np.zeros(len(LABELS), dtype='<f4')
+    vector[label_id("love")] = 1.0
+    conn.execute(
+        "INSERT INTO entries (timestamp, emotion, confidence, text, probs) VALUES (?, ?, ?, ?, ?)",
+        ("2024-03-01 09:30:00", "love", 1.0, "hug", vector.tobytes())
+    )
+    conn.commit()
+    conn.close()
+
+    store = SqliteJournalStore(path)
+    columns = {row[1] for row in store._conn().execute("PRAGMA table_info(entries)")}
+    assert "probs" not in columns and set(SqliteJournalStore.PROB_COLUMNS) <= columns
+    assert store.probabilities()['probs'].tolist() == [vector.tolist()]
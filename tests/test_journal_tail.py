@@ -0,0 +1,120 @@
+import csv
+
+from utils.journal_tail import JournalTailIndex
+
+HEADER = ["timestamp", "emotion", "confidence", "text"]
+
+
+def rows(start, stop):
+    return [[f"2024-03-01 09:{i:02d}:00", "happy", "0.5000", f"entry {i}"] for i in range(start, stop)]
+
+
+def write(path, data, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL).writerows(data)
+
+
+def walk(index, n):
+    """Every row, newest page first, by following cursors"""
+    pages, before = [], None
+    while True:
+        _, page, before = index.page(n, before)
+        pages.append(page)
+        if before is None:
+            return pages
+
+
+def test_pages_walk_back_to_the_first_row(tmp_path):
+    path = tmp_path / "journal.csv"
+    write(path, [HEADER] + rows(0, 7))
+    index = JournalTailIndex(path)
+
+    header, page, cursor = index.page(3)
+    assert header == HEADER
+    assert [r[3] for r in page] == ["entry 4", "entry 5", "entry 6"]
+    assert cursor == 4
+
+    pages = walk(index, 3)
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert [r for p in reversed(pages) for r in p] == rows(0, 7)
+
+
+def test_cursor_stays_valid_across_appends(tmp_path):
+    path = tmp_path / "journal.csv"
+    write(path, [HEADER] + rows(0, 5))
+    index = JournalTailIndex(path)
+    _, newest, cursor = index.page(2)
+
+    write(path, rows(5, 9), "a")
+    _, older, _ = index.page(2, before=cursor)
+    assert [r[3] for r in older] == ["entry 1", "entry 2"]
+    _, newest, _ = index.page(2)
+    assert [r[3] for r in newest] == ["entry 7", "entry 8"]
+    assert index.refresh() == 9
+
+
+def test_quoted_newlines_and_partial_rows(tmp_path):
+    path = tmp_path / "journal.csv"
+    multiline = ["2024-03-01 10:00:00", "sad", "0.7000", 'line one\nline "two"\n']
+    write(path, [HEADER, multiline] + rows(0, 1))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('"2024-03-01 11:00:00","happy","0.5000","still being wri')
+    index = JournalTailIndex(path)
+
+    _, page, _ = index.page(10)
+    assert page == [multiline] + rows(0, 1)
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('tten"\n')
+    _, page, _ = index.page(1)
+    assert page == [["2024-03-01 11:00:00", "happy", "0.5000", "still being written"]]
+
+
+def test_rewritten_journal_is_reindexed(tmp_path):
+    path = tmp_path / "journal.csv"
+    write(path, [HEADER] + rows(0, 8))
+    index = JournalTailIndex(path)
+    assert index.refresh() == 8
+
+    # Shorter than the indexed end
+    write(path, [HEADER] + rows(20, 23))
+    _, page, cursor = index.page(10)
+    assert page == rows(20, 23)
+    assert cursor is None
+
+    # Longer, with the old last offset now inside a row
+    write(path, [HEADER] + [[r[0], r[1], r[2], r[3] + " was edited"] for r in rows(30, 40)])
+    assert [r[3] for r in index.page(1)[1]] == ["entry 39 was edited"]
+    assert index.refresh() == 10
+
+
+def test_rewrite_of_the_same_size_is_reindexed(tmp_path):
+    path = tmp_path / "journal.csv"
+    stamp = "2024-03-01 09:00:00"
+    write(path, [HEADER] + [[stamp, "sad", "0.5000", text] for text in ["aaaa", "bbbb", "cccc", "dddd"]])
+    index = JournalTailIndex(path)
+    assert index.refresh() == 4
+
+    # Same bytes in total and a newline before the indexed end, but every
+    # row boundary moved
+    rewritten = [[stamp, "sad", "0.5000", text] for text in ["a", "bbbbbbb", "cc", "dddddd"]]
+    write(path, [HEADER] + rewritten)
+    write(path, [[stamp, "sad", "0.5000", "appended"]], "a")
+
+    _, page, _ = index.page(2)
+    assert page == rewritten[-1:] + [[stamp, "sad", "0.5000", "appended"]]
+
+
+def test_rows_at_reads_only_the_requested_rows(tmp_path):
+    path = tmp_path / "journal.csv"
+    write(path, [HEADER] + rows(0, 6))
+    header, found = JournalTailIndex(path).rows_at([4, 1, 4, 99, -1])
+    assert header == HEADER
+    assert found == [(1, rows(1, 2)[0]), (4, rows(4, 5)[0])]
+
+
+def test_missing_or_empty_journal(tmp_path):
+    index = JournalTailIndex(tmp_path / "journal.csv")
+    assert index.refresh() == 0
+    write(tmp_path / "journal.csv", [HEADER])
+    assert index.page(5) == ([], [], None)
@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from utils import labels
+from utils.labels import (
+    ALIASES, ANXIOUS, HAPPY, LABELS, LOVE, NEUTRAL, SAD, SURPRISE, by_label, canonical, label_id, label_name
+)
+
+
+@pytest.mark.parametrize("spelling, expected", [
+    ("happy", HAPPY), ("Joy", HAPPY), (" HAPPINESS ", HAPPY),
+    ("sadness", SAD), ("Sad", SAD),
+    ("fear", ANXIOUS), ("worry", ANXIOUS), ("anxiety", ANXIOUS),
+    ("calm", NEUTRAL), ("surprise", SURPRISE),
+])
+def test_aliases_and_case_resolve_to_one_id(spelling, expected):
+    assert label_id(spelling) == expected
+    assert label_name(spelling) == LABELS[expected]
+    assert canonical(spelling) == LABELS[expected]
+
+
+def test_every_alias_points_at_a_label():
+    assert set(ALIASES.values()) <= set(range(len(LABELS)))
+    assert not set(ALIASES) & set(LABELS)
+
+
+def test_ids_round_trip_and_out_of_range_is_neutral():
+    assert [label_id(i) for i in range(len(LABELS))] == list(range(len(LABELS)))
+    assert label_id(len(LABELS)) == NEUTRAL
+    assert label_id(-1) == NEUTRAL
+
+
+def test_unknown_labels_are_neutral_and_warn_once(caplog):
+    with caplog.at_level(logging.WARNING, logger="utils.labels"):
+        assert label_id("bewildered") == NEUTRAL
+        assert label_id("Bewildered") == NEUTRAL
+    assert len(caplog.records) == 1
+    # canonical() keeps what it does not know
+    assert canonical("bewildered") == "bewildered"
+
+
+def test_by_label_fills_fallbacks_and_rejects_gaps():
+    table = by_label({'neutral': 'n', 'joy': 'h', 'sadness': 's', 'fear': 'a', 'angry': 'x'})
+    assert table[HAPPY] == 'h' and table[ANXIOUS] == 'a'
+    assert table[LOVE] == 'h'  # borrows from happy
+    assert table[SURPRISE] == 'n'  # borrows from neutral
+
+    with pytest.raises(ValueError, match="No entry for angry"):
+        by_label({'neutral': 'n', 'happy': 'h', 'sad': 's', 'anxious': 'a'})
+    with pytest.raises(ValueError, match="Unknown emotion label 'meh'"):
+        by_label({'meh': 1})
+
+
+def test_lookups_do_not_grow_the_registry(monkeypatch):
+    monkeypatch.setattr(labels, "_unknown", set())
+    size = len(labels._ids)
+    for i in range(2 * labels.MAX_UNKNOWN):
+        label_id(" JoY" + " " * i)
+        label_id(f"made-up-{i}")
+    assert len(labels._ids) == size
+    assert len(labels._unknown) == labels.MAX_UNKNOWN
@@ -0,0 +1,91 @@
+import re
+
+import pytest
+
+from utils import metrics
+
+# name{labels} value, as the Prometheus text format allows it
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? (\S+)$')
+
+
+@pytest.fixture
+def collecting():
+    was_enabled = metrics.enabled()
+    metrics.reset()
+    metrics.set_enabled(True)
+    yield
+    metrics.reset()
+    metrics.set_enabled(was_enabled)
+
+
+def samples(text):
+    """{(name, labels): value} from exposition text; fails on malformed lines"""
+    found = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S", line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        found[match.group(1), match.group(2) or ""] = float(match.group(4))
+    return found
+
+
+def test_histogram_and_counter_exposition(collecting):
+    for seconds in (0.0002, 0.003, 0.003, 7.0, 60.0):
+        metrics.observe("predict", seconds)
+    metrics.count("predicted_texts", 3)
+    metrics.count("predicted_texts", 2)
+    text = metrics.render_prometheus()
+
+    assert text.endswith("\n")
+    assert "# TYPE emotionllm_span_seconds histogram" in text
+    assert "# TYPE emotionllm_predicted_texts_total counter" in text
+    found = samples(text)
+
+    buckets = [(float(labels.split('le="')[1].rstrip('"}').replace("+Inf", "inf")), value)
+               for (name, labels), value in found.items() if name == "emotionllm_span_seconds_bucket"]
+    assert [bound for bound, _ in buckets] == list(metrics.BUCKETS) + [float("inf")]
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)  # cumulative
+    assert dict(buckets)[0.0005] == 1
+    assert dict(buckets)[0.005] == 3
+    assert dict(buckets)[10.0] == 4
+    assert dict(buckets)[float("inf")] == 5
+
+    assert found["emotionllm_span_seconds_count", '{span="predict"}'] == 5
+    assert found["emotionllm_span_seconds_sum", '{span="predict"}'] == pytest.approx(67.0062)
+    assert found["emotionllm_predicted_texts_total", ""] == 5
+
+
+def test_spans_time_bodies_and_count_errors(collecting):
+    with metrics.span("load"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("load"):
+            raise ValueError
+
+    @metrics.traced("figure")
+    def figure():
+        return 42
+
+    assert figure() == 42
+    spans, counters = metrics.snapshot()
+    assert spans["load"]['count'] == 2
+    assert spans["figure"]['count'] == 1
+    assert counters == {"load_errors": 1}
+
+
+def test_nothing_is_collected_when_disabled(collecting):
+    metrics.set_enabled(False)
+    with metrics.span("load"):
+        pass
+    metrics.count("predicted_texts")
+    assert metrics.render_prometheus() == "\n"
+
+
+def test_write_metrics_replaces_the_file(collecting, tmp_path):
+    metrics.count("predicted_texts")
+    path = metrics.write_metrics(tmp_path / "emotionllm.prom")
+    assert path.read_text() == metrics.render_prometheus()
+    assert list(tmp_path.iterdir()) == [path]
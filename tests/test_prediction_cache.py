@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from utils import prediction_cache
+from utils.prediction_cache import ENTRY_OVERHEAD_BYTES, PredictionCache, cache_key
+
+
+def value(n=7):
+    return (1, 0.9, np.zeros(n, dtype=np.float64))
+
+
+def test_key_ignores_case_and_whitespace_but_not_model_version():
+    assert cache_key("I  feel\tGreat ", "v1") == cache_key("i feel great", "v1")
+    assert cache_key("i feel great", "v1") != cache_key("i feel great", "v2")
+    assert cache_key("i feel great", "v1") != cache_key("i feel fine", "v1")
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", value())
+    cache.put("b", value())
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", value())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['entries'] == 2
+
+
+def test_byte_budget_evicts_and_oversized_values_are_skipped():
+    entry = ENTRY_OVERHEAD_BYTES + 7 * 8
+    cache = PredictionCache(max_entries=100, max_bytes=2 * entry)
+    for key in "abc":
+        cache.put(key, value())
+    assert cache.stats()['bytes'] == 2 * entry
+    assert cache.get("a") is None
+
+    cache.put("huge", value(1000))
+    assert cache.get("huge") is None
+    assert cache.stats()['entries'] == 2
+
+
+def test_replacing_a_key_does_not_double_count_bytes():
+    cache = PredictionCache()
+    cache.put("a", value())
+    cache.put("a", value(14))
+    assert cache.stats()['bytes'] == ENTRY_OVERHEAD_BYTES + 14 * 8
+    assert cache.stats()['entries'] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(ttl=60)
+    cache.put("a", value())
+
+    now[0] += 59
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 0 and stats['bytes'] == 0
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['hit_rate'] == pytest.approx(0.5)
+
+
+def test_clear_drops_everything():
+    cache = PredictionCache()
+    cache.put("a", value())
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats()['bytes'] == 0
@@ -0,0 +1,37 @@
+from utils.labels import ANGRY, HAPPY, SURPRISE
+from utils.sound_system import SoundCache
+
+
+def sounds(tmp_path, *names):
+    for name in names:
+        (tmp_path / name).write_bytes(name.encode() * 10)
+    return tmp_path
+
+
+def test_small_variant_is_served_only_when_asked_for(tmp_path):
+    cache = SoundCache(sounds(tmp_path, "happy.mp3", "happy.small.mp3", "sad.mp3"))
+    assert cache.get("joy") == b"happy.mp3" * 10
+    assert cache.get(HAPPY, small=True) == b"happy.small.mp3" * 10
+    assert cache.get("sad", small=True) == b"sad.mp3" * 10
+
+
+def test_surprise_has_its_own_sound_or_falls_back_to_neutral(tmp_path):
+    cache = SoundCache(sounds(tmp_path, "neutral.mp3", "anger.mp3"))
+    assert cache.get(SURPRISE) == b"neutral.mp3" * 10
+    assert cache.get(ANGRY) == b"anger.mp3" * 10
+    assert "surprise" not in cache.missing and "happy" in cache.missing
+
+    sounds(tmp_path, "surprise.mp3")
+    assert SoundCache(tmp_path).get(SURPRISE) == b"surprise.mp3" * 10
+
+
+def test_shared_fallback_sounds_are_cached_once(tmp_path):
+    cache = SoundCache(sounds(tmp_path, "neutral.mp3"), max_bytes=110)
+    assert cache.cached_bytes == 110
+    assert cache.get(SURPRISE) is cache.get("neutral")
+
+
+def test_sounds_past_the_cap_are_served_from_disk(tmp_path):
+    cache = SoundCache(sounds(tmp_path, "neutral.mp3", "sad.mp3"), max_bytes=100)
+    assert cache.get("sad") == b"sad.mp3" * 10
+    assert cache.get("neutral") == str(tmp_path / "neutral.mp3")
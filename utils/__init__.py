@@ -1,17 +1,55 @@
 """
 Utils package for Mental Health Companion
+
+Names are imported from their submodules on first access (PEP 562), so
+`from utils import get_reframe` does not pay for pandas, NumPy or Streamlit
+imports in modules the caller never touches.
 """
-from .emotion_helpers import EmotionDetector, EmotionLogger
-from .cbt_dictionary import get_reframe, get_affirmation
-from .ui_theme import apply_emotion_theme, EMOTION_THEMES
-from .sound_system import play_emotion_sound
+import importlib
+
+_EXPORTS = {
+    'EmotionDetector': 'emotion_helpers',
+    'RemoteEmotionDetector': 'emotion_helpers',
+    'EmotionLogger': 'emotion_helpers',
+    'get_detector': 'emotion_helpers',
+    'get_logger': 'emotion_helpers',
+    'reload_detector': 'emotion_helpers',
+    'model_stats': 'emotion_helpers',
+    'cache_stats': 'emotion_helpers',
+    'split_sentences': 'emotion_helpers',
+    'stream_sentence_emotions': 'emotion_helpers',
+    'combine_sentence_emotions': 'emotion_helpers',
+    'PredictionCache': 'prediction_cache',
+    'JournalRepository': 'journal_repository',
+    'get_journal_repository': 'journal_repository',
+    'open_journal_store': 'journal_store',
+    'summarize_rollups': 'journal_store',
+    'SimilarityIndex': 'journal_similar',
+    'get_reframe': 'cbt_dictionary',
+    'get_affirmation': 'cbt_dictionary',
+    'apply_emotion_theme': 'ui_theme',
+    'apply_app_theme': 'ui_theme',
+    'EMOTION_THEMES': 'ui_theme',
+    'theme_for': 'ui_theme',
+    'LABELS': 'labels',
+    'label_id': 'labels',
+    'label_name': 'labels',
+    'by_label': 'labels',
+    'DISTRESS': 'labels',
+    'play_emotion_sound': 'sound_system',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
 
-__all__ = [
-    'EmotionDetector',
-    'EmotionLogger',
-    'get_reframe',
-    'get_affirmation',
-    'apply_emotion_theme',
-    'EMOTION_THEMES',
-    'play_emotion_sound'
-]
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
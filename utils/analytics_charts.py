@@ -0,0 +1,220 @@
+"""
+Cached, downsampled figures for the Analytics page
+
+Figures are built from the journal's rollups, never from raw entries. The
+date window decides the resolution (hour, day, week or month; see
+journal_rollups.choose_resolution). Figures are cached per process, keyed
+by the store's version() token and the date window, so reruns and other
+sessions reuse them until something is logged.
+
+Before plotting, every series is cut down to at most MAX_POINTS points:
+- Per-emotion counts are summed into equal-width time buckets, so totals
+  stay exact.
+- The intensity line is reduced with Largest-Triangle-Three-Buckets, which
+  keeps its peaks and dips.
+
+Build time and figure JSON size therefore stay flat whether the window
+holds 100 or a million check-ins.
+
+The mixed-feelings figures read the per-entry probability vectors (see
+journal_probs). They show the mean distribution, entropy and ambivalence
+per period, plus which emotion came second. These are computed with NumPy
+over the whole window at the same resolution.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from .journal_probs import probability_stats
+from .journal_rollups import choose_resolution, period_start
+from .journal_store import summarize_rollups
+from .labels import LABELS
+from .metrics import traced
+from .prediction_cache import ENTRY_OVERHEAD_BYTES, PredictionCache
+
+MAX_POINTS = 400
+
+CHART_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(color='#E2E8F0'),
+)
+GRID = dict(gridcolor='rgba(255,255,255,0.1)')
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps when reducing
+    the series (x, y) to `threshold` points. x must be increasing.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the interior points; first and last are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    keep = [0]
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) as the third vertex
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        ax, ay = x[keep[-1]], y[keep[-1]]
+        area = np.abs((ax - avg_x) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y - ay))
+        keep.append(lo + int(area.argmax()))
+    keep.append(n - 1)
+    return np.asarray(keep)
+
+
+def bucket_rollups(rollups, max_points=MAX_POINTS):
+    """
+    Rollup rows with a datetime 'date' column -> rows per (bucket start
+    date, emotion) with summed count and confidence_sum, merging
+    consecutive dates so there are at most max_points buckets. Returns
+    (frame, dates per bucket).
+    """
+    dates = np.unique(rollups['date'].to_numpy())
+    width = max(1, -(-len(dates) // max_points))
+    frame = rollups
+    if width > 1:
+        bucket = np.searchsorted(dates, rollups['date'].to_numpy()) // width
+        frame = rollups.assign(date=dates[bucket * width])
+    return (
+        frame.groupby(['date', 'emotion'], observed=True)[['count', 'confidence_sum']]
+        .sum().reset_index()
+    ), width
+
+
+class FigureCache(PredictionCache):
+    """PredictionCache holding (figures, payload_bytes) values"""
+
+    @staticmethod
+    def _sizeof(value):
+        return ENTRY_OVERHEAD_BYTES + value[1]
+
+
+_figure_cache = FigureCache(max_entries=64, max_bytes=16 * 2**20)
+
+
+@traced("figure_timeline")
+def _timeline(bucketed, resolution, width):
+    unit = {'hour': 'Hourly', 'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}[resolution]
+    title = f'{unit} Emotion Trends' if width == 1 else f'Emotion Trends ({width}-{resolution} buckets)'
+    fig = px.line(bucketed, x='date', y='count', color='emotion', title=title, markers=len(bucketed) <= 200)
+    fig.update_layout(**CHART_LAYOUT, xaxis=GRID, yaxis=GRID)
+    return fig
+
+
+@traced("figure_distribution")
+def _distribution(counts):
+    fig = px.pie(names=list(counts.keys()), values=list(counts.values()), hole=0.4)
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+
+@traced("figure_intensity")
+def _intensity(bucketed):
+    per_date = bucketed.groupby('date')[['count', 'confidence_sum']].sum()
+    trend = (per_date['confidence_sum'] / per_date['count']).rename('confidence')
+    trend = trend.rename_axis('date').reset_index()
+    keep = lttb(trend['date'].astype('int64').to_numpy(), trend['confidence'].to_numpy(), MAX_POINTS)
+    trend = trend.iloc[keep]
+    fig = px.line(trend, x='date', y='confidence', markers=len(trend) <= 200)
+    fig.update_layout(**CHART_LAYOUT, xaxis=GRID, yaxis=GRID)
+    return fig
+
+
+@traced("figure_mean_distribution")
+def _mean_distribution(stats):
+    present = stats['mean'].sum(axis=0) > 0
+    frame = pd.DataFrame(stats['mean'][:, present], columns=np.asarray(LABELS)[present])
+    frame.insert(0, 'date', stats['periods'])
+    long = frame.melt(id_vars='date', var_name='emotion', value_name='probability')
+    fig = px.area(long, x='date', y='probability', color='emotion')
+    fig.update_layout(**CHART_LAYOUT, xaxis=GRID, yaxis=dict(GRID, tickformat='.0%'))
+    return fig
+
+
+@traced("figure_uncertainty")
+def _uncertainty(stats):
+    frame = pd.DataFrame({
+        'date': stats['periods'],
+        'entropy': stats['entropy'],
+        'ambivalence': stats['ambivalence'],
+    }).melt(id_vars='date', var_name='measure', value_name='value')
+    fig = px.line(frame, x='date', y='value', color='measure', markers=len(stats['periods']) <= 200)
+    fig.update_layout(**CHART_LAYOUT, xaxis=GRID, yaxis=dict(GRID, range=[0, 1]))
+    return fig
+
+
+@traced("figure_second_choice")
+def _second_choice(stats):
+    matrix = stats['second_choice']
+    keep = (matrix.sum(axis=1) > 0) | (matrix.sum(axis=0) > 0)
+    names = list(np.asarray(LABELS)[keep])
+    counts = matrix[np.ix_(keep, keep)]
+    share = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    fig = px.imshow(
+        share, x=names, y=names, text_auto='.0%', color_continuous_scale='Viridis',
+        labels=dict(x='Runner-up', y='Top emotion', color='Share')
+    )
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+
+def analytics_figures(journal, start=None, end=None):
+    """
+    Summary numbers and figures for the Analytics page over [start, end).
+
+    Returns a dict with has_data (anything logged at all), resolution, the
+    window's counts and avg_confidence, and the timeline, distribution and
+    intensity figures (None when the window is empty). The mixed-feelings
+    figures mean_distribution, uncertainty and second_choice are None when
+    no entry in the window was logged with probabilities. The returned
+    objects are shared; do not modify them.
+    """
+    key = (journal.version(), str(start), str(end))
+    cached = _figure_cache.get(key)
+    if cached is not None:
+        return cached[0]
+
+    resolution = choose_resolution(start, end)
+    window = journal.rollups(resolution, start, end)
+    counts, avg_conf = summarize_rollups(window)
+    result = {
+        'has_data': bool(counts) or not journal.rollups('month').empty,
+        'resolution': resolution,
+        'counts': counts,
+        'avg_confidence': avg_conf,
+        'timeline': None,
+        'distribution': _distribution(counts) if counts else None,
+        'intensity': None,
+        'mean_distribution': None,
+        'uncertainty': None,
+        'second_choice': None,
+    }
+    if not window.empty:
+        bucketed, width = bucket_rollups(window.assign(date=period_start(window['period'], resolution)))
+        result['timeline'] = _timeline(bucketed, resolution, width)
+        result['intensity'] = _intensity(bucketed)
+
+    probabilities = journal.probabilities(start, end)
+    if len(probabilities):
+        stats = probability_stats(probabilities, resolution)
+        result['mean_distribution'] = _mean_distribution(stats)
+        result['uncertainty'] = _uncertainty(stats)
+        result['second_choice'] = _second_choice(stats)
+
+    # Points plotted is a good proxy for the size of the figure payload
+    points = sum(
+        len(trace.x) for name in ('timeline', 'intensity', 'mean_distribution', 'uncertainty')
+        if result[name] for trace in result[name].data
+    )
+    _figure_cache.put(key, (result, 2_000 + 64 * points))
+    return result
+
+
+def figure_cache_stats():
+    """Hit/miss/eviction counters of the figure cache"""
+    return _figure_cache.stats()
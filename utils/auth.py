@@ -0,0 +1,47 @@
+"""
+Who is using the app
+
+With Streamlit authentication configured ([auth] in .streamlit/secrets.toml,
+see st.login), every visitor logs in and gets the journal partition of their
+identity-provider account. Without it the app is single-user and everyone
+shares the default journal. Journal ids and admin rights never come from the
+URL.
+
+Admins are the verified emails listed in EMOTION_ADMINS (comma-separated);
+without authentication there are none.
+"""
+import os
+
+from .journal_partitions import DEFAULT_USER
+
+
+def auth_configured():
+    """True when secrets.toml has an [auth] section, so st.login works"""
+    import streamlit as st
+
+    return st.secrets.load_if_toml_exists() and "auth" in st.secrets
+
+
+def journal_user_id(user, required=True):
+    """
+    Journal user id for an st.user-like mapping: the issuer-qualified
+    subject of a logged-in user, DEFAULT_USER when authentication is not
+    `required`, and None for an anonymous visitor who has to log in first.
+    """
+    if not required:
+        return DEFAULT_USER
+    if not user.get("is_logged_in") or not user.get("sub"):
+        return None
+    return f"{user.get('iss', '')}|{user['sub']}"
+
+
+def admin_emails():
+    return {e.strip().lower() for e in os.environ.get("EMOTION_ADMINS", "").split(",") if e.strip()}
+
+
+def is_admin(user, admins=None):
+    """True for a logged-in user whose verified email is an admin's"""
+    admins = admin_emails() if admins is None else admins
+    email = user.get("email")
+    verified = user.get("email_verified") in (True, "true")
+    return bool(user.get("is_logged_in") and email and verified and email.lower() in admins)
@@ -3,6 +3,8 @@ CBT (Cognitive Behavioral Therapy) reframes and affirmations
 """
 import random
 
+from .labels import by_label, label_id
+
 # CBT Reframing Dictionary
 REFRAMES = {
     "anxious": [
@@ -74,18 +76,19 @@ AFFIRMATIONS = {
     ]
 }
 
+# Indexed by canonical label ID (see labels.py)
+REFRAMES_BY_ID = by_label(REFRAMES)
+AFFIRMATIONS_BY_ID = by_label(AFFIRMATIONS)
+
 def get_reframe(emotion):
-    """Get a random CBT reframe for the emotion"""
-    emotion = emotion.lower()
-    return random.choice(REFRAMES.get(emotion, REFRAMES["neutral"]))
+    """Get a random CBT reframe for the emotion (label, alias or ID)"""
+    return random.choice(REFRAMES_BY_ID[label_id(emotion)])
 
 def get_affirmation(emotion):
-    """Get a random affirmation for the emotion"""
-    emotion = emotion.lower()
-    return random.choice(AFFIRMATIONS.get(emotion, AFFIRMATIONS["neutral"]))
+    """Get a random affirmation for the emotion (label, alias or ID)"""
+    return random.choice(AFFIRMATIONS_BY_ID[label_id(emotion)])
 
 def get_multiple_affirmations(emotion, count=3):
     """Get multiple affirmations"""
-    emotion = emotion.lower()
-    affirmations = AFFIRMATIONS.get(emotion, AFFIRMATIONS["neutral"])
+    affirmations = AFFIRMATIONS_BY_ID[label_id(emotion)]
     return random.sample(affirmations, min(count, len(affirmations)))
\ No newline at end of file
@@ -0,0 +1,278 @@
+"""
+Compact, NumPy-only emotion model format
+
+Unpickling the scikit-learn pipeline means importing scikit-learn, SciPy and
+joblib and building every estimator object before the first prediction. For
+a linear text classifier, inference needs only a few things: the tokenizer
+settings, the vocabulary, the idf weights and one weight matrix. The
+exporter below writes those to a directory:
+
+    meta.json       labels, tokenizer/weighting settings, probability function
+    vocab.npy       vocabulary terms, sorted (row i of the weights = vocab[i])
+    idf.npy         float32 idf per term (absent without idf weighting)
+    coef.npy        (n_terms, n_classes) float32, or int8 with coef_scale.npy
+    intercept.npy   float32 per class
+
+CompactEmotionModel loads the arrays with np.load(mmap_mode='r'), so they
+are paged in on demand and shared between processes. It exposes the two
+attributes EmotionDetector uses, `classes_` and `predict_proba(texts)`.
+
+Supported pipelines: a TfidfVectorizer, or a CountVectorizer optionally
+followed by a TfidfTransformer, with analyzer='word' and the default
+tokenizer. The final step must be LogisticRegression, SGDClassifier with
+log loss, or MultinomialNB.
+
+    python -m utils.compact_model export [--model PKL] [--out DIR] [--int8]
+"""
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _strip_accents(text, mode):
+    if mode == 'ascii':
+        return unicodedata.normalize('NFKD', text).encode('ASCII', errors='ignore').decode('ASCII')
+    if mode == 'unicode':
+        if text.isascii():
+            return text
+        return "".join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return text
+
+
+class CompactEmotionModel:
+    """Linear text classifier loaded from an exported directory"""
+
+    def __init__(self, path, mmap=True):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding='utf-8'))
+        if self.meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format {self.meta['format_version']}")
+        mode = 'r' if mmap else None
+        self.classes_ = np.asarray(self.meta['labels'])
+        self.vocab = np.load(self.path / "vocab.npy", mmap_mode=mode)
+        self.coef = np.load(self.path / "coef.npy", mmap_mode=mode)
+        self.intercept = np.load(self.path / "intercept.npy")
+        self.coef_scale = np.load(self.path / "coef_scale.npy") if self.meta['quantized'] else None
+        self.idf = np.load(self.path / "idf.npy", mmap_mode=mode) if self.meta['use_idf'] else None
+        self._token = re.compile(self.meta['token_pattern'])
+        self._stop_words = frozenset(self.meta['stop_words'] or ())
+
+    def _analyze(self, text):
+        """Same terms as the vectorizer's word analyzer"""
+        if self.meta['lowercase']:
+            text = text.lower()
+        text = _strip_accents(text, self.meta['strip_accents'])
+        tokens = [t for t in self._token.findall(text) if t not in self._stop_words]
+        min_n, max_n = self.meta['ngram_range']
+        if max_n == 1:
+            return tokens
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def _features(self, texts):
+        """Sparse rows as (doc index, term index, weight) arrays"""
+        terms, docs = [], []
+        for i, text in enumerate(texts):
+            analyzed = self._analyze(str(text))
+            terms.extend(analyzed)
+            docs.extend([i] * len(analyzed))
+        if not terms:
+            return np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0, np.float32)
+
+        terms = np.asarray(terms)
+        pos = np.searchsorted(self.vocab, terms)
+        pos[pos == len(self.vocab)] = 0
+        known = self.vocab[pos] == terms
+        if not known.any():
+            return np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0, np.float32)
+        docs, pos = np.asarray(docs)[known], pos[known]
+
+        # One (doc, term) pair per unique combination, with its count
+        pairs, counts = np.unique(np.stack([docs, pos]), axis=1, return_counts=True)
+        docs, pos = pairs
+        weights = counts.astype(np.float32)
+        if self.meta['binary']:
+            weights[:] = 1.0
+        elif self.meta['sublinear_tf']:
+            weights = 1.0 + np.log(weights)
+        if self.idf is not None:
+            weights *= self.idf[pos]
+
+        norm = self.meta['norm']
+        if norm:
+            per_doc = np.zeros(len(texts), dtype=np.float32)
+            np.add.at(per_doc, docs, weights ** 2 if norm == 'l2' else np.abs(weights))
+            if norm == 'l2':
+                per_doc = np.sqrt(per_doc)
+            per_doc[per_doc == 0] = 1.0
+            weights /= per_doc[docs]
+        return docs, pos, weights
+
+    def decision_function(self, texts):
+        docs, pos, weights = self._features(texts)
+        rows = np.asarray(self.coef[pos], dtype=np.float32)
+        if self.coef_scale is not None:
+            rows *= self.coef_scale
+        scores = np.zeros((len(texts), self.coef.shape[1]), dtype=np.float64)
+        np.add.at(scores, docs, rows * weights[:, None])
+        return scores + self.intercept
+
+    def predict_proba(self, texts):
+        texts = list(texts)
+        scores = self.decision_function(texts)
+        kind = self.meta['proba']
+        if kind == 'binary':
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        if kind == 'ovr':
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return p / p.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        p = np.exp(scores)
+        return p / p.sum(axis=1, keepdims=True)
+
+
+# ==================== EXPORT ====================
+# Everything below needs scikit-learn and is only used offline.
+
+def _probability_kind(clf):
+    """Which function turns decision scores into predict_proba for clf"""
+    name = type(clf).__name__
+    if name == 'MultinomialNB':
+        return 'softmax'
+    if name == 'SGDClassifier':
+        if clf.loss not in ('log_loss', 'log'):
+            raise ValueError("SGDClassifier needs loss='log_loss' for probabilities")
+        return 'binary' if len(clf.classes_) == 2 else 'ovr'
+    if name == 'LogisticRegression':
+        if len(clf.classes_) == 2:
+            return 'binary'
+        multi_class = getattr(clf, 'multi_class', 'auto')
+        if multi_class in ('ovr', 'warn') or (multi_class in ('auto', 'deprecated') and clf.solver == 'liblinear'):
+            return 'ovr'
+        return 'softmax'
+    raise ValueError(f"Cannot export classifier {name}")
+
+
+def _split_pipeline(model):
+    steps = [step for _, step in model.steps] if hasattr(model, 'steps') else [model]
+    if len(steps) not in (2, 3):
+        raise ValueError("Expected vectorizer [+ TfidfTransformer] + classifier")
+    vectorizer, clf = steps[0], steps[-1]
+    transformer = steps[1] if len(steps) == 3 else None
+    if transformer is not None and type(transformer).__name__ != 'TfidfTransformer':
+        raise ValueError(f"Cannot export step {type(transformer).__name__}")
+    if type(vectorizer).__name__ not in ('TfidfVectorizer', 'CountVectorizer'):
+        raise ValueError(f"Cannot export vectorizer {type(vectorizer).__name__}")
+    if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Only the default word analyzer can be exported")
+    if callable(vectorizer.strip_accents):
+        raise ValueError("Custom strip_accents functions cannot be exported")
+    return vectorizer, transformer, clf
+
+
+def export_compact_model(model, out_dir, quantize=False, source_version=None):
+    """Write a fitted scikit-learn pipeline to out_dir in the compact format"""
+    vectorizer, transformer, clf = _split_pipeline(model)
+    weighting = transformer if transformer is not None else vectorizer
+    use_idf = bool(getattr(weighting, 'use_idf', False))
+
+    vocabulary = vectorizer.vocabulary_
+    order = sorted(vocabulary, key=str)
+    columns = np.fromiter((vocabulary[term] for term in order), dtype=np.intp, count=len(order))
+
+    if type(clf).__name__ == 'MultinomialNB':
+        coef, intercept = clf.feature_log_prob_, clf.class_log_prior_
+    else:
+        coef, intercept = clf.coef_, np.atleast_1d(clf.intercept_)
+    coef = np.ascontiguousarray(np.asarray(coef, dtype=np.float32)[:, columns].T)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "vocab.npy", np.asarray(order, dtype=str))
+    np.save(out_dir / "intercept.npy", np.asarray(intercept, dtype=np.float32))
+    if use_idf:
+        np.save(out_dir / "idf.npy", np.asarray(weighting.idf_, dtype=np.float32)[columns])
+    if quantize:
+        # Symmetric per-class scale keeps each class's largest weight exact
+        scale = np.abs(coef).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        np.save(out_dir / "coef.npy", np.round(coef / scale).astype(np.int8))
+        np.save(out_dir / "coef_scale.npy", scale.astype(np.float32))
+    else:
+        np.save(out_dir / "coef.npy", coef)
+        (out_dir / "coef_scale.npy").unlink(missing_ok=True)
+
+    stop_words = vectorizer.get_stop_words()
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'labels': [str(label) for label in clf.classes_],
+        'lowercase': bool(vectorizer.lowercase),
+        'strip_accents': vectorizer.strip_accents,
+        'token_pattern': vectorizer.token_pattern,
+        'stop_words': sorted(stop_words) if stop_words else None,
+        'ngram_range': list(vectorizer.ngram_range),
+        'binary': bool(vectorizer.binary),
+        'sublinear_tf': bool(getattr(weighting, 'sublinear_tf', False)),
+        'use_idf': use_idf,
+        'norm': getattr(weighting, 'norm', None),
+        'proba': _probability_kind(clf),
+        'quantized': bool(quantize),
+        'source_version': source_version,
+    }
+    # meta.json last: its presence marks a complete export
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding='utf-8')
+    return out_dir
+
+
+def compare_models(reference, compact, texts):
+    """Label agreement and max probability difference between two models"""
+    expected = reference.predict_proba(texts)
+    actual = compact.predict_proba(texts)
+    return {
+        'texts': len(texts),
+        'label_agreement': float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean()),
+        'max_prob_diff': float(np.abs(expected - actual).max()),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+
+    import joblib
+
+    from .emotion_helpers import COMPACT_MODEL_PATH, MODEL_PATH, model_version
+
+    parser = argparse.ArgumentParser(description="Export the emotion model to the compact NumPy format")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export")
+    export.add_argument("--model", default=str(MODEL_PATH))
+    export.add_argument("--out", default=str(COMPACT_MODEL_PATH))
+    export.add_argument("--int8", action="store_true", help="quantize weights to int8")
+    export.add_argument("--check", default="data/emotion_journal.csv",
+                        help="journal whose texts are used to compare the two models")
+    export.add_argument("--check-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    out = export_compact_model(model, args.out, quantize=args.int8, source_version=model_version(args.model))
+    size = sum(f.stat().st_size for f in out.iterdir())
+    print(f"✅ Exported {args.model} -> {out} ({size / 2**20:.1f} MiB)")
+
+    texts = ["I feel okay today", "I am so happy and excited!", "This is terrible, I'm furious",
+             "I'm scared about tomorrow", "I miss them so much"]
+    if Path(args.check).exists():
+        with open(args.check, newline='', encoding='utf-8') as f:
+            rows = csv.DictReader(f)
+            texts += [row.get('text') or '' for _, row in zip(range(args.check_rows), rows)]
+    result = compare_models(model, CompactEmotionModel(out), texts)
+    print(f"🔍 {result['texts']} texts: label agreement {result['label_agreement']:.2%}, "
+          f"max probability difference {result['max_prob_diff']:.2e}")
@@ -0,0 +1,657 @@
+"""
+Emotion detection and journal logging helpers
+"""
+import atexit
+import http.client
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+from .compact_model import CompactEmotionModel
+from .file_lock import file_lock
+from .labels import canonical, label_id
+from .metrics import count, traced
+from .prediction_cache import PredictionCache, cache_key
+
+MODEL_PATH = Path("models/emotion_model.pkl")
+# NumPy-only export of MODEL_PATH (python -m utils.compact_model export)
+COMPACT_MODEL_PATH = Path("models/emotion_model.compact")
+WARMUP_TEXT = "I feel okay today"
+# Per-sentence results of entries analyzed sentence by sentence, one JSON
+# object per line, matched to the journal entry by (user, timestamp)
+BREAKDOWN_PATH = Path("data/sentence_breakdown.jsonl")
+# Queued check-ins whose write kept failing, one JSON object per line,
+# written again by the next commit that succeeds
+SPILL_PATH = Path("data/emotion_log.spill.jsonl")
+
+# Sentence ends: terminal punctuation followed by whitespace, or a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+log = logging.getLogger(__name__)
+
+
+def model_version(model_path):
+    """Identifier that changes whenever the model artifact at model_path does"""
+    model_path = Path(model_path)
+    # A compact export is a directory; meta.json is written last
+    stat = (model_path / "meta.json" if model_path.is_dir() else model_path).stat()
+    return f"{model_path.name}:{stat.st_mtime_ns:x}:{stat.st_size:x}"
+
+
+def default_model_path():
+    """
+    The compact export if it was made from the current pickle (or the pickle
+    is gone), otherwise the pickle itself.
+    """
+    meta_path = COMPACT_MODEL_PATH / "meta.json"
+    if not meta_path.exists():
+        return MODEL_PATH
+    if not MODEL_PATH.exists():
+        return COMPACT_MODEL_PATH
+    source_version = json.loads(meta_path.read_text(encoding='utf-8')).get('source_version')
+    if source_version == model_version(MODEL_PATH):
+        return COMPACT_MODEL_PATH
+    log.warning("%s is older than %s; using the pickle", COMPACT_MODEL_PATH, MODEL_PATH)
+    return MODEL_PATH
+
+
+class EmotionDetector:
+    """
+    Text emotion classifier backed by a pickled scikit-learn pipeline, or by
+    its compact NumPy-only export when model_path is an export directory
+    """
+
+    def __init__(self, model_path=MODEL_PATH, mmap=True, cache=None):
+        self.model_path = Path(model_path)
+        # Part of every cache key, so results from a previous artifact at the
+        # same path can never be served after a model swap
+        self.model_version = model_version(self.model_path)
+        self.cache = cache
+        if self.model_path.is_dir():
+            # No scikit-learn/SciPy/joblib import at all on this path
+            self.model = CompactEmotionModel(self.model_path, mmap=mmap)
+        else:
+            import joblib
+            # mmap_mode lets joblib map the large numpy arrays (vocabulary idf,
+            # coefficients) read-only from disk so the pages are shared between
+            # processes instead of copied into each one
+            self.model = joblib.load(self.model_path, mmap_mode='r' if mmap else None)
+        # Model classes under their canonical names ("sadness" -> "sad"), and
+        # each column's canonical label ID
+        self.labels = [canonical(str(label)) for label in self.model.classes_]
+        self.label_array = np.asarray(self.labels)
+        self.label_codes = np.array([label_id(label) for label in self.labels], dtype=np.int8)
+
+    def predict_emotions(self, texts):
+        """
+        Score a batch of texts in one vectorizer transform and one
+        predict_proba call.
+
+        Returns numpy arrays (label_ids, confidences, probs): label_ids index
+        into self.labels, probs has one row per text and one column per label.
+        """
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        count("predicted_texts", len(texts))
+        if not texts:
+            return (
+                np.empty(0, dtype=np.intp),
+                np.empty(0, dtype=np.float64),
+                np.empty((0, len(self.labels)), dtype=np.float64)
+            )
+        if self.cache is None:
+            return self._score(texts)
+
+        keys = [cache_key(text, self.model_version) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            label_ids, confidences, probs = self._score([texts[i] for i in missing])
+            for j, i in enumerate(missing):
+                row = probs[j].copy()
+                row.flags.writeable = False
+                results[i] = (int(label_ids[j]), float(confidences[j]), row)
+                self.cache.put(keys[i], results[i])
+            if len(missing) == len(texts):
+                return label_ids, confidences, probs
+
+        return (
+            np.fromiter((r[0] for r in results), dtype=np.intp, count=len(results)),
+            np.fromiter((r[1] for r in results), dtype=np.float64, count=len(results)),
+            np.vstack([r[2] for r in results])
+        )
+
+    def _score(self, texts):
+        """Run the model over a non-empty list of texts"""
+        probs = self.model.predict_proba(texts)
+        label_ids = probs.argmax(axis=1)
+        confidences = probs[np.arange(len(texts)), label_ids]
+        return label_ids, confidences, probs
+
+    @traced("predict")
+    def predict_emotion(self, text):
+        """Return (emotion, confidence, probs) for a single text"""
+        label_ids, confidences, probs = self.predict_emotions([text])
+        best = int(label_ids[0])
+        return (
+            self.labels[best],
+            float(confidences[0]),
+            dict(zip(self.labels, probs[0].tolist()))
+        )
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RemoteEmotionDetector:
+    """
+    Same interface as EmotionDetector, backed by utils.inference_server.
+
+    url is "http://host:port" or "unix:///path/to/socket". Batches are
+    posted in chunks of at most max_texts, capped by the server's limit.
+    """
+
+    def __init__(self, url, timeout=10.0, max_texts=256):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+        self.max_texts = max(1, min(max_texts, self._request("GET", "/health").get('max_texts', max_texts)))
+        self.labels = [canonical(label) for label in self._post([WARMUP_TEXT])['labels']]
+        self.label_array = np.asarray(self.labels)
+        self.label_codes = np.array([label_id(label) for label in self.labels], dtype=np.int8)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            parsed = urlparse(self.url)
+            if parsed.scheme == "unix":
+                conn = _UnixHTTPConnection(parsed.path, self.timeout)
+            else:
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, body=None):
+        # Keep-alive connection per thread; reconnect once if the server closed it
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                headers = {"Content-Type": "application/json"} if body is not None else {}
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (http.client.HTTPException, ConnectionError, ValueError):
+                # ValueError: a truncated or non-JSON body
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"Inference server error {response.status}: {payload.get('error')}")
+        return payload
+
+    def _post(self, texts):
+        return self._request("POST", "/predict", json.dumps({'texts': texts}).encode('utf-8'))
+
+    def predict_emotions(self, texts):
+        """Batch prediction; same (label_ids, confidences, probs) arrays as EmotionDetector"""
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        count("predicted_texts", len(texts))
+        if not texts:
+            return (
+                np.empty(0, dtype=np.intp),
+                np.empty(0, dtype=np.float64),
+                np.empty((0, len(self.labels)), dtype=np.float64)
+            )
+        probs = np.asarray([
+            row
+            for start in range(0, len(texts), self.max_texts)
+            for row in self._post(texts[start:start + self.max_texts])['probs']
+        ], dtype=np.float64)
+        label_ids = probs.argmax(axis=1)
+        return label_ids, probs[np.arange(len(texts)), label_ids], probs
+
+    @traced("predict")
+    def predict_emotion(self, text):
+        """Return (emotion, confidence, probs) for a single text"""
+        payload = self._post([text])
+        return (
+            payload['emotions'][0],
+            payload['confidences'][0],
+            dict(zip(payload['labels'], payload['probs'][0]))
+        )
+
+
+def split_sentences(text):
+    """Non-empty sentences of a journal entry, in order"""
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+
+def stream_sentence_emotions(detector, text, max_batch=16):
+    """
+    Score text sentence by sentence, yielding one dict per sentence (text,
+    emotion, confidence, probs) as soon as its batch is scored.
+
+    Batches start at one sentence and double up to max_batch, so the first
+    result arrives after a single short predict call however long the entry
+    is, while later sentences still get vectorized batches.
+    """
+    sentences = split_sentences(text)
+    start, size = 0, 1
+    while start < len(sentences):
+        batch = sentences[start:start + size]
+        label_ids, confidences, probs = detector.predict_emotions(batch)
+        for i, sentence in enumerate(batch):
+            yield {
+                'text': sentence,
+                'emotion': detector.labels[int(label_ids[i])],
+                'confidence': float(confidences[i]),
+                'probs': dict(zip(detector.labels, np.asarray(probs[i]).tolist())),
+            }
+        start += len(batch)
+        size = min(size * 2, max_batch)
+
+
+def combine_sentence_emotions(results):
+    """
+    Overall (emotion, confidence, probs) for per-sentence results: the
+    probability rows averaged with each sentence weighted by its word count
+    """
+    labels = list(results[0]['probs'])
+    weights = np.array([max(len(r['text'].split()), 1) for r in results], dtype=np.float64)
+    rows = np.array([[r['probs'][label] for label in labels] for r in results])
+    mean = weights @ rows / weights.sum()
+    best = int(mean.argmax())
+    return labels[best], float(mean[best]), dict(zip(labels, mean.tolist()))
+
+
+class EmotionLogger:
+    """
+    Append detected emotions to the journal store (CSV or SQLite).
+
+    With async_mode=True, log_emotion() only enqueues the record; a background
+    writer thread drains the bounded queue and commits everything that
+    arrived within flush_interval seconds as one batch (one write + fsync).
+    If the queue is full the record is written inline instead of dropped. A
+    failed write is retried `retries` times with exponential backoff; if it
+    still fails, its records go to spill_path and are written with a later
+    commit, so a queued check-in is never discarded.
+    """
+
+    _STOP = object()
+
+    def __init__(self, store=None, async_mode=False, queue_size=1000,
+                 flush_interval=0.25, max_batch=500, put_timeout=0.5,
+                 breakdown_path=BREAKDOWN_PATH, retries=3, retry_backoff=0.1,
+                 spill_path=SPILL_PATH):
+        if store is None:
+            # Deferred: the journal stores pull in pandas, which a detector-only
+            # process such as the inference server never needs
+            from .journal_store import open_journal_store
+            store = open_journal_store()
+        self.store = store
+        self.breakdown_path = Path(breakdown_path)
+        self.spill_path = Path(spill_path)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.put_timeout = put_timeout
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'commits': 0, 'records': 0, 'inline_writes': 0, 'retried_writes': 0,
+            'spilled_records': 0, 'replayed_records': 0,
+            'last_commit_seconds': 0.0, 'max_commit_seconds': 0.0, 'total_commit_seconds': 0.0,
+        }
+        self._queue = None
+        self._writer = None
+        if async_mode:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._writer = threading.Thread(target=self._drain, name="emotion-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    @traced("log")
+    def log_emotion(self, emotion, confidence, text, probs=None, user_id=None, sentences=None):
+        """
+        Append one check-in to the journal (of user_id, on partitioned
+        stores). probs, the {label: probability} dict from the detector, is
+        stored with it as a float32 vector. `sentences` is the per-sentence
+        breakdown from stream_sentence_emotions, written to breakdown_path
+        with the entry. The text is also added to the store's similarity
+        index (see journal_similar).
+        """
+        store = self.store.for_user(user_id)
+        emotion = canonical(emotion)
+        record = (datetime.now(), emotion, confidence, text)
+        breakdown = None
+        if sentences:
+            breakdown = {
+                'timestamp': record[0].isoformat(sep=' ', timespec='seconds'),
+                'user': user_id,
+                'emotion': emotion,
+                'confidence': round(float(confidence), 4),
+                'sentences': [
+                    {'text': s['text'], 'emotion': s['emotion'], 'confidence': round(s['confidence'], 4)}
+                    for s in sentences
+                ],
+            }
+        if self._queue is None:
+            # A missing index is rebuilt from the journal: do that before
+            # this entry is in it, or it would be indexed twice
+            store.similar_index.ensure()
+            rows = store.append(*record, probs=probs)
+            store.similar_index.add(*record, row=rows[0] if rows else None)
+            if breakdown is not None:
+                self._write_breakdowns([breakdown])
+            return
+        try:
+            self._queue.put((store, record, probs, breakdown), timeout=self.put_timeout)
+        except queue.Full:
+            # Backpressure: never lose a check-in, just pay the write here
+            self._commit([(store, record, probs, breakdown)])
+            with self._stats_lock:
+                self._stats['inline_writes'] += 1
+
+    def _write_breakdowns(self, breakdowns):
+        lines = "".join(json.dumps(b, ensure_ascii=False) + "\n" for b in breakdowns)
+        self.breakdown_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.breakdown_path.with_suffix('.lock')):
+            with open(self.breakdown_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _retry(self, write, what):
+        """Run write(), retrying with exponential backoff; False if every attempt failed"""
+        for attempt in range(self.retries + 1):
+            try:
+                write()
+                return True
+            except Exception:
+                if attempt == self.retries:
+                    log.exception("Failed to write %s after %d attempts", what, attempt + 1)
+                    return False
+                with self._stats_lock:
+                    self._stats['retried_writes'] += 1
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _append(self, store, records, record_probs):
+        store.similar_index.ensure()
+        rows = store.append_many(records, record_probs)
+        try:
+            store.similar_index.add_many(records, rows)
+        except Exception:
+            # The entries are in the journal; only "similar entries" misses them
+            log.exception("Failed to index %d journal records for similar entries", len(records))
+
+    def _commit(self, batch):
+        """
+        Write queued (store, record, probs, breakdown) items, one append_many
+        per store. Writes that keep failing are spilled, never dropped.
+        """
+        by_store = {}
+        for item in batch:
+            by_store.setdefault(id(item[0]), []).append(item)
+        start = time.perf_counter()
+        spilled = []
+        for items in by_store.values():
+            store = items[0][0]
+            records = [record for _, record, _, _ in items]
+            if self._retry(lambda: self._append(store, records, [probs for _, _, probs, _ in items]),
+                           f"{len(items)} journal records"):
+                breakdowns = [breakdown for *_, breakdown in items if breakdown is not None]
+                if breakdowns and not self._retry(lambda: self._write_breakdowns(breakdowns),
+                                                  f"{len(breakdowns)} sentence breakdowns"):
+                    spilled.extend((None, None, None, breakdown) for breakdown in breakdowns)
+            else:
+                spilled.extend(items)
+        if spilled:
+            self._spill(spilled)
+        elif self.spill_path.exists():
+            self._replay_spill()
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats['commits'] += 1
+            self._stats['records'] += len(batch)
+            self._stats['spilled_records'] += len(spilled)
+            self._stats['last_commit_seconds'] = elapsed
+            self._stats['max_commit_seconds'] = max(self._stats['max_commit_seconds'], elapsed)
+            self._stats['total_commit_seconds'] += elapsed
+
+    def _spill(self, items):
+        """Append (store, record, probs, breakdown) items to spill_path; store None = breakdown only"""
+        lines = []
+        for store, record, probs, breakdown in items:
+            entry = {'breakdown': breakdown}
+            if store is not None:
+                timestamp, emotion, confidence, text = record
+                entry.update({
+                    'user': getattr(store, 'user_id', None),
+                    'record': [timestamp.isoformat(sep=' '), emotion, float(confidence), text],
+                    'probs': probs,
+                })
+            lines.append(json.dumps(entry, ensure_ascii=False, default=float) + "\n")
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.spill_path.with_suffix('.lock')):
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _replay_spill(self):
+        """Write spilled items again; the spill file is removed only once they are all written"""
+        with file_lock(self.spill_path.with_suffix('.lock')):
+            try:
+                with open(self.spill_path, encoding='utf-8') as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                return
+            by_user = {}
+            for entry in entries:
+                if entry.get('record') is not None:
+                    by_user.setdefault(entry['user'], []).append(entry)
+            try:
+                for user, user_entries in by_user.items():
+                    records = [
+                        (datetime.fromisoformat(ts), emotion, confidence, text)
+                        for ts, emotion, confidence, text in (entry['record'] for entry in user_entries)
+                    ]
+                    self._append(self.store.for_user(user), records, [entry['probs'] for entry in user_entries])
+                    # Written entries must not be written again if a later user fails
+                    for entry in user_entries:
+                        entry['record'] = None
+                breakdowns = [entry['breakdown'] for entry in entries if entry.get('breakdown') is not None]
+                if breakdowns:
+                    self._write_breakdowns(breakdowns)
+            except Exception:
+                log.exception("Failed to write spilled journal records; keeping them in %s", self.spill_path)
+                tmp = self.spill_path.with_suffix('.tmp')
+                tmp.write_text("".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+                    if entry.get('record') is not None or entry.get('breakdown') is not None
+                ), encoding='utf-8')
+                os.replace(tmp, self.spill_path)
+                return
+            self.spill_path.unlink()
+        with self._stats_lock:
+            self._stats['replayed_records'] += len(entries)
+
+    def _drain(self):
+        """Writer thread: group records arriving within flush_interval"""
+        stopping = False
+        while not stopping:
+            record = self._queue.get()
+            if record is self._STOP:
+                self._queue.task_done()
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is self._STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(record)
+            self._commit(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until everything queued so far is committed"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush the queue and stop the writer thread"""
+        if self._writer is None or not self._writer.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._writer.join()
+
+    def stats(self):
+        """Queue depth and commit latency of the write-behind queue"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['async'] = self._queue is not None
+        stats['avg_commit_seconds'] = (
+            stats['total_commit_seconds'] / stats['commits'] if stats['commits'] else 0.0
+        )
+        return stats
+
+
+# ==================== SHARED MODEL REGISTRY ====================
+# Streamlit re-executes app.py on every interaction, so anything built at
+# module level there is rebuilt per rerun. The registry below keeps one
+# detector (and one logger) per process and hands the same instance to every
+# session. The detector is treated as read-only after warm-up.
+
+_registry_lock = threading.Lock()
+_detector = None
+_logger = None
+_prediction_cache = PredictionCache()
+_model_stats = {'loads': 0}
+
+
+def _resident_bytes():
+    """Resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _load_detector(model_path):
+    """Load, warm up and time a detector"""
+    rss_before = _resident_bytes()
+    start = time.perf_counter()
+    detector = EmotionDetector(model_path, cache=_prediction_cache)
+    loaded = time.perf_counter()
+    # First predict_proba pays for lazy imports and BLAS/thread-pool setup;
+    # do it here rather than on the first user's click
+    detector.predict_emotion(WARMUP_TEXT)
+    warmed = time.perf_counter()
+    _prediction_cache.clear()
+
+    _model_stats.update({
+        'loads': _model_stats['loads'] + 1,
+        'model_path': str(detector.model_path),
+        'load_seconds': loaded - start,
+        'warmup_seconds': warmed - loaded,
+        'rss_before_bytes': rss_before,
+        'rss_after_bytes': _resident_bytes(),
+        'loaded_at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+    })
+    log.info(
+        "Loaded emotion model %s in %.3fs (warm-up %.3fs, rss %.1f MiB)",
+        detector.model_path, loaded - start, warmed - loaded,
+        _model_stats['rss_after_bytes'] / 2**20
+    )
+    return detector
+
+
+def get_detector(model_path=None):
+    """
+    Return the process-wide detector, loading it on first use (from
+    default_model_path() unless model_path is given).
+
+    If EMOTION_DETECTOR_URL is set (e.g. http://127.0.0.1:8765 or
+    unix:///tmp/emotionllm.sock) this is a RemoteEmotionDetector talking to
+    utils.inference_server instead of an in-process model.
+    """
+    global _detector
+    if _detector is None:
+        with _registry_lock:
+            if _detector is None:
+                url = os.environ.get("EMOTION_DETECTOR_URL")
+                if url:
+                    _detector = RemoteEmotionDetector(url)
+                else:
+                    _detector = _load_detector(model_path or default_model_path())
+    return _detector
+
+
+def reload_detector(model_path=None):
+    """Swap in a freshly loaded model and invalidate cached predictions"""
+    global _detector
+    with _registry_lock:
+        _detector = _load_detector(model_path or default_model_path())
+    return _detector
+
+
+def get_logger(store=None):
+    """Return the process-wide EmotionLogger (async if EMOTION_LOGGER_ASYNC=1)"""
+    global _logger
+    if _logger is None:
+        with _registry_lock:
+            if _logger is None:
+                async_mode = os.environ.get("EMOTION_LOGGER_ASYNC", "0") == "1"
+                _logger = EmotionLogger(store, async_mode=async_mode)
+    return _logger
+
+
+def model_stats():
+    """Load time, warm-up time and resident size of the shared model"""
+    return dict(_model_stats)
+
+
+def cache_stats():
+    """Hit/miss/eviction counters of the shared prediction cache"""
+    return _prediction_cache.stats()
@@ -0,0 +1,244 @@
+"""
+Local inference service with dynamic micro-batching
+
+One process holds the EmotionDetector; Streamlit workers talk to it over HTTP
+on localhost or a Unix socket (see RemoteEmotionDetector). Concurrent
+requests are collected for up to a short batching window and scored with one
+vectorized predict_emotions call.
+
+    python -m utils.inference_server --port 8765
+    python -m utils.inference_server --unix-socket /tmp/emotionllm.sock
+
+POST /predict  {"texts": ["...", ...]}
+    -> {"labels": [...], "emotions": [...], "confidences": [...], "probs": [[...], ...]}
+    413 for more than max_queue texts; RemoteEmotionDetector splits batches
+GET  /health   -> {"status": "ok", "max_texts": max_queue}
+GET  /stats    -> batcher and cache counters
+GET  /metrics  -> utils.metrics spans and counters, Prometheus text
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import metrics
+from .emotion_helpers import cache_stats, get_detector, model_stats
+
+
+class Overloaded(Exception):
+    """The request queue is full"""
+
+
+class QueueTimeout(Exception):
+    """A request waited longer than queue_timeout before being scored"""
+
+
+class MicroBatcher:
+    """Collect single-text requests and score them in vectorized batches"""
+
+    def __init__(self, detector, window=0.005, max_batch=64, max_queue=1024, queue_timeout=2.0):
+        self.detector = detector
+        self.window = window
+        self.max_batch = max_batch
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self.stats = {'batches': 0, 'requests': 0, 'rejected': 0, 'timed_out': 0, 'max_batch_seen': 0}
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Queue one text; returns a Future of (label_id, confidence, probs_row)"""
+        future = Future()
+        try:
+            self._queue.put_nowait((time.monotonic(), text, future))
+        except queue.Full:
+            with self._stats_lock:
+                self.stats['rejected'] += 1
+            raise Overloaded()
+        return future
+
+    def snapshot(self):
+        """Counters plus current queue depth"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = self._queue.qsize()
+        return stats
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._score(batch)
+
+    def _score(self, batch):
+        now = time.monotonic()
+        live, timed_out = [], 0
+        for enqueued, text, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue  # the request was already answered with an error
+            if now - enqueued > self.queue_timeout:
+                future.set_exception(QueueTimeout())
+                timed_out += 1
+            else:
+                live.append((text, future))
+        with self._stats_lock:
+            self.stats['timed_out'] += timed_out
+        if not live:
+            return
+
+        try:
+            label_ids, confidences, probs = self.detector.predict_emotions([text for text, _ in live])
+        except Exception as e:
+            for _, future in live:
+                future.set_exception(e)
+            return
+        for i, (_, future) in enumerate(live):
+            future.set_result((int(label_ids[i]), float(confidences[i]), probs[i].tolist()))
+        with self._stats_lock:
+            self.stats['batches'] += 1
+            self.stats['requests'] += len(live)
+            self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(live))
+
+
+class PredictHandler(BaseHTTPRequestHandler):
+    """JSON endpoints in front of a MicroBatcher"""
+
+    batcher = None
+
+    def _send(self, status, payload, content_type="application/json"):
+        body = payload.encode('utf-8') if isinstance(payload, str) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _cancel(futures):
+        """Drop this request's texts that have not been scored yet"""
+        for future in futures:
+            future.cancel()
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {'status': 'ok', 'max_texts': self.batcher.max_queue})
+        elif self.path == "/stats":
+            self._send(200, {'batcher': self.batcher.snapshot(), 'cache': cache_stats(), 'model': model_stats()})
+        elif self.path == "/metrics":
+            self._send(200, metrics.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))['texts']
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("texts must be a list of strings")
+        except (ValueError, KeyError, TypeError) as e:
+            # TypeError: a JSON body that is not an object
+            self._send(400, {'error': str(e) or 'body must be a JSON object'})
+            return
+        if len(texts) > self.batcher.max_queue:
+            # Could never fit in the queue, so a 503 would be retried forever
+            self._send(413, {'error': f"at most {self.batcher.max_queue} texts per request"})
+            return
+
+        futures = []
+        try:
+            for text in texts:
+                futures.append(self.batcher.submit(text))
+            results = [f.result(timeout=self.batcher.queue_timeout + 30) for f in futures]
+        except Overloaded:
+            self._cancel(futures)
+            self._send(503, {'error': 'overloaded, retry later'})
+            return
+        except QueueTimeout:
+            self._cancel(futures)
+            self._send(504, {'error': 'timed out waiting in queue'})
+            return
+        except FutureTimeout:
+            self._cancel(futures)
+            self._send(504, {'error': 'timed out waiting for the model'})
+            return
+        except Exception as e:
+            self._cancel(futures)
+            self._send(500, {'error': f"prediction failed: {e}"})
+            return
+
+        labels = self.batcher.detector.labels
+        self._send(200, {
+            'labels': labels,
+            'emotions': [labels[label_id] for label_id, _, _ in results],
+            'confidences': [confidence for _, confidence, _ in results],
+            'probs': [row for _, _, row in results],
+        })
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet; /stats has the numbers
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ThreadingHTTPServer over a Unix domain socket"""
+
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+def serve(host="127.0.0.1", port=8765, unix_socket=None, **batcher_options):
+    """Load the model, start the batcher and serve until interrupted"""
+    PredictHandler.batcher = MicroBatcher(get_detector(), **batcher_options)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, PredictHandler)
+        print(f"🧠 Emotion inference server on unix://{unix_socket}")
+    else:
+        server = ThreadingHTTPServer((host, port), PredictHandler)
+        print(f"🧠 Emotion inference server on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve EmotionDetector with dynamic micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--window-ms", type=float, default=5.0, help="batching window")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=1024, help="pending texts before 503s, and the most one request may send")
+    parser.add_argument("--queue-timeout", type=float, default=2.0, help="seconds before a queued request gets a 504")
+    args = parser.parse_args()
+
+    serve(
+        args.host, args.port, args.unix_socket,
+        window=args.window_ms / 1000, max_batch=args.max_batch,
+        max_queue=args.max_queue, queue_timeout=args.queue_timeout
+    )
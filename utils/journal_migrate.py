@@ -0,0 +1,203 @@
+"""
+Streaming repair and schema migration for the CSV journal
+
+Rows are read one at a time with the csv module and written to a temporary
+file next to the journal, which replaces the original with an atomic rename
+once everything has been written and fsynced. Memory use is bounded by the
+chunk size, not the journal size. Rows that cannot be repaired go to a
+quarantine CSV together with the reason. Progress is checkpointed after every
+chunk, so an interrupted run picks up where it stopped.
+
+The journal's advisory lock is held for the whole run, so app processes
+appending at the same time wait instead of writing rows the final rename
+would discard.
+"""
+import csv
+import itertools
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from .file_lock import file_lock
+from .journal_repository import JOURNAL_COLUMNS, LEGACY_COLUMNS, TIMESTAMP_FORMAT
+from .labels import canonical
+
+SCHEMA_VERSION = 2
+CHUNK_ROWS = 10_000
+
+# Every header name we have seen in the wild, mapped to the current schema
+COLUMN_ALIASES = {name: name for name in JOURNAL_COLUMNS}
+COLUMN_ALIASES.update(LEGACY_COLUMNS)
+COLUMN_ALIASES.update({'time': 'timestamp', 'date': 'timestamp', 'label': 'emotion', 'score': 'confidence'})
+
+
+def _sidecar(path, suffix):
+    return path.with_name(f"{path.stem}.{suffix}")
+
+
+def schema_version(path):
+    """Schema version recorded for a journal (1 = never migrated)"""
+    meta = _sidecar(Path(path), "schema.json")
+    if not meta.exists():
+        return 1
+    return json.loads(meta.read_text())['version']
+
+
+def _column_map(header):
+    """Index of each current column in a source row, or None for headerless files"""
+    names = [COLUMN_ALIASES.get(h.strip().lower()) for h in header]
+    if 'timestamp' not in names or 'emotion' not in names:
+        return None
+    return {column: names.index(column) for column in JOURNAL_COLUMNS if column in names}
+
+
+def _parse_timestamp(value):
+    value = value.strip()
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+def normalize_row(row, columns):
+    """Source row -> row in the current schema; raises ValueError if unfixable"""
+    if columns is None:
+        # Headerless journals were written positionally in schema order
+        if len(row) < 3:
+            raise ValueError(f"expected at least 3 fields, got {len(row)}")
+        values = dict(zip(JOURNAL_COLUMNS, row))
+    else:
+        if len(row) <= max(columns.values()):
+            raise ValueError(f"expected {max(columns.values()) + 1} fields, got {len(row)}")
+        values = {column: row[i] for column, i in columns.items()}
+
+    try:
+        timestamp = _parse_timestamp(values['timestamp'])
+    except (ValueError, KeyError):
+        raise ValueError(f"bad timestamp {values.get('timestamp')!r}")
+    emotion = values.get('emotion', '').strip().lower()
+    if not emotion:
+        raise ValueError("missing emotion")
+    emotion = canonical(emotion)
+    try:
+        confidence = float(values.get('confidence') or 0.0)
+    except ValueError:
+        raise ValueError(f"bad confidence {values.get('confidence')!r}")
+    if not 0.0 <= confidence <= 1.0:
+        raise ValueError(f"confidence out of range: {confidence}")
+
+    return [timestamp.strftime(TIMESTAMP_FORMAT), emotion, f"{confidence:.4f}", values.get('text', '')]
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def migrate_journal(path, chunk_rows=CHUNK_ROWS, resume=True):
+    """
+    Repair and migrate a journal in place.
+
+    Returns a summary dict with rows kept, rows quarantined and whether the
+    run resumed from a checkpoint.
+    """
+    path = Path(path)
+    with file_lock(path.with_suffix('.lock')):
+        return _migrate(path, chunk_rows, resume)
+
+
+def _migrate(path, chunk_rows, resume):
+    tmp_path = _sidecar(path, "migrating.csv")
+    checkpoint_path = _sidecar(path, "migrate-checkpoint.json")
+    quarantine_path = _sidecar(path, "quarantine.csv")
+
+    state = {'rows_read': 0, 'kept': 0, 'quarantined': 0, 'tmp_bytes': 0, 'quarantine_bytes': 0}
+    resumed = False
+    if resume and checkpoint_path.exists() and tmp_path.exists():
+        state = json.loads(checkpoint_path.read_text())
+        resumed = True
+
+    with open(path, newline='', encoding='utf-8', errors='replace') as src, \
+            open(tmp_path, 'a+', newline='', encoding='utf-8') as out, \
+            open(quarantine_path, 'a+', newline='', encoding='utf-8') as bad:
+        # Drop anything written after the last checkpoint
+        out.truncate(state['tmp_bytes'] if resumed else 0)
+        bad.truncate(state['quarantine_bytes'] if resumed else 0)
+        writer = csv.writer(out, quoting=csv.QUOTE_ALL)
+        quarantine = csv.writer(bad, quoting=csv.QUOTE_ALL)
+
+        reader = csv.reader(src)
+        first = next(reader, None)
+        columns = _column_map(first) if first else None
+        # Without a recognizable header the first line is data
+        rows = itertools.chain([first], reader) if first and columns is None else reader
+        if not resumed:
+            writer.writerow(JOURNAL_COLUMNS)
+            quarantine.writerow(['line', 'reason', 'raw'])
+
+        for _ in range(state['rows_read']):
+            next(rows, None)
+
+        in_chunk = 0
+        for row in rows:
+            state['rows_read'] += 1
+            if not row:
+                continue
+            try:
+                writer.writerow(normalize_row(row, columns))
+                state['kept'] += 1
+            except ValueError as e:
+                quarantine.writerow([reader.line_num, str(e), json.dumps(row, ensure_ascii=False)])
+                state['quarantined'] += 1
+            in_chunk += 1
+            if in_chunk >= chunk_rows:
+                _checkpoint(checkpoint_path, state, out, bad)
+                in_chunk = 0
+
+        _fsync(out)
+        _fsync(bad)
+
+    os.replace(tmp_path, path)
+    _sidecar(path, "schema.json").write_text(json.dumps({
+        'version': SCHEMA_VERSION,
+        'columns': JOURNAL_COLUMNS,
+        'migrated_at': datetime.now().strftime(TIMESTAMP_FORMAT),
+    }))
+    checkpoint_path.unlink(missing_ok=True)
+    _drop_derived(path)
+    if not state['quarantined']:
+        quarantine_path.unlink(missing_ok=True)
+
+    return {
+        'rows_kept': state['kept'],
+        'rows_quarantined': state['quarantined'],
+        'quarantine_file': str(quarantine_path) if state['quarantined'] else None,
+        'resumed': resumed,
+    }
+
+
+def _drop_derived(path):
+    """
+    Delete the sidecars a store derives from a rewritten journal, so it
+    rebuilds its rollup, offset, search and similarity indexes from the
+    new rows
+    """
+    _sidecar(path, "rollup.csv").unlink(missing_ok=True)
+    _sidecar(path, "rollups.csv").unlink(missing_ok=True)
+    _sidecar(path, "offsets").unlink(missing_ok=True)
+    _sidecar(path, "offsets.json").unlink(missing_ok=True)
+    for name in ("search.db", "similar.db"):
+        for suffix in (name, f"{name}-wal", f"{name}-shm"):
+            _sidecar(path, suffix).unlink(missing_ok=True)
+
+
+def _checkpoint(checkpoint_path, state, out, bad):
+    """Make the written rows durable, then record how far we got"""
+    _fsync(out)
+    _fsync(bad)
+    state['tmp_bytes'] = out.tell()
+    state['quarantine_bytes'] = bad.tell()
+    tmp = checkpoint_path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, checkpoint_path)
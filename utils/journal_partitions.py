@@ -0,0 +1,381 @@
+"""
+Journal partitioned by user and by month
+
+Layout: <root>/<user>/<YYYY-MM>.csv, one CsvJournalStore (with its own
+rollup, offset index and search index) per partition. Compaction merges
+small closed months into a single <YYYY-MM>_<YYYY-MM>.csv partition; appends
+pick their partition under the user's partitions.lock, which a compaction
+holds until the merged months are gone.
+Queries only open partitions whose month range overlaps the requested dates,
+so "today", "last 30 days" and "latest 20" touch one or two files no matter
+how much history a user has.
+"""
+import csv
+import hashlib
+import itertools
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .file_lock import file_lock
+from .journal_probs import ProbabilityLog, empty_probabilities
+from .journal_repository import JOURNAL_COLUMNS, empty_journal_frame
+from .journal_rollups import PERIOD_COLUMNS
+from .journal_similar import SimilarityIndex
+from .journal_store import ROLLUP_COLUMNS, CsvJournalStore, _format_ts, similar_frame
+
+PARTITION_ROOT = Path("data/journal")
+DEFAULT_USER = "default"
+PARTITION_NAME = re.compile(r"^(\d{4}-\d{2})(?:_(\d{4}-\d{2}))?\.csv$")
+PARTITION_SIDECARS = (
+    "rollup.csv", "rollup.tmp", "rollups.csv", "rollups.tmp", "offsets", "offsets.json",
+    "search.db", "search.db-wal", "search.db-shm", "probs.bin", "probs.json", "probs.tmp",
+    "rescored.csv", "rescored.tmp", "applying.csv", "lock"
+)
+# Sidecar directories (journal_rescore's work dir)
+PARTITION_SIDECAR_DIRS = ("rescore",)
+
+
+def _month(value):
+    """Datetime/date/timestamp string -> "YYYY-MM" """
+    if isinstance(value, str):
+        return value[:7]
+    return value.strftime("%Y-%m")
+
+
+def _user_dir_name(user_id):
+    """Filesystem-safe, collision-free directory name for a user id"""
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(user_id))[:40]
+    # ".", ".." and dot-names are hashed like any other unsafe id, so an id
+    # can never name the root, its parent or a hidden directory
+    if safe == str(user_id) and not safe.startswith('.'):
+        return safe
+    safe = re.sub(r"^\.+", lambda m: "_" * len(m.group()), safe)
+    return f"{safe}-{hashlib.sha1(str(user_id).encode('utf-8')).hexdigest()[:10]}"
+
+
+class PartitionedJournalStore:
+    """One user's journal, split into monthly CSV partitions"""
+
+    _stores_lock = threading.Lock()
+
+    def __init__(self, root=PARTITION_ROOT, user_id=DEFAULT_USER):
+        self.root = Path(root)
+        self.user_id = user_id or DEFAULT_USER
+        self.dir = self.root / _user_dir_name(self.user_id)
+        if self.dir.resolve().parent != self.root.resolve():
+            raise ValueError(f"User id {self.user_id!r} does not name a directory under {self.root}")
+        self.lock_path = self.dir / "partitions.lock"
+        # Created by the first append, so reads for unknown ids leave no trace
+        self._stores = {}
+        # One similarity index per user, across all of their partitions
+        self.similar_index = SimilarityIndex(self.dir / "similar.db", self._records)
+
+    def for_user(self, user_id):
+        """The store for another user under the same root"""
+        return get_partitioned_store(self.root, user_id)
+
+    # ---- partition bookkeeping ----
+
+    def _partitions(self):
+        """[(first_month, last_month, path)] oldest first, hiding partitions a compaction already covers"""
+        found = []
+        if not self.dir.is_dir():
+            return found
+        for entry in os.scandir(self.dir):
+            match = PARTITION_NAME.match(entry.name)
+            if match:
+                first, last = match.group(1), match.group(2) or match.group(1)
+                found.append((first, last, Path(entry.path)))
+        # Widest range first for each start month, so a merged partition
+        # shadows its sources while a compaction is still deleting them
+        found.sort(key=lambda p: p[1], reverse=True)
+        found.sort(key=lambda p: p[0])
+        partitions, covered_until = [], ""
+        for first, last, path in found:
+            if last <= covered_until:
+                continue
+            partitions.append((first, last, path))
+            covered_until = last
+        return partitions
+
+    def _pruned(self, start=None, end=None):
+        """Partitions whose month range overlaps [start, end)"""
+        lo = _month(start) if start is not None else None
+        hi = _month(end) if end is not None else None
+        return [
+            p for p in self._partitions()
+            if (lo is None or p[1] >= lo) and (hi is None or p[0] <= hi)
+        ]
+
+    def _store(self, path):
+        with self._stores_lock:
+            store = self._stores.get(path.name)
+            if store is None:
+                store = self._stores[path.name] = CsvJournalStore(path)
+            return store
+
+    def _partition_path(self, month):
+        for first, last, path in self._partitions():
+            if first <= month <= last:
+                return path
+        return self.dir / f"{month}.csv"
+
+    # ---- store interface ----
+
+    def version(self):
+        """Token that changes whenever any partition changes (for caches)"""
+        return (str(self.dir), *(self._store(path).version() for _, _, path in self._partitions()))
+
+    def append(self, timestamp, emotion, confidence, text, probs=None):
+        """Append one entry to its month's partition"""
+        self.append_many([(timestamp, emotion, confidence, text)], [probs])
+
+    def append_many(self, records, probs=None):
+        """Append records (and their probs), one batched write per touched partition"""
+        by_month = {}
+        for record, p in zip(records, probs if probs is not None else [None] * len(records)):
+            batch = by_month.setdefault(_month(_format_ts(record[0])), ([], []))
+            batch[0].append(record)
+            batch[1].append(p)
+        if not by_month:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # A compaction cannot retire a partition between choosing it and writing to it
+        with file_lock(self.lock_path):
+            for month, (batch, batch_probs) in by_month.items():
+                self._store(self._partition_path(month)).append_many(batch, batch_probs)
+
+    def entries(self, start=None, end=None):
+        """Entries with start <= timestamp < end, oldest first"""
+        frames = [self._store(path).entries(start, end) for _, _, path in self._pruned(start, end)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_journal_frame()
+        return pd.concat(frames, ignore_index=True)
+
+    def entries_at(self, timestamps, rows=None):
+        """
+        Entries logged at any of the given timestamps (strings), only reading
+        their months; rows are not used (the index spans partitions)
+        """
+        by_month = {}
+        for timestamp in timestamps:
+            by_month.setdefault(_month(timestamp), []).append(timestamp)
+        frames = []
+        for month, wanted in sorted(by_month.items()):
+            path = self._partition_path(month)
+            if path.exists():
+                frames.append(self._store(path).entries_at(wanted))
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_journal_frame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _records(self):
+        """Every entry of every partition, oldest partition first"""
+        return itertools.chain.from_iterable(self._store(path)._records() for _, _, path in self._partitions())
+
+    def probabilities(self, start=None, end=None):
+        """PROB_DTYPE records of entries logged with probabilities, start <= timestamp < end"""
+        parts = [self._store(path).probabilities(start, end) for _, _, path in self._pruned(start, end)]
+        parts = [p for p in parts if len(p)]
+        return np.concatenate(parts) if parts else empty_probabilities()
+
+    def latest(self, n=20):
+        """The n most recent entries, newest first"""
+        return self.page(n)[0]
+
+    def page(self, n=20, before=None):
+        """
+        n entries older than cursor `before`, newest first, as (frame, cursor).
+        The cursor is (partition file name, cursor inside that partition).
+        """
+        partitions = [path for _, _, path in self._partitions()][::-1]
+        names = [path.name for path in partitions]
+        index, inner = 0, None
+        if before is not None:
+            name, inner = before
+            if name not in names:
+                return empty_journal_frame(), None
+            index = names.index(name)
+
+        frames, remaining, cursor = [], n, None
+        while index < len(partitions) and remaining > 0:
+            frame, inner = self._store(partitions[index]).page(remaining, inner)
+            frames.append(frame)
+            remaining -= len(frame)
+            if inner is None:
+                index += 1
+        if index < len(partitions):
+            cursor = (names[index], inner)
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_journal_frame(), None
+        return pd.concat(frames, ignore_index=True), cursor
+
+    def search(self, query, emotion=None, start=None, end=None, limit=50):
+        """Matching entries, newest first, stopping once `limit` are found"""
+        frames, remaining = [], limit
+        for _, _, path in reversed(self._pruned(start, end)):
+            frame = self._store(path).search(query, emotion, start, end, remaining)
+            frames.append(frame)
+            remaining -= len(frame)
+            if remaining <= 0:
+                break
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_journal_frame()
+        return pd.concat(frames, ignore_index=True)
+
+    def similar(self, text, k=5):
+        """Up to k of this user's entries most like text, best first, with a similarity column"""
+        if not self.dir.is_dir():
+            return similar_frame(self, [])
+        return similar_frame(self, self.similar_index.similar(text, k))
+
+    def daily_rollups(self, start=None, end=None):
+        """Rollup rows with start <= day < end"""
+        frames = [self._store(path).daily_rollups(start, end) for _, _, path in self._pruned(start, end)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def rollups(self, resolution='day', start=None, end=None):
+        """PERIOD_COLUMNS rows for the periods overlapping [start, end), oldest first"""
+        frames = [self._store(path).rollups(resolution, start, end) for _, _, path in self._pruned(start, end)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=PERIOD_COLUMNS)
+        # A week can straddle two monthly partitions
+        return (
+            pd.concat(frames, ignore_index=True)
+            .groupby(['period', 'emotion'], as_index=False)[PERIOD_COLUMNS[2:]].sum()
+        )
+
+    def rebuild_rollups(self):
+        """Regenerate every partition's rollup; returns the row count"""
+        return sum(self._store(path).rebuild_rollups() for _, _, path in self._partitions())
+
+    def emotion_counts(self, start=None, end=None):
+        """{emotion: count} for the range, most frequent first"""
+        counts = self.entries(start, end)['emotion'].value_counts()
+        return {emotion: int(n) for emotion, n in counts.items() if n}
+
+    def mean_confidence(self, start=None, end=None):
+        """Average confidence over the range (None when empty)"""
+        df = self.entries(start, end)
+        return float(df['confidence'].mean()) if not df.empty else None
+
+    # ---- compaction ----
+
+    def compact(self, min_rows=500, target_rows=20_000):
+        """
+        Merge runs of consecutive closed partitions holding fewer than
+        min_rows rows each into one partition of at most target_rows rows.
+        Returns the names of the partitions written.
+        """
+        current = _month(date.today())
+        closed = [p for p in self._partitions() if p[1] < current]
+        runs, run, run_rows = [], [], 0
+        for partition in closed:
+            rows = self._store(partition[2]).tail.refresh()
+            if rows < min_rows and run_rows + rows <= target_rows:
+                run.append(partition)
+                run_rows += rows
+                continue
+            runs.append(run)
+            run, run_rows = ([partition], rows) if rows < min_rows else ([], 0)
+        runs.append(run)
+
+        written = []
+        for run in runs:
+            if len(run) < 2:
+                continue
+            written.append(self._merge(run).name)
+        return written
+
+    def _merge(self, run):
+        target = self.dir / f"{run[0][0]}_{run[-1][1]}.csv"
+        tmp = target.with_suffix('.merging')
+        # Every lock is held until the sources are deleted, so no row can be
+        # appended to a source after it was copied
+        with ExitStack() as locks:
+            locks.enter_context(file_lock(self.lock_path))
+            locks.enter_context(file_lock(target.with_suffix('.lock')))
+            for _, _, path in run:
+                locks.enter_context(file_lock(path.with_suffix('.lock')))
+
+            with open(tmp, 'w', newline='', encoding='utf-8') as out:
+                writer = csv.writer(out, quoting=csv.QUOTE_ALL)
+                writer.writerow(JOURNAL_COLUMNS)
+                for _, _, path in run:
+                    with open(path, newline='', encoding='utf-8') as src:
+                        reader = csv.reader(src)
+                        next(reader, None)
+                        writer.writerows(reader)
+                out.flush()
+                os.fsync(out.fileno())
+            ProbabilityLog.merge([path for _, _, path in run], target)
+            # Once renamed, the merged partition shadows its sources (see
+            # _partitions), so readers never see rows twice
+            os.replace(tmp, target)
+
+            with self._stores_lock:
+                for _, _, path in run:
+                    self._stores.pop(path.name, None)
+                    path.unlink(missing_ok=True)
+                    for suffix in PARTITION_SIDECARS:
+                        path.with_name(f"{path.stem}.{suffix}").unlink(missing_ok=True)
+                    for suffix in PARTITION_SIDECAR_DIRS:
+                        shutil.rmtree(path.with_name(f"{path.stem}.{suffix}"), ignore_errors=True)
+        return target
+
+
+# One store per user who ever logged in would grow forever, so the registry
+# is bounded: least recently used stores are dropped (and simply rebuilt if
+# that user comes back)
+MAX_CACHED_USERS = 256
+
+_partitioned = OrderedDict()
+_partitioned_lock = threading.Lock()
+
+
+def get_partitioned_store(root=PARTITION_ROOT, user_id=DEFAULT_USER):
+    """Shared PartitionedJournalStore for (root, user)"""
+    key = (Path(root).resolve(), user_id or DEFAULT_USER)
+    with _partitioned_lock:
+        store = _partitioned.get(key)
+        if store is None:
+            store = _partitioned[key] = PartitionedJournalStore(root, user_id)
+            while len(_partitioned) > MAX_CACHED_USERS:
+                _partitioned.popitem(last=False)
+        else:
+            _partitioned.move_to_end(key)
+        return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge small monthly journal partitions")
+    parser.add_argument("--root", default=str(PARTITION_ROOT))
+    parser.add_argument("--min-rows", type=int, default=500)
+    parser.add_argument("--target-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    for user_dir in sorted(p for p in root.iterdir() if p.is_dir()) if root.exists() else []:
+        store = PartitionedJournalStore(root, user_dir.name)
+        merged = store.compact(args.min_rows, args.target_rows)
+        print(f"✅ {user_dir.name}: {', '.join(merged) if merged else 'nothing to compact'}")
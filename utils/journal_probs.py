@@ -0,0 +1,185 @@
+"""
+Per-entry probability vectors as fixed-width float32 columns
+
+log_emotion() receives the model's whole distribution with every check-in.
+The CSV journal keeps only the winning label, so the distribution goes to
+an append-only binary sidecar <stem>.probs.bin. It holds one PROB_DTYPE
+record per entry: the timestamp, then one float32 per canonical label, in
+LABELS (ID) order. The file is read with a memory map, so the whole history
+is a NumPy array without any parsing. probability_stats() then aggregates
+it with array operations only, never a Python loop per row.
+
+<stem>.probs.json records the label order the file was written with. A
+file written for a different label set is refused rather than misread.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .labels import LABELS, label_id
+
+PROB_DTYPE = np.dtype([('timestamp', 'M8[s]'), ('probs', '<f4', (len(LABELS),))])
+
+
+def probability_vector(probs):
+    """{label or alias: p} -> float32 vector in LABELS order (aliases add up)"""
+    vector = np.zeros(len(LABELS), dtype=np.float32)
+    for label, p in probs.items():
+        vector[label_id(label)] += p
+    return vector
+
+
+def probability_rows(timestamps, probs):
+    """PROB_DTYPE records for the (timestamp string, probs dict) pairs whose probs is not None"""
+    pairs = [(ts, p) for ts, p in zip(timestamps, probs) if p is not None]
+    rows = np.empty(len(pairs), dtype=PROB_DTYPE)
+    if pairs:
+        rows['timestamp'] = np.array([ts.replace(' ', 'T') for ts, _ in pairs], dtype='M8[s]')
+        rows['probs'] = np.stack([probability_vector(p) for _, p in pairs])
+    return rows
+
+
+def empty_probabilities():
+    return np.empty(0, dtype=PROB_DTYPE)
+
+
+def select_range(rows, start=None, end=None):
+    """Records with start <= timestamp < end"""
+    mask = np.ones(len(rows), dtype=bool)
+    if start is not None:
+        mask &= rows['timestamp'] >= np.datetime64(str(start).replace(' ', 'T'), 's')
+    if end is not None:
+        mask &= rows['timestamp'] < np.datetime64(str(end).replace(' ', 'T'), 's')
+    return rows[mask]
+
+
+class ProbabilityLog:
+    """Append-only PROB_DTYPE sidecar of a CSV journal"""
+
+    def __init__(self, journal_path):
+        journal_path = Path(journal_path)
+        self.path = journal_path.with_name(f"{journal_path.stem}.probs.bin")
+        self.meta_path = journal_path.with_name(f"{journal_path.stem}.probs.json")
+
+    def exists(self):
+        return self.path.exists()
+
+    def _check_meta(self):
+        meta = json.loads(self.meta_path.read_text())
+        if meta.get('labels') != list(LABELS):
+            raise ValueError(f"{self.path} was written for labels {meta.get('labels')}, not {list(LABELS)}")
+
+    def _write_meta(self):
+        self.meta_path.write_text(json.dumps({'labels': list(LABELS), 'dtype': str(PROB_DTYPE)}))
+
+    def append(self, timestamps, probs):
+        """Append records for entries that came with probabilities; the caller holds the journal's lock"""
+        rows = probability_rows(timestamps, probs)
+        if not len(rows):
+            return
+        if self.meta_path.exists():
+            self._check_meta()
+        else:
+            self._write_meta()
+        with open(self.path, 'ab') as f:
+            # A crash mid-record leaves a partial one at the end; drop it
+            # before appending so later records stay aligned
+            extra = f.tell() % PROB_DTYPE.itemsize
+            if extra:
+                f.truncate(f.tell() - extra)
+            f.write(rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, start=None, end=None):
+        """Records with start <= timestamp < end, oldest first (read-only)"""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return empty_probabilities()
+        count = size // PROB_DTYPE.itemsize
+        if not count:
+            return empty_probabilities()
+        self._check_meta()
+        rows = np.memmap(self.path, dtype=PROB_DTYPE, mode='r', shape=(count,))
+        return select_range(rows, start, end)
+
+    @classmethod
+    def merge(cls, sources, journal_path):
+        """Concatenate the sidecars of journals `sources` into journal_path's (atomic)"""
+        target = cls(journal_path)
+        tmp = target.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as out:
+            for source in sources:
+                rows = cls(source).read()
+                out.write(np.ascontiguousarray(rows).tobytes())
+            out.flush()
+            os.fsync(out.fileno())
+        target._write_meta()
+        os.replace(tmp, target.path)
+
+
+def _periods(timestamps, resolution):
+    """datetime64[s] -> start of each one's hour/day/week (Monday)/month"""
+    if resolution == 'hour':
+        return timestamps.astype('M8[h]').astype('M8[s]')
+    days = timestamps.astype('M8[D]')
+    if resolution == 'week':
+        # Day 0 (1970-01-01) was a Thursday, weekday 3
+        days = days - ((days.astype(np.int64) + 3) % 7).astype('m8[D]')
+    elif resolution == 'month':
+        days = timestamps.astype('M8[M]').astype('M8[D]')
+    return days.astype('M8[s]')
+
+
+def probability_stats(rows, resolution='day'):
+    """
+    Aggregates over PROB_DTYPE records, per period of `resolution`:
+
+    * periods: period starts (datetime64), oldest first
+    * counts: entries per period
+    * mean: mean distribution per period (periods x labels)
+    * entropy: mean normalized entropy per period, 0 (certain) to 1 (uniform)
+    * ambivalence: mean second-best / best probability per period, 0 (one
+      clear emotion) to 1 (torn between two)
+    * second_choice: labels x labels counts of (top label, runner-up)
+    """
+    n_labels = len(LABELS)
+    if not len(rows):
+        return {
+            'periods': np.empty(0, dtype='M8[s]'),
+            'counts': np.empty(0, dtype=np.int64),
+            'mean': np.empty((0, n_labels)),
+            'entropy': np.empty(0),
+            'ambivalence': np.empty(0),
+            'second_choice': np.zeros((n_labels, n_labels), dtype=np.int64),
+        }
+    probs = np.asarray(rows['probs'], dtype=np.float64)
+    totals = probs.sum(axis=1, keepdims=True)
+    probs = np.divide(probs, totals, out=np.full_like(probs, 1.0 / n_labels), where=totals > 0)
+
+    logs = np.log(probs, out=np.zeros_like(probs), where=probs > 0)
+    entropy = -(probs * logs).sum(axis=1) / np.log(n_labels)
+
+    ranked = np.argsort(-probs, axis=1, kind='stable')
+    first, second = ranked[:, 0], ranked[:, 1]
+    best = np.take_along_axis(probs, first[:, None], axis=1)[:, 0]
+    runner_up = np.take_along_axis(probs, second[:, None], axis=1)[:, 0]
+    ambivalence = np.divide(runner_up, best, out=np.zeros_like(best), where=best > 0)
+    second_choice = np.bincount(first * n_labels + second, minlength=n_labels * n_labels)
+
+    periods, inverse = np.unique(_periods(np.asarray(rows['timestamp']), resolution), return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(periods))
+    # One bincount per label column; rows are never looped over
+    sums = np.column_stack([np.bincount(inverse, weights=probs[:, j], minlength=len(periods))
+                            for j in range(n_labels)])
+    return {
+        'periods': periods,
+        'counts': counts,
+        'mean': sums / counts[:, None],
+        'entropy': np.bincount(inverse, weights=entropy, minlength=len(periods)) / counts,
+        'ambivalence': np.bincount(inverse, weights=ambivalence, minlength=len(periods)) / counts,
+        'second_choice': second_choice.reshape(n_labels, n_labels),
+    }
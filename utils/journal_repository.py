@@ -0,0 +1,181 @@
+"""
+Process-wide cache of the parsed CSV journal
+
+Every page used to run pd.read_csv + pd.to_datetime over the whole journal on
+each rerun. JournalRepository parses it once with explicit dtypes, keeps the
+frame keyed on the file's size/mtime, and when the file has only grown it
+parses just the appended tail.
+"""
+import csv
+import io
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .labels import LABELS, canonical
+from .metrics import span
+
+JOURNAL_COLUMNS = ['timestamp', 'emotion', 'confidence', 'text']
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Older journals used different names for the same columns
+LEGACY_COLUMNS = {'intensity': 'confidence', 'note': 'text'}
+
+# Bytes before the cached offset that must be unchanged for the file to count
+# as "appended to" rather than rewritten
+FINGERPRINT_BYTES = 256
+
+
+def _parse_timestamps(values):
+    """Parse with the journal's explicit format, falling back for old rows"""
+    with span("to_datetime"):
+        try:
+            return pd.to_datetime(values, format=TIMESTAMP_FORMAT)
+        except (ValueError, TypeError):
+            return pd.to_datetime(values, format='ISO8601', errors='coerce')
+
+
+def emotion_categorical(values):
+    """
+    Emotion column -> Categorical over the canonical LABELS, so codes are
+    label IDs (int8). Aliases fold into their label; unregistered labels
+    are kept, as extra categories after LABELS.
+    """
+    values = pd.Series(values).astype(str)
+    names = values.map({value: canonical(value) for value in values.unique()})
+    extras = sorted(set(names.unique()) - set(LABELS))
+    return pd.Categorical(names, categories=list(LABELS) + extras)
+
+
+def type_journal_frame(raw):
+    """Raw journal columns -> canonical names and typed columns"""
+    raw = raw.rename(columns=LEGACY_COLUMNS)
+    for column in JOURNAL_COLUMNS:
+        if column not in raw.columns:
+            raw[column] = None
+    return pd.DataFrame({
+        'timestamp': _parse_timestamps(raw['timestamp']),
+        'emotion': emotion_categorical(raw['emotion']),
+        'confidence': pd.to_numeric(raw['confidence'], errors='coerce').astype('float32'),
+        'text': raw['text'],
+    })
+
+
+def empty_journal_frame():
+    """An empty frame with the journal's typed columns"""
+    return pd.DataFrame({
+        'timestamp': pd.Series(dtype='datetime64[ns]'),
+        'emotion': pd.Series(pd.Categorical([], categories=LABELS)),
+        'confidence': pd.Series(dtype='float32'),
+        'text': pd.Series(dtype=object),
+    })
+
+
+class JournalRepository:
+    """
+    Typed, cached view of a CSV journal.
+
+    frame() returns the same DataFrame object to every caller until the file
+    changes, so callers must treat it as read-only (filter/groupby/copy, never
+    assign into it).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._frame = None
+        self._offset = None
+        self._fingerprint = b""
+        self._mtime = None
+        self._header = None
+        self.full_parses = 0
+        self.tail_parses = 0
+
+    def _parse(self, buffer, names=None):
+        with span("read_csv"):
+            if names is None:
+                raw = pd.read_csv(buffer)
+            else:
+                raw = pd.read_csv(buffer, header=None, names=names)
+        return type_journal_frame(raw)
+
+    def _full_parse(self, f, size):
+        f.seek(0)
+        data = f.read(size)
+        self._header = next(csv.reader([data.split(b"\n", 1)[0].decode('utf-8')]))
+        self.full_parses += 1
+        return self._parse(io.BytesIO(data))
+
+    def _tail_parse(self, f, size):
+        f.seek(self._offset)
+        tail = f.read(size - self._offset)
+        self.tail_parses += 1
+        new_rows = self._parse(io.BytesIO(tail), names=self._header)
+        old = self._frame
+        emotion = union_categoricals([old['emotion'], new_rows['emotion']])
+        combined = pd.concat(
+            [old.drop(columns='emotion'), new_rows.drop(columns='emotion')],
+            ignore_index=True
+        )
+        combined.insert(1, 'emotion', pd.Categorical(emotion))
+        return combined
+
+    def _is_append_of_cached(self, f, size):
+        if self._frame is None or self._offset is None:
+            return False
+        start = self._offset - len(self._fingerprint)
+        f.seek(start)
+        return f.read(len(self._fingerprint)) == self._fingerprint
+
+    def frame(self):
+        """The parsed journal, re-read only when the file changed"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return empty_journal_frame()
+
+        with self._lock:
+            if (self._frame is not None and stat.st_size == self._offset
+                    and stat.st_mtime_ns == self._mtime):
+                return self._frame
+
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                size = stat.st_size
+                if size == 0:
+                    return empty_journal_frame()
+                if size > (self._offset or 0) and self._is_append_of_cached(f, size):
+                    frame = self._tail_parse(f, size)
+                else:
+                    frame = self._full_parse(f, size)
+
+                # A writer may be half-way through a row; only trust an
+                # offset that ends on a complete line
+                f.seek(max(0, size - FINGERPRINT_BYTES))
+                self._fingerprint = f.read(size - max(0, size - FINGERPRINT_BYTES))
+                self._offset = size if self._fingerprint.endswith(b"\n") else None
+
+            self._frame = frame
+            self._mtime = stat.st_mtime_ns
+            return frame
+
+    def invalidate(self):
+        """Forget the cached frame (e.g. after rewriting the file)"""
+        with self._lock:
+            self._frame = None
+            self._offset = None
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_journal_repository(path):
+    """The shared JournalRepository for a path (one per process)"""
+    key = Path(path).resolve()
+    with _repositories_lock:
+        if key not in _repositories:
+            _repositories[key] = JournalRepository(path)
+        return _repositories[key]
@@ -0,0 +1,409 @@
+"""
+Bulk re-scoring of the journal with the current emotion model
+
+A CSV journal is split into fixed-size chunks of rows by byte range, using
+its row-offset index (see journal_tail). A SQLite journal is split into
+ranges of entry ids, which its primary key reads directly. A process pool
+scores the chunks.
+Each worker loads the model once, memory-mapped, so the large arrays are
+shared between processes, and writes its chunk to a part file with an atomic
+rename. A finished part file is the checkpoint for its chunk, so an
+interrupted run skips those chunks when it is started again. Once every
+chunk is done, the parts are concatenated into <stem>.rescored.csv. That
+file holds the old label and confidence next to the new label, confidence
+and per-label probabilities.
+
+The manifest of a run records a fingerprint of the rows it covers (inode,
+size and the first and last bytes of a CSV journal; row count and content
+totals of a SQLite one). A journal rewritten since, e.g. by journal_migrate,
+no longer matches, and its stale part files are discarded instead of
+resumed.
+
+Re-scoring never touches the journal. apply_rescored() promotes the output
+afterwards: under the journal's lock it gives each re-scored row its new
+label, confidence and probabilities, and the derived indexes are rebuilt.
+Rows appended while a run is in progress are left for the next run.
+journal_paths() lists the journal files of the configured backend (every
+monthly partition for "partitioned").
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from .emotion_helpers import EmotionDetector, default_model_path, model_version
+from .file_lock import file_lock
+from .journal_migrate import _column_map, _drop_derived
+from .journal_probs import ProbabilityLog, probability_vector
+from .journal_repository import JOURNAL_COLUMNS, TIMESTAMP_FORMAT
+from .journal_tail import JournalTailIndex
+from .labels import canonical
+
+CHUNK_ROWS = 50_000
+BATCH_ROWS = 2_048
+# Bytes hashed at each end of the covered part of a CSV journal
+FINGERPRINT_BYTES = 64 * 1024
+
+_worker_detector = None
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+
+def _sidecar(path, suffix):
+    return path.with_name(f"{path.stem}.{suffix}")
+
+
+def journal_paths(backend=None):
+    """
+    Files holding the journal of `backend` (default: env
+    EMOTION_JOURNAL_BACKEND), oldest partition first
+    """
+    from .journal_partitions import PARTITION_NAME, PARTITION_ROOT
+    from .journal_store import CSV_PATH, SQLITE_PATH
+
+    backend = (backend or os.environ.get("EMOTION_JOURNAL_BACKEND", "csv")).lower()
+    if backend == "csv":
+        return [CSV_PATH] if CSV_PATH.exists() else []
+    if backend == "partitioned":
+        if not PARTITION_ROOT.is_dir():
+            return []
+        return sorted(
+            path for user_dir in PARTITION_ROOT.iterdir() if user_dir.is_dir()
+            for path in user_dir.iterdir() if PARTITION_NAME.match(path.name)
+        )
+    if backend == "sqlite":
+        return [SQLITE_PATH] if SQLITE_PATH.exists() else []
+    raise ValueError(f"Unknown journal backend: {backend!r}")
+
+
+def is_sqlite_journal(path):
+    """True for a SQLite journal database, False for a CSV journal"""
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def _connect_readonly(path):
+    return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+def _fingerprint(path, rows, sqlite, tail=None):
+    """
+    Identifies the first `rows` positions of a journal: appends leave it
+    unchanged, rewrites change it
+    """
+    if sqlite:
+        conn = _connect_readonly(path)
+        try:
+            totals = conn.execute(
+                "SELECT COUNT(*), MAX(timestamp), TOTAL(confidence), TOTAL(length(text)) "
+                "FROM entries WHERE id <= ?", (rows,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return list(totals)
+    end = tail.byte_range(0, rows)[1] if rows else 0
+    with open(path, 'rb') as f:
+        head = f.read(min(end, FINGERPRINT_BYTES))
+        f.seek(max(end - FINGERPRINT_BYTES, 0))
+        last = f.read(end - f.tell())
+        inode = os.fstat(f.fileno()).st_ino
+    digest = hashlib.blake2b(head + last, digest_size=16).hexdigest()
+    return [inode, end, digest]
+
+
+def _init_worker(model_path):
+    global _worker_detector
+    _worker_detector = EmotionDetector(model_path)
+
+
+def _read_chunk(journal_path, start, end, first_row, columns):
+    """
+    (row, timestamp, emotion, confidence, text) tuples of one chunk: CSV
+    rows in bytes [start, end), numbered from first_row, or SQLite entries
+    with start <= id < end (columns is None), numbered by id
+    """
+    if columns is None:
+        conn = _connect_readonly(journal_path)
+        try:
+            return conn.execute(
+                "SELECT id, timestamp, emotion, confidence, COALESCE(text, '') FROM entries "
+                "WHERE id >= ? AND id < ? ORDER BY id", (start, end)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    with open(journal_path, 'rb') as f:
+        f.seek(start)
+        block = f.read(end - start).decode('utf-8', errors='replace')
+    rows = [row for row in csv.reader(io.StringIO(block, newline='')) if row]
+
+    def field(row, name):
+        i = columns.get(name)
+        return row[i] if i is not None and i < len(row) else ''
+
+    return [
+        (first_row + i, field(row, 'timestamp'), field(row, 'emotion'), field(row, 'confidence'), field(row, 'text'))
+        for i, row in enumerate(rows)
+    ]
+
+
+def _rescore_chunk(journal_path, start, end, first_row, columns, part_path, batch_rows):
+    """Score one chunk (see _read_chunk) into part_path; returns the row count"""
+    detector = _worker_detector
+    rows = _read_chunk(journal_path, start, end, first_row, columns)
+
+    tmp = part_path.with_suffix('.tmp')
+    with open(tmp, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        for offset in range(0, len(rows), batch_rows):
+            batch = rows[offset:offset + batch_rows]
+            label_ids, confidences, probs = detector.predict_emotions([text for *_, text in batch])
+            for i, (row, timestamp, emotion, confidence, _) in enumerate(batch):
+                writer.writerow([
+                    row,
+                    timestamp,
+                    emotion,
+                    confidence,
+                    detector.labels[label_ids[i]],
+                    f"{confidences[i]:.4f}",
+                    *(f"{p:.4f}" for p in probs[i]),
+                ])
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, part_path)
+    return len(rows)
+
+
+def rescore_journal(path, model_path=None, workers=None, chunk_rows=CHUNK_ROWS,
+                    batch_rows=BATCH_ROWS, resume=True, progress=None):
+    """
+    Re-score every row of the CSV or SQLite journal at `path` with the model
+    at `model_path`, writing <stem>.rescored.csv next to it.
+
+    progress(done_rows, total_rows) is called as chunks finish. Returns a
+    summary dict.
+    """
+    path = Path(path)
+    model_path = Path(model_path or default_model_path())
+    work_dir = _sidecar(path, "rescore")
+    manifest_path = work_dir / "manifest.json"
+    output_path = _sidecar(path, "rescored.csv")
+
+    sqlite = is_sqlite_journal(path)
+    tail = None
+    if sqlite:
+        conn = _connect_readonly(path)
+        try:
+            # Positions are entry ids - 1; ids are never reused
+            total = conn.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+        finally:
+            conn.close()
+        columns = None
+    else:
+        tail = JournalTailIndex(path)
+        total = tail.refresh()
+        header, _, _ = tail.page(1)
+        # Migrated journals always have a header; very old ones are positional
+        columns = _column_map(header) or {name: i for i, name in enumerate(JOURNAL_COLUMNS)}
+    manifest = {
+        'journal': str(path),
+        'rows': total,
+        'chunk_rows': chunk_rows,
+        'model_version': model_version(model_path),
+    }
+
+    resumed = False
+    if resume and manifest_path.exists():
+        previous = json.loads(manifest_path.read_text())
+        # Part files from a different model or chunking, or of rows that have
+        # been rewritten since, cannot be reused. Rows appended since the
+        # interrupted run started are left out again.
+        resumed = (
+            all(previous.get(k) == manifest[k] for k in ('journal', 'chunk_rows', 'model_version'))
+            and previous.get('rows', total + 1) <= total
+            and previous.get('fingerprint') == _fingerprint(path, previous['rows'], sqlite, tail)
+        )
+        if resumed:
+            total = manifest['rows'] = previous['rows']
+    if not resumed:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        manifest['fingerprint'] = _fingerprint(path, total, sqlite, tail)
+        manifest['started_at'] = datetime.now().strftime(TIMESTAMP_FORMAT)
+        manifest_path.write_text(json.dumps(manifest))
+
+    # (index, first position, last position, part file, rows)
+    chunks = []
+    for index, first_row in enumerate(range(0, total, chunk_rows)):
+        last_row = min(first_row + chunk_rows, total)
+        chunks.append([index, first_row, last_row, work_dir / f"part-{index:06d}.csv", last_row - first_row])
+    if sqlite and chunks:
+        # Deleted ids leave gaps, so count each chunk's entries
+        conn = _connect_readonly(path)
+        try:
+            counts = dict(conn.execute(
+                "SELECT (id - 1) / ?, COUNT(*) FROM entries WHERE id <= ? GROUP BY 1", (chunk_rows, total)
+            ).fetchall())
+        finally:
+            conn.close()
+        for chunk in chunks:
+            chunk[4] = counts.get(chunk[0], 0)
+    pending = [chunk for chunk in chunks if not chunk[3].exists()]
+    done = sum(rows for *_, part, rows in chunks if part.exists())
+    total_rows = sum(rows for *_, rows in chunks)
+    if progress:
+        progress(done, total_rows)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(model_path,)) as pool:
+            futures = []
+            for _, first_row, last_row, part, _ in pending:
+                start, end = (first_row + 1, last_row + 1) if sqlite else tail.byte_range(first_row, last_row)
+                futures.append(pool.submit(
+                    _rescore_chunk, path, start, end, first_row, columns, part, batch_rows
+                ))
+            for future in as_completed(futures):
+                done += future.result()
+                if progress:
+                    progress(done, total_rows)
+
+    labels = EmotionDetector(model_path).labels if total else []
+    header_line = io.StringIO()
+    csv.writer(header_line).writerow([
+        'row', 'timestamp', 'emotion', 'confidence', 'new_emotion', 'new_confidence',
+        *(f"prob_{label}" for label in labels)
+    ])
+    tmp = output_path.with_suffix('.tmp')
+    with open(tmp, 'wb') as out:
+        out.write(header_line.getvalue().encode('utf-8'))
+        for _, _, _, part, _ in chunks:
+            with open(part, 'rb') as src:
+                shutil.copyfileobj(src, out)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, output_path)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'rows': total_rows,
+        'chunks': len(chunks),
+        'resumed_chunks': len(chunks) - len(pending),
+        'model_version': manifest['model_version'],
+        'output_file': str(output_path),
+    }
+
+
+def _rescored_rows(output_path):
+    """(labels, rows) of a <stem>.rescored.csv file; rows are dicts of its columns"""
+    f = open(output_path, newline='', encoding='utf-8')
+    reader = csv.DictReader(f)
+    labels = [name[len("prob_"):] for name in reader.fieldnames if name.startswith("prob_")]
+    return f, labels, reader
+
+
+def apply_rescored(path):
+    """
+    Promote <stem>.rescored.csv into the journal at `path`: every re-scored
+    row gets its new label, confidence and probabilities, holding the
+    journal's lock. Rows appended since the run keep theirs. Raises
+    ValueError, leaving the journal untouched, if a re-scored row no longer
+    matches the journal's row at its position. Returns the rows updated.
+    """
+    path = Path(path)
+    output_path = _sidecar(path, "rescored.csv")
+    if not output_path.exists():
+        raise ValueError(f"{output_path} does not exist; re-score the journal first")
+    if is_sqlite_journal(path):
+        return _apply_sqlite(path, output_path)
+    with file_lock(path.with_suffix('.lock')):
+        return _apply_csv(path, output_path)
+
+
+def _apply_csv(path, output_path):
+    tmp_path = _sidecar(path, "applying.csv")
+    timestamps, probs = [], []
+    source, labels, rescored = _rescored_rows(output_path)
+    with source, open(path, newline='', encoding='utf-8', errors='replace') as src, \
+            open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+        reader = csv.reader(src)
+        writer = csv.writer(out, quoting=csv.QUOTE_ALL)
+        header = next(reader, None)
+        columns = _column_map(header) if header else None
+        if columns is None or 'confidence' not in columns:
+            raise ValueError(f"{path} has no journal header; migrate it first")
+        writer.writerow(header)
+        # Rows are numbered as the re-scoring workers numbered them: blank
+        # lines do not count
+        numbered = (row for row in reader if row)
+        updated = 0
+        for new in rescored:
+            row = next(numbered, None)
+            if row is None or row[columns['timestamp']] != new['timestamp']:
+                tmp_path.unlink()
+                raise ValueError(f"{path} changed since it was re-scored (row {new['row']}); re-score it again")
+            row[columns['emotion']] = canonical(new['new_emotion'])
+            row[columns['confidence']] = new['new_confidence']
+            writer.writerow(row)
+            timestamps.append(new['timestamp'])
+            probs.append({label: float(new[f"prob_{label}"]) for label in labels})
+            updated += 1
+        for row in numbered:
+            writer.writerow(row)
+        out.flush()
+        os.fsync(out.fileno())
+
+    # Probabilities of rows appended since the run are kept as they were
+    sidecar = ProbabilityLog(path)
+    kept = sidecar.read()
+    if timestamps:
+        kept = kept[kept['timestamp'] > np.datetime64(timestamps[-1].replace(' ', 'T'), 's')]
+    kept = np.array(kept)  # out of the memory map before the file goes
+    os.replace(tmp_path, path)
+    sidecar.path.unlink(missing_ok=True)
+    for offset in range(0, len(timestamps), BATCH_ROWS):
+        sidecar.append(timestamps[offset:offset + BATCH_ROWS], probs[offset:offset + BATCH_ROWS])
+    if len(kept):
+        with open(sidecar.path, 'ab') as f:
+            f.write(kept.tobytes())
+    _drop_derived(path)
+    return updated
+
+
+def _apply_sqlite(path, output_path):
+    from .journal_store import SqliteJournalStore
+
+    store = SqliteJournalStore(path)
+    assignments = ", ".join(f"{column} = ?" for column in store.PROB_COLUMNS)
+    source, labels, rescored = _rescored_rows(output_path)
+    updated = 0
+    with source, store._conn() as conn:
+        while True:
+            batch = [new for _, new in zip(range(BATCH_ROWS), rescored)]
+            if not batch:
+                break
+            params = []
+            for new in batch:
+                vector = probability_vector({label: float(new[f"prob_{label}"]) for label in labels})
+                params.append((
+                    canonical(new['new_emotion']), float(new['new_confidence']), *vector.tolist(),
+                    int(new['row']), new['timestamp']
+                ))
+            cursor = conn.executemany(
+                f"UPDATE entries SET emotion = ?, confidence = ?, {assignments} WHERE id = ? AND timestamp = ?",
+                params
+            )
+            if cursor.rowcount != len(batch):
+                # Leaving the with block rolls every batch back
+                raise ValueError(f"{path} changed since it was re-scored; re-score it again")
+            updated += len(batch)
+    store.rebuild_rollups()
+    return updated
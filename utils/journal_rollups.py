@@ -0,0 +1,221 @@
+"""
+Hour / day / week / month rollups of the journal
+
+A period is identified by a string that sorts chronologically:
+
+    hour   "YYYY-MM-DD HH"
+    day    "YYYY-MM-DD"
+    week   "YYYY-MM-DD" of the ISO week's Monday
+    month  "YYYY-MM"
+
+Each (resolution, period, emotion) row holds count, confidence sum and
+confidence sum of squares, like the daily rollup. choose_resolution() picks
+the resolution for a date range, so charts over any span read a bounded
+number of rows and never the raw entries.
+
+For the CSV journal the rows live in an append-only sidecar of deltas,
+<stem>.rollups.csv. Each append writes one delta row per touched
+(resolution, period, emotion). Readers fold only the bytes added since their
+last read into their in-memory totals. Once the deltas outnumber the distinct
+keys by a wide margin, the writer compacts the file.
+"""
+import csv
+import io
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from .journal_repository import TIMESTAMP_FORMAT
+
+RESOLUTIONS = ('hour', 'day', 'week', 'month')
+RESOLUTION_SPAN = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30.44),
+}
+PERIOD_COLUMNS = ['period', 'emotion', 'count', 'confidence_sum', 'confidence_sq_sum']
+LOG_COLUMNS = ['resolution'] + PERIOD_COLUMNS
+MAX_PERIODS = 400
+
+
+def _timestamp_string(value):
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def period_key(timestamp, resolution):
+    """Stored timestamp string (or date/datetime) -> period string"""
+    ts = _timestamp_string(timestamp)
+    if resolution == 'hour':
+        return ts[:13]
+    if resolution == 'day':
+        return ts[:10]
+    if resolution == 'month':
+        return ts[:7]
+    if resolution == 'week':
+        day = date.fromisoformat(ts[:10])
+        return (day - timedelta(days=day.weekday())).isoformat()
+    raise ValueError(f"Unknown resolution: {resolution!r}")
+
+
+def period_start(periods, resolution):
+    """Series of period strings -> Series of period start datetimes"""
+    if resolution == 'hour':
+        return pd.to_datetime(periods, format="%Y-%m-%d %H")
+    if resolution == 'month':
+        return pd.to_datetime(periods, format="%Y-%m")
+    return pd.to_datetime(periods, format="%Y-%m-%d")
+
+
+def period_bounds(start, end, resolution):
+    """
+    (first, last) period strings, inclusive, of the periods that overlap
+    [start, end); either may be None for an open end
+    """
+    first = period_key(start, resolution) if start is not None else None
+    last = None
+    if end is not None:
+        if isinstance(end, str):
+            end = datetime.strptime(_timestamp_string(end), TIMESTAMP_FORMAT)
+        elif not isinstance(end, datetime):
+            end = datetime.combine(end, datetime.min.time())
+        last = period_key(end - timedelta(seconds=1), resolution)
+    return first, last
+
+
+def choose_resolution(start, end, max_periods=MAX_PERIODS):
+    """Finest resolution that covers [start, end) in at most max_periods periods"""
+    if start is None or end is None:
+        return 'month'
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for resolution in RESOLUTIONS:
+        if span / RESOLUTION_SPAN[resolution] <= max_periods:
+            return resolution
+    return 'month'
+
+
+def rollup_deltas(records, resolutions=RESOLUTIONS):
+    """
+    {(resolution, period, emotion): [count, sum, sum_sq]} for
+    (timestamp string, emotion, confidence, text) records
+    """
+    deltas = {}
+    for timestamp, emotion, confidence, _ in records:
+        confidence = float(confidence)
+        for resolution in resolutions:
+            stats = deltas.setdefault((resolution, period_key(timestamp, resolution), emotion), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += confidence
+            stats[2] += confidence * confidence
+    return deltas
+
+
+def period_frame(totals, resolution, start=None, end=None):
+    """Totals dict -> PERIOD_COLUMNS frame for one resolution and range, oldest first"""
+    first, last = period_bounds(start, end, resolution)
+    rows = sorted(
+        (period, emotion, *stats)
+        for (res, period, emotion), stats in totals.items()
+        if res == resolution
+        and (first is None or period >= first)
+        and (last is None or period <= last)
+    )
+    return pd.DataFrame(rows, columns=PERIOD_COLUMNS)
+
+
+class RollupLog:
+    """Append-only delta sidecar holding every resolution's rollups for a CSV journal"""
+
+    def __init__(self, journal_path):
+        journal_path = Path(journal_path)
+        self.path = journal_path.with_name(f"{journal_path.stem}.rollups.csv")
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._offset = 0
+        self._inode = None
+        self._rows = 0
+
+    def exists(self):
+        return self.path.exists()
+
+    @staticmethod
+    def _encode(deltas):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for (resolution, period, emotion), (count, conf_sum, conf_sq_sum) in deltas.items():
+            writer.writerow([resolution, period, emotion, count, repr(conf_sum), repr(conf_sq_sum)])
+        return buffer.getvalue()
+
+    def _write(self, deltas):
+        """Replace the sidecar with exactly these totals (atomic)"""
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(LOG_COLUMNS)
+            f.write(self._encode(deltas))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def rebuild(self, records):
+        """Regenerate from (timestamp, emotion, confidence, text) records; returns the row count"""
+        deltas = rollup_deltas(records)
+        with self._lock:
+            self._write(deltas)
+            self._totals, self._offset, self._inode, self._rows = {}, 0, None, 0
+        return len(deltas)
+
+    def append(self, records):
+        """Add records' deltas; the caller holds the journal's file lock"""
+        deltas = rollup_deltas(records)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            if f.tell() == 0:
+                csv.writer(f).writerow(LOG_COLUMNS)
+            f.write(self._encode(deltas))
+            f.flush()
+            os.fsync(f.fileno())
+        totals = self.totals()
+        # Deltas for hot periods pile up; fold them once they dwarf the key count
+        if self._rows > 4 * len(totals) + 10_000:
+            with self._lock:
+                self._write(totals)
+                self._totals, self._offset, self._inode, self._rows = {}, 0, None, 0
+
+    def totals(self):
+        """{(resolution, period, emotion): (count, sum, sum_sq)}, reading only new deltas"""
+        with self._lock:
+            try:
+                f = open(self.path, 'rb')
+            except FileNotFoundError:
+                return {}
+            with f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    # Compacted or rebuilt by someone: start over
+                    self._totals, self._offset, self._inode, self._rows = {}, 0, stat.st_ino, 0
+                if stat.st_size == self._offset:
+                    return dict(self._totals)
+                f.seek(self._offset)
+                block = f.read(stat.st_size - self._offset)
+            # Only whole lines; a writer may be mid-row
+            block = block[:block.rfind(b"\n") + 1]
+            self._offset += len(block)
+            for row in csv.reader(io.StringIO(block.decode('utf-8'), newline='')):
+                if not row or row[0] == 'resolution':
+                    continue
+                resolution, period, emotion, count, conf_sum, conf_sq_sum = row
+                key = (resolution, period, emotion)
+                total_count, total_sum, total_sq_sum = self._totals.get(key, (0, 0.0, 0.0))
+                self._totals[key] = (
+                    total_count + int(count), total_sum + float(conf_sum), total_sq_sum + float(conf_sq_sum)
+                )
+                self._rows += 1
+            # A copy of immutable tuples: callers iterate it while other
+            # threads keep folding in deltas
+            return dict(self._totals)
@@ -0,0 +1,145 @@
+"""
+Full-text search over journal entries (SQLite FTS5)
+
+The SQLite journal keeps an external-content FTS5 table in the same database,
+maintained by triggers. The CSV journal gets a sidecar FTS5 database that
+CsvJournalStore.append() updates, and that is rebuilt from the journal the
+first time it is needed if it has gone missing.
+
+Results come back newest first by walking the FTS index in descending rowid
+(insertion) order, so even very common terms only touch `limit` matches.
+"""
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(query):
+    """
+    User search box text -> FTS5 MATCH expression.
+
+    Every word must match; a word ending in '*' (and the last word, so results
+    appear while typing) matches as a prefix. Returns None if there is
+    nothing to search for.
+    """
+    words = query.split()
+    terms = []
+    for i, word in enumerate(words):
+        prefix = word.endswith('*') or i == len(words) - 1
+        for token in TOKEN.findall(word):
+            terms.append(f'"{token}"' + ('*' if prefix else ''))
+    return " ".join(terms) or None
+
+
+class CsvSearchIndex:
+    """Sidecar FTS5 index for the CSV journal"""
+
+    SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+        text,
+        emotion UNINDEXED,
+        timestamp UNINDEXED,
+        confidence UNINDEXED,
+        prefix = '2 3'
+    );
+    """
+
+    def __init__(self, journal_path, rows_source):
+        journal_path = Path(journal_path)
+        self.path = journal_path.with_name(f"{journal_path.stem}.search.db")
+        # Callable returning (timestamp, emotion, confidence, text) tuples for
+        # every journal row, used when the index has to be rebuilt
+        self._rows_source = rows_source
+        self._local = threading.local()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        # Inode of the file the index was last opened on
+        self._inode = None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.inode != self._inode:
+            # The file was deleted or replaced since this thread opened it
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.inode = self._inode
+        return conn
+
+    def _file_inode(self):
+        try:
+            return self.path.stat().st_ino
+        except FileNotFoundError:
+            return None
+
+    def ensure(self):
+        """
+        Open the index, rebuilding it from the journal if it is missing. A
+        file deleted after it was opened (journal_migrate removes it) is
+        noticed on the next call and rebuilt too.
+        """
+        if self._ready and self._file_inode() == self._inode:
+            return self._conn()
+        with self._ready_lock:
+            inode = self._file_inode()
+            if not (self._ready and inode == self._inode):
+                # Every thread's connection to the old file gets reopened
+                self._inode = inode
+                conn = self._conn()
+                conn.executescript(self.SCHEMA)
+                if inode is None:
+                    self.rebuild()
+                self._inode = self._local.inode = self._file_inode()
+                self._ready = True
+        return self._conn()
+
+    def rebuild(self):
+        """Re-index every journal row; returns the row count"""
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        with conn:
+            conn.execute("DELETE FROM entries_fts")
+            conn.executemany(
+                "INSERT INTO entries_fts (timestamp, emotion, confidence, text) VALUES (?, ?, ?, ?)",
+                self._rows_source()
+            )
+        return conn.execute("SELECT COUNT(*) FROM entries_fts").fetchone()[0]
+
+    def add(self, timestamp, emotion, confidence, text):
+        """Index one newly appended entry"""
+        self.add_many([(timestamp, emotion, confidence, text)])
+
+    def add_many(self, records):
+        """Index newly appended (timestamp, emotion, confidence, text) records"""
+        with self.ensure() as conn:
+            conn.executemany(
+                "INSERT INTO entries_fts (timestamp, emotion, confidence, text) VALUES (?, ?, ?, ?)",
+                [(ts, emotion, float(confidence), text) for ts, emotion, confidence, text in records]
+            )
+
+    def search(self, query, emotion=None, start=None, end=None, limit=50):
+        """Matching (timestamp, emotion, confidence, text) rows, newest first"""
+        match = fts_query(query)
+        if match is None:
+            return []
+        sql = "SELECT timestamp, emotion, confidence, text FROM entries_fts WHERE entries_fts MATCH ?"
+        params = [match]
+        if emotion is not None:
+            sql += " AND emotion = ?"
+            params.append(emotion)
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND timestamp < ?"
+            params.append(end)
+        sql += " ORDER BY rowid DESC LIMIT ?"
+        params.append(int(limit))
+        return self.ensure().execute(sql, params).fetchall()
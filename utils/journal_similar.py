@@ -0,0 +1,346 @@
+"""
+"Entries like this one": approximate nearest neighbours over journal text
+
+Each entry becomes a hashed TF-IDF vector over its words and word pairs
+(sublinear term frequency; document frequencies are counted as entries
+arrive) and is stored only as a SIGNATURE_BITS-bit random-projection
+signature: bit i is the sign of the vector's dot product with random
+hyperplane i. A term's coordinates on all the hyperplanes are the bits of
+its blake2b digest, so the projection needs no stored matrix and is the same
+in every process. The Hamming distance d between two signatures estimates
+the angle between their vectors, cos(pi * d / SIGNATURE_BITS) their cosine.
+
+Signatures are cut into BANDS one-byte bands, and every band value is a
+bucket key (LSH banding). Two entries share a band with probability p**8,
+p being the share of equal bits, so with 32 bands a cosine-0.7 paraphrase
+is a candidate about 96% of the time and an unrelated entry about 12%. A
+query reads at most BUCKET_LIMIT of the newest entries per bucket, keeps
+the CANDIDATES that share the most buckets with it and ranks those by
+Hamming distance, so its cost does not grow with the journal: a few dozen
+index lookups whether there are a thousand entries or millions.
+
+The index is a SQLite sidecar (<stem>.similar.db, or similar.db in a
+partitioned user's directory). It holds no text: each entry is its
+timestamp, a fingerprint of its text and, for CSV journals, its row number,
+which the store resolves back to the journal row with one seek (see
+journal_store.similar_frame), so rows a migration removed are never shown. EmotionLogger.log_emotion() inserts each check-in
+as it is written, and an index that has gone missing is rebuilt from the
+journal the first time it is needed.
+"""
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from .metrics import traced
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+SIGNATURE_BITS = 256
+BAND_BITS = 8
+BANDS = SIGNATURE_BITS // BAND_BITS
+BUCKET_LIMIT = 256
+CANDIDATES = 1024
+MIN_SIMILARITY = 0.3
+REBUILD_BATCH = 10_000
+
+
+def terms(text):
+    """Lowercased words and adjacent word pairs of text, with counts"""
+    words = TOKEN.findall(str(text).lower())
+    return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+@lru_cache(maxsize=2**16)
+def _term_digest(term):
+    """32-byte digest: the first 8 bytes are the term's hash, all 256 bits its hyperplane signs"""
+    return hashlib.blake2b(term.encode('utf-8'), digest_size=SIGNATURE_BITS // 8).digest()
+
+
+def term_hash(term):
+    """Signed 64-bit hash of a term (its document-frequency key)"""
+    return int.from_bytes(_term_digest(term)[:8], 'little', signed=True)
+
+
+def text_fingerprint(text):
+    """Signed 64-bit hash of an entry's text, to find its journal row again"""
+    digest = hashlib.blake2b(str(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def idf(df, n_docs):
+    """Smoothed inverse document frequency"""
+    return math.log((1 + n_docs) / (1 + df)) + 1.0
+
+
+def signatures(term_counts, weights):
+    """
+    Per-text term Counters -> (texts x SIGNATURE_BITS/8) uint8 signatures.
+
+    weights maps a term to its IDF. Texts without any term get an all-zero
+    signature; callers skip them.
+    """
+    lengths = np.fromiter((len(counts) for counts in term_counts), dtype=np.int64, count=len(term_counts))
+    out = np.zeros((len(term_counts), SIGNATURE_BITS // 8), dtype=np.uint8)
+    if not lengths.sum():
+        return out
+    flat = [term for counts in term_counts for term in counts]
+    tf = np.fromiter((c for counts in term_counts for c in counts.values()), dtype=np.float64, count=len(flat))
+    w = (1.0 + np.log(tf)) * np.fromiter((weights[t] for t in flat), dtype=np.float64, count=len(flat))
+    # One +-1 row per (text, term): the term's side of every hyperplane
+    bits = np.unpackbits(np.frombuffer(b"".join(_term_digest(t) for t in flat), dtype=np.uint8).reshape(len(flat), -1), axis=1)
+    projected = bits.astype(np.float64) * 2.0 - 1.0
+    projected *= w[:, None]
+    # Sum each text's rows: reduceat over the start offsets of non-empty texts
+    nonempty = lengths > 0
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))[nonempty]
+    sums = np.add.reduceat(projected, starts, axis=0)
+    out[nonempty] = np.packbits(sums > 0, axis=1)
+    return out
+
+
+def bucket_keys(signature):
+    """One integer bucket key per band (signature byte): band number in the high bits, byte value in the low"""
+    return [(band << BAND_BITS) | int(value) for band, value in enumerate(signature)]
+
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def hamming(signature, candidates):
+    """Bit differences between one signature and each row of candidates"""
+    return _POPCOUNT[np.bitwise_xor(candidates, signature)].sum(axis=1, dtype=np.int64)
+
+
+class SimilarityIndex:
+    """SQLite sidecar of LSH signatures for one journal"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        fingerprint INTEGER NOT NULL,
+        signature BLOB NOT NULL,
+        row INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS buckets (
+        key INTEGER NOT NULL,
+        id INTEGER NOT NULL,
+        PRIMARY KEY (key, id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS terms (
+        hash INTEGER PRIMARY KEY,
+        df INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER
+    );
+    """
+
+    def __init__(self, path, rows_source, row_numbers=False):
+        self.path = Path(path)
+        # Callable returning (timestamp, emotion, confidence, text) tuples for
+        # every journal row, used when the index has to be rebuilt
+        self._rows_source = rows_source
+        # rows_source yields the rows in file order, so a row's position is
+        # the row number its store can seek to
+        self.row_numbers = row_numbers
+        self._local = threading.local()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        # Inode of the file the index was last opened on
+        self._inode = None
+
+    @classmethod
+    def for_journal(cls, journal_path, rows_source, row_numbers=False):
+        """The index next to a journal file: <stem>.similar.db"""
+        journal_path = Path(journal_path)
+        return cls(journal_path.with_name(f"{journal_path.stem}.similar.db"), rows_source, row_numbers)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.inode != self._inode:
+            # The file was deleted or replaced since this thread opened it
+            conn.close()
+            conn = None
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.inode = self._inode
+        return conn
+
+    def _file_inode(self):
+        try:
+            return self.path.stat().st_ino
+        except FileNotFoundError:
+            return None
+
+    def ensure(self):
+        """
+        Open the index, rebuilding it from the journal if it is missing. A
+        file deleted after it was opened (journal_migrate removes it) is
+        noticed on the next call and rebuilt too.
+        """
+        if self._ready and self._file_inode() == self._inode:
+            return self._conn()
+        with self._ready_lock:
+            inode = self._file_inode()
+            if not (self._ready and inode == self._inode):
+                # Every thread's connection to the old file gets reopened
+                self._inode = inode
+                conn = self._conn()
+                conn.executescript(self.SCHEMA)
+                if inode is None:
+                    self.rebuild()
+                elif 'row' not in {row[1] for row in conn.execute("PRAGMA table_info(entries)")}:
+                    # Indexes from before row numbers: their entries resolve by timestamp
+                    with conn:
+                        conn.execute("ALTER TABLE entries ADD COLUMN row INTEGER")
+                self._inode = self._local.inode = self._file_inode()
+                self._ready = True
+        return self._conn()
+
+    def rebuild(self):
+        """Re-index every journal row; returns the indexed entry count"""
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        # Document frequencies over the whole journal first, so early entries
+        # are weighted like late ones
+        df, n_docs = Counter(), 0
+        for _, _, _, text in self._rows_source():
+            df.update(terms(text).keys())
+            n_docs += 1
+        with conn:
+            for table in ("entries", "buckets", "terms", "meta"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                "INSERT INTO terms (hash, df) VALUES (?, ?) ON CONFLICT (hash) DO UPDATE SET df = df + excluded.df",
+                ((term_hash(term), count) for term, count in df.items())
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('documents', ?)", (n_docs,))
+            weights = {term: idf(count, n_docs) for term, count in df.items()}
+            rows = iter(self._rows_source())
+            position = 0
+            while True:
+                batch = list(islice(rows, REBUILD_BATCH))
+                if not batch:
+                    break
+                numbers = range(position, position + len(batch)) if self.row_numbers else None
+                self._insert(conn, batch, [terms(text) for *_, text in batch], weights, numbers)
+                position += len(batch)
+        return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _insert(self, conn, records, term_counts, weights, rows=None):
+        keep = [i for i, counts in enumerate(term_counts) if counts]
+        if not keep:
+            return
+        records = [records[i] for i in keep]
+        term_counts = [term_counts[i] for i in keep]
+        rows = [rows[i] for i in keep] if rows is not None else [None] * len(records)
+        sigs = signatures(term_counts, weights)
+        first = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()[0]
+        ids = range(first, first + len(records))
+        conn.executemany(
+            "INSERT INTO entries (id, timestamp, fingerprint, signature, row) VALUES (?, ?, ?, ?, ?)",
+            [
+                (entry_id, ts, text_fingerprint(text), sig.tobytes(), row)
+                for entry_id, (ts, _, _, text), sig, row in zip(ids, records, sigs, rows)
+            ]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO buckets (key, id) VALUES (?, ?)",
+            [(key, entry_id) for entry_id, sig in zip(ids, sigs) for key in bucket_keys(sig)]
+        )
+
+    def _weights(self, conn, all_terms):
+        """{term: IDF} from the stored document frequencies"""
+        all_terms = list(all_terms)
+        n_docs = conn.execute("SELECT value FROM meta WHERE key = 'documents'").fetchone()
+        n_docs = n_docs[0] if n_docs else 0
+        found = {}
+        for i in range(0, len(all_terms), 500):
+            hashes = [term_hash(t) for t in all_terms[i:i + 500]]
+            found.update(conn.execute(
+                f"SELECT hash, df FROM terms WHERE hash IN ({', '.join('?' * len(hashes))})", hashes
+            ).fetchall())
+        return {t: idf(found.get(term_hash(t), 0), n_docs) for t in all_terms}
+
+    def add(self, timestamp, emotion, confidence, text, row=None):
+        """Index one newly logged entry"""
+        self.add_many([(timestamp, emotion, confidence, text)], None if row is None else [row])
+
+    def add_many(self, records, rows=None):
+        """
+        Index newly logged (timestamp, emotion, confidence, text) records;
+        rows are their journal row numbers, if the store reported them
+        """
+        records = [
+            (ts if isinstance(ts, str) else ts.strftime("%Y-%m-%d %H:%M:%S"), emotion, confidence, text)
+            for ts, emotion, confidence, text in records
+        ]
+        term_counts = [terms(text) for *_, text in records]
+        new_df = Counter()
+        for counts in term_counts:
+            new_df.update(counts.keys())
+        with self.ensure() as conn:
+            conn.executemany(
+                "INSERT INTO terms (hash, df) VALUES (?, ?) ON CONFLICT (hash) DO UPDATE SET df = df + excluded.df",
+                [(term_hash(term), count) for term, count in new_df.items()]
+            )
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('documents', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+                (len(records),)
+            )
+            self._insert(conn, records, term_counts, self._weights(conn, new_df), rows)
+
+    @traced("similar_entries")
+    def similar(self, text, k=5, min_similarity=MIN_SIMILARITY):
+        """
+        Up to k earlier entries most like text, best first, as
+        (timestamp, text fingerprint, similarity, journal row number or
+        None) rows. similarity is the
+        estimated cosine of the two TF-IDF vectors; rows below
+        min_similarity are left out.
+        """
+        counts = terms(text)
+        if not counts:
+            return []
+        conn = self.ensure()
+        signature = signatures([counts], self._weights(conn, counts))[0]
+
+        # Entries sharing more buckets are likelier to be close; only the
+        # CANDIDATES sharing the most get their signatures compared
+        hits = Counter()
+        for key in bucket_keys(signature):
+            hits.update(row[0] for row in conn.execute(
+                "SELECT id FROM buckets WHERE key = ? ORDER BY id DESC LIMIT ?", (key, BUCKET_LIMIT)
+            ))
+        if not hits:
+            return []
+        candidates = sorted(hits, key=lambda entry_id: (hits[entry_id], entry_id), reverse=True)[:CANDIDATES]
+        stored = []
+        for i in range(0, len(candidates), 500):
+            chunk = candidates[i:i + 500]
+            stored.extend(conn.execute(
+                f"SELECT id, timestamp, fingerprint, signature, row FROM entries WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        ids = np.array([row[0] for row in stored], dtype=np.int64)
+        sigs = np.frombuffer(b"".join(row[3] for row in stored), dtype=np.uint8).reshape(len(stored), -1)
+        scores = np.cos(np.pi * hamming(signature, sigs) / SIGNATURE_BITS)
+
+        # Best first; among equals, the newer entry
+        order = np.lexsort((-ids, -scores))
+        order = order[scores[order] >= min_similarity][:k]
+        return [(stored[i][1], stored[i][2], float(scores[i]), stored[i][4]) for i in order]
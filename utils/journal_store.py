@@ -0,0 +1,749 @@
+"""
+Storage backends for the emotion journal
+
+Both backends expose the same small interface used by EmotionLogger and the
+app pages: append(), emotion_counts(), mean_confidence(), entries(),
+entries_at(), latest(), page(), search(), similar(), daily_rollups(),
+rebuild_rollups() and version(). Timestamps are stored as
+"YYYY-MM-DD HH:MM:SS" strings, which sort the same way as the datetimes they
+represent.
+
+Every append also updates per-(period, emotion) rollups holding count,
+confidence sum and confidence sum of squares, per hour, day, week and month
+(see journal_rollups), so daily metrics read O(days) rows instead of
+O(entries). daily_rollups() serves the day rows, rollups(resolution, ...)
+any resolution.
+"""
+import argparse
+import csv
+import io
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .file_lock import file_lock
+from .journal_repository import (
+    JOURNAL_COLUMNS, LEGACY_COLUMNS, TIMESTAMP_FORMAT,
+    emotion_categorical, empty_journal_frame, get_journal_repository, type_journal_frame
+)
+from .journal_probs import PROB_DTYPE, ProbabilityLog, empty_probabilities, probability_vector
+from .journal_rollups import PERIOD_COLUMNS, RollupLog, period_bounds, period_frame, period_key
+from .journal_search import CsvSearchIndex, fts_query
+from .journal_similar import SimilarityIndex, text_fingerprint
+from .journal_tail import JournalTailIndex
+from .labels import LABELS, canonical
+
+CSV_PATH = Path("data/emotion_journal.csv")
+SQLITE_PATH = Path("data/emotion_journal.db")
+ROLLUP_COLUMNS = ['day', 'emotion', 'count', 'confidence_sum', 'confidence_sq_sum']
+
+
+def _format_ts(value):
+    """Datetime (or already formatted string) -> stored timestamp string"""
+    if isinstance(value, str):
+        return value
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def _format_day(value):
+    """Date/datetime (or "YYYY-MM-DD" string) -> stored day string"""
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def similar_frame(store, rows):
+    """
+    SimilarityIndex.similar() (timestamp, fingerprint, similarity, row) rows
+    -> the store's matching entries plus a similarity column, best first.
+    Rows no longer in the journal (migrated away) are dropped.
+    """
+    if not rows:
+        return empty_journal_frame().assign(similarity=pd.Series(dtype='float32'))
+    candidates = store.entries_at([ts for ts, *_ in rows], [row for *_, row in rows])
+
+    def positions(frame, offset=0):
+        keys = zip(frame['timestamp'].dt.strftime(TIMESTAMP_FORMAT), frame['text'].fillna('').map(text_fingerprint))
+        return {key: offset + i for i, key in reversed(list(enumerate(keys)))}
+
+    position = positions(candidates)
+    stale = [ts for ts, fp, _, row in rows if row is not None and (ts, fp) not in position]
+    if stale:
+        # Row numbers from before the journal was rewritten outside the
+        # store: find those few entries by timestamp instead
+        by_timestamp = store.entries_at(stale)
+        position = {**positions(by_timestamp, len(candidates)), **position}
+        candidates = pd.concat([candidates, by_timestamp], ignore_index=True)
+    found = [(position[(ts, fp)], similarity) for ts, fp, similarity, _ in rows if (ts, fp) in position]
+    frame = candidates.iloc[[i for i, _ in found]].reset_index(drop=True)
+    frame['similarity'] = np.array([similarity for _, similarity in found], dtype='float32')
+    return frame
+
+
+class CsvJournalStore:
+    """Append-only CSV journal; queries filter the shared parsed frame"""
+
+    def __init__(self, path=CSV_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Advisory lock shared by every process appending to this journal
+        self.lock_path = self.path.with_suffix('.lock')
+        self.repository = get_journal_repository(self.path)
+        self.tail = JournalTailIndex(self.path)
+        self.search_index = CsvSearchIndex(self.path, self._records)
+        # Hour/day/week/month rollups as an append-only delta sidecar
+        self.period_rollups = RollupLog(self.path)
+        # Per-entry probability vectors, float32 columns in a binary sidecar
+        self.probability_log = ProbabilityLog(self.path)
+        # LSH signatures for similar(); EmotionLogger adds each check-in
+        # with the row number append_many() reports
+        self.similar_index = SimilarityIndex.for_journal(self.path, self._records, row_numbers=True)
+
+    def for_user(self, user_id):
+        """Single shared journal: every user reads and writes this one"""
+        return self
+
+    def version(self):
+        """Token that changes whenever entries or rollups change (for caches)"""
+        versions = [str(self.path)]
+        for path in (self.path, self.period_rollups.path):
+            try:
+                stat = path.stat()
+                versions.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                versions.append(None)
+        return tuple(versions)
+
+    def append(self, timestamp, emotion, confidence, text, probs=None):
+        """Append one entry and bump its rollups; returns append_many()'s row numbers"""
+        return self.append_many([(timestamp, emotion, confidence, text)], [probs])
+
+    def append_many(self, records, probs=None):
+        """
+        Append (timestamp, emotion, confidence, text) records with a single
+        write and fsync, holding the journal's inter-process lock so
+        concurrent writers can never interleave partial rows.
+
+        probs, if given, holds each record's {label: probability} dict (or
+        None), stored in the probability sidecar. Returns the journal row
+        numbers the records were written at.
+        """
+        # Canonical labels, as a rollup rebuilt from the parsed journal has them
+        records = [
+            (_format_ts(timestamp), canonical(emotion), round(float(confidence), 4), text)
+            for timestamp, emotion, confidence, text in records
+        ]
+        if not records:
+            return []
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+
+        # A missing search index is rebuilt from the journal, so do that
+        # before these rows land in it or they would be indexed twice
+        self.search_index.ensure()
+
+        with file_lock(self.lock_path):
+            # Same for the rollups, which are rebuilt from the journal
+            if not self.period_rollups.exists():
+                self.period_rollups.rebuild(self._records())
+            # Rows already in the file; only the last append is scanned
+            first_row = self.tail.refresh()
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                writer.writerow(JOURNAL_COLUMNS)
+            for timestamp, emotion, confidence, text in records:
+                writer.writerow([timestamp, emotion, f"{confidence:.4f}", text])
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                f.write(buffer.getvalue())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.period_rollups.append(records)
+            if probs is not None:
+                self.probability_log.append([record[0] for record in records], probs)
+
+        self.search_index.add_many(records)
+        return list(range(first_row, first_row + len(records)))
+
+    def _load(self):
+        # Shared, read-only frame: filter or copy it, never assign into it
+        return self.repository.frame()
+
+    def _records(self):
+        """Every entry as a (timestamp string, emotion, confidence, text) tuple"""
+        df = self._load()
+        return zip(
+            df['timestamp'].dt.strftime(TIMESTAMP_FORMAT),
+            df['emotion'].astype(str),
+            df['confidence'].astype(float),
+            df['text'].fillna('').astype(str)
+        )
+
+    def search(self, query, emotion=None, start=None, end=None, limit=50):
+        """Entries whose text matches query (words/prefixes), newest first"""
+        rows = self.search_index.search(
+            query, emotion,
+            _format_ts(start) if start is not None else None,
+            _format_ts(end) if end is not None else None,
+            limit
+        )
+        if not rows:
+            return empty_journal_frame()
+        return type_journal_frame(pd.DataFrame(rows, columns=JOURNAL_COLUMNS))
+
+    def similar(self, text, k=5):
+        """Up to k entries most like text, best first, with a similarity column"""
+        return similar_frame(self, self.similar_index.similar(text, k))
+
+    def _period_totals(self):
+        """The period rollups' totals, built from the journal if the sidecar is missing"""
+        if not self.period_rollups.exists():
+            with file_lock(self.lock_path):
+                if not self.period_rollups.exists():
+                    self.period_rollups.rebuild(self._records())
+        return self.period_rollups.totals()
+
+    def daily_rollups(self, start=None, end=None):
+        """Rollup rows with start <= day < end (the period rollups' day rows)"""
+        lo = _format_day(start) if start is not None else None
+        hi = _format_day(end) if end is not None else None
+        rows = sorted(
+            (day, emotion, *stats)
+            for (resolution, day, emotion), stats in self._period_totals().items()
+            if resolution == 'day' and (lo is None or day >= lo) and (hi is None or day < hi)
+        )
+        return pd.DataFrame(rows, columns=ROLLUP_COLUMNS)
+
+    def rollups(self, resolution='day', start=None, end=None):
+        """PERIOD_COLUMNS rows for the periods overlapping [start, end), oldest first"""
+        return period_frame(self._period_totals(), resolution, start, end)
+
+    def rebuild_rollups(self):
+        """Regenerate every rollup from raw history; returns the daily row count"""
+        with file_lock(self.lock_path):
+            self.period_rollups.rebuild(self._records())
+        return sum(1 for resolution, _, _ in self.period_rollups.totals() if resolution == 'day')
+
+    def probabilities(self, start=None, end=None):
+        """PROB_DTYPE records of entries logged with probabilities, start <= timestamp < end"""
+        return self.probability_log.read(
+            _format_ts(start) if start is not None else None,
+            _format_ts(end) if end is not None else None
+        )
+
+    def entries(self, start=None, end=None):
+        """Entries with start <= timestamp < end, oldest first"""
+        df = self._load()
+        if start is not None:
+            df = df[df['timestamp'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['timestamp'] < pd.Timestamp(end)]
+        return df.sort_values('timestamp').reset_index(drop=True)
+
+    def entries_at(self, timestamps, rows=None):
+        """
+        Entries logged at any of the given timestamps (strings), in journal
+        order. Entries whose row number is known (`rows`, aligned with
+        timestamps) are read with one seek each through the offset index;
+        only the others filter the parsed journal.
+        """
+        timestamps = list(timestamps)
+        rows = list(rows) if rows is not None else [None] * len(timestamps)
+        frames = []
+        header, found = self.tail.rows_at(row for row in rows if row is not None)
+        if found:
+            raw = pd.DataFrame([fields[:len(header)] for _, fields in found], columns=header)
+            frames.append(type_journal_frame(raw))
+        unnumbered = [ts for ts, row in zip(timestamps, rows) if row is None]
+        if unnumbered:
+            df = self._load()
+            wanted = pd.to_datetime(pd.Series(unnumbered, dtype=object), format=TIMESTAMP_FORMAT)
+            frames.append(df[df['timestamp'].isin(wanted)])
+        if not frames:
+            return empty_journal_frame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+
+    def latest(self, n=20):
+        """The n most recent entries, newest first"""
+        return self.page(n)[0]
+
+    def page(self, n=20, before=None):
+        """
+        n entries older than cursor `before` (newest first when None), as
+        (frame, cursor for the next older page or None). Reads only those
+        rows via the sidecar offset index.
+        """
+        header, rows, cursor = self.tail.page(n, before)
+        if not rows:
+            return empty_journal_frame(), None
+        raw = pd.DataFrame([row[:len(header)] for row in rows], columns=header)
+        frame = type_journal_frame(raw).iloc[::-1].reset_index(drop=True)
+        return frame, cursor
+
+    def emotion_counts(self, start=None, end=None):
+        """{emotion: count} for the range, most frequent first"""
+        counts = self.entries(start, end)['emotion'].value_counts()
+        return {emotion: int(n) for emotion, n in counts.items() if n}
+
+    def mean_confidence(self, start=None, end=None):
+        """Average confidence over the range (None when empty)"""
+        df = self.entries(start, end)
+        return float(df['confidence'].mean()) if not df.empty else None
+
+
+class SqliteJournalStore:
+    """SQLite journal in WAL mode with timestamp and emotion indexes"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        emotion TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        text TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_entries_emotion ON entries(emotion, timestamp);
+    CREATE TABLE IF NOT EXISTS daily_rollup (
+        day TEXT NOT NULL,
+        emotion TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        confidence_sum REAL NOT NULL,
+        confidence_sq_sum REAL NOT NULL,
+        PRIMARY KEY (day, emotion)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS period_rollup (
+        resolution TEXT NOT NULL,
+        period TEXT NOT NULL,
+        emotion TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        confidence_sum REAL NOT NULL,
+        confidence_sq_sum REAL NOT NULL,
+        PRIMARY KEY (resolution, period, emotion)
+    ) WITHOUT ROWID;
+    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+        text, content = 'entries', content_rowid = 'id', prefix = '2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+        INSERT INTO entries_fts (rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+        INSERT INTO entries_fts (entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    # SQL for journal_rollups.period_key; days live in daily_rollup
+    PERIOD_EXPRESSIONS = {
+        'hour': "substr(timestamp, 1, 13)",
+        'week': "date(timestamp, 'weekday 0', '-6 days')",
+        'month': "substr(timestamp, 1, 7)",
+    }
+
+    # One REAL column per canonical label for the entry's probability
+    # (NULL for entries logged without probabilities), in LABELS order
+    PROB_COLUMNS = tuple(f"prob_{label}" for label in LABELS)
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit serves sessions on separate threads; sqlite3 connections
+        # must not cross threads, so each thread gets its own
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        had_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'"
+        ).fetchone()
+        conn.executescript(self.SCHEMA)
+        self._add_probability_columns(conn)
+        if not had_fts:
+            # Full-text index added to an existing database: index old rows once
+            with conn:
+                conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+
+        # Databases created before the rollup existed get it built once
+        has_entries = conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone()
+        has_rollup = conn.execute("SELECT 1 FROM daily_rollup LIMIT 1").fetchone()
+        has_periods = conn.execute("SELECT 1 FROM period_rollup LIMIT 1").fetchone()
+        if has_entries and not (has_rollup and has_periods):
+            self.rebuild_rollups()
+        # LSH signatures for similar() in a sidecar database next to this one
+        self.similar_index = SimilarityIndex.for_journal(self.path, self._records)
+
+    def _add_probability_columns(self, conn):
+        """Add missing label columns, moving vectors out of an old probs BLOB column once"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+        with conn:
+            for column in self.PROB_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {column} REAL")
+            if 'probs' in columns:
+                rows = conn.execute("SELECT id, probs FROM entries WHERE probs IS NOT NULL").fetchall()
+                if rows:
+                    vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype='<f4')
+                    vectors = vectors.reshape(len(rows), -1).astype(float)
+                    assignments = ", ".join(f"{column} = ?" for column in self.PROB_COLUMNS[:vectors.shape[1]])
+                    conn.executemany(
+                        f"UPDATE entries SET {assignments} WHERE id = ?",
+                        [(*vector, row_id) for vector, (row_id, _) in zip(vectors.tolist(), rows)]
+                    )
+                conn.execute("ALTER TABLE entries DROP COLUMN probs")
+
+    def for_user(self, user_id):
+        """Single shared journal: every user reads and writes this one"""
+        return self
+
+    def version(self):
+        """Token that changes whenever entries are appended (for caches)"""
+        max_id = self._conn().execute("SELECT MAX(id) FROM entries").fetchone()[0]
+        return (str(self.path), max_id)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # WAL + NORMAL only fsyncs at checkpoints, readers never block writers
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _range(start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_format_ts(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_format_ts(end))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _records(self):
+        """Every entry as a (timestamp string, emotion, confidence, text) tuple"""
+        return self._conn().execute(
+            "SELECT timestamp, emotion, confidence, COALESCE(text, '') FROM entries ORDER BY id"
+        )
+
+    def _frame(self, sql, params):
+        df = pd.read_sql_query(sql, self._conn(), params=params)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format=TIMESTAMP_FORMAT)
+        # Same dtypes as the CSV JournalRepository frame
+        df['emotion'] = emotion_categorical(df['emotion'])
+        df['confidence'] = df['confidence'].astype('float32')
+        return df
+
+    def append(self, timestamp, emotion, confidence, text, probs=None):
+        """Append one entry and bump its daily rollup in the same transaction"""
+        self.append_many([(timestamp, emotion, confidence, text)], [probs])
+
+    def append_many(self, records, probs=None):
+        """
+        Append (timestamp, emotion, confidence, text) records in one
+        transaction; probs as for CsvJournalStore.append_many
+        """
+        records = [
+            (_format_ts(timestamp), canonical(emotion), float(confidence), text)
+            for timestamp, emotion, confidence, text in records
+        ]
+        no_probs = (None,) * len(LABELS)
+        vectors = [
+            tuple(probability_vector(p).tolist()) if p is not None else no_probs
+            for p in (probs if probs is not None else [None] * len(records))
+        ]
+        with self._conn() as conn:
+            conn.executemany(
+                f"INSERT INTO entries (timestamp, emotion, confidence, text, {', '.join(self.PROB_COLUMNS)}) "
+                f"VALUES (?, ?, ?, ?{', ?' * len(LABELS)})",
+                [(*record, *vector) for record, vector in zip(records, vectors)]
+            )
+            conn.executemany(
+                """
+                INSERT INTO daily_rollup (day, emotion, count, confidence_sum, confidence_sq_sum)
+                VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (day, emotion) DO UPDATE SET
+                    count = count + 1,
+                    confidence_sum = confidence_sum + excluded.confidence_sum,
+                    confidence_sq_sum = confidence_sq_sum + excluded.confidence_sq_sum
+                """,
+                [
+                    (_format_day(timestamp), emotion, confidence, confidence * confidence)
+                    for timestamp, emotion, confidence, _ in records
+                ]
+            )
+            conn.executemany(
+                """
+                INSERT INTO period_rollup
+                    (resolution, period, emotion, count, confidence_sum, confidence_sq_sum)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (resolution, period, emotion) DO UPDATE SET
+                    count = count + 1,
+                    confidence_sum = confidence_sum + excluded.confidence_sum,
+                    confidence_sq_sum = confidence_sq_sum + excluded.confidence_sq_sum
+                """,
+                [
+                    (resolution, period_key(timestamp, resolution), emotion, confidence, confidence * confidence)
+                    for timestamp, emotion, confidence, _ in records
+                    for resolution in self.PERIOD_EXPRESSIONS
+                ]
+            )
+
+    def search(self, query, emotion=None, start=None, end=None, limit=50):
+        """Entries whose text matches query (words/prefixes), newest first"""
+        match = fts_query(query)
+        if match is None:
+            return empty_journal_frame()
+        sql = (
+            "SELECT e.timestamp, e.emotion, e.confidence, e.text "
+            "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+            "WHERE entries_fts MATCH ?"
+        )
+        params = [match]
+        if emotion is not None:
+            sql += " AND e.emotion = ?"
+            params.append(emotion)
+        if start is not None:
+            sql += " AND e.timestamp >= ?"
+            params.append(_format_ts(start))
+        if end is not None:
+            sql += " AND e.timestamp < ?"
+            params.append(_format_ts(end))
+        sql += " ORDER BY entries_fts.rowid DESC LIMIT ?"
+        params.append(int(limit))
+        return self._frame(sql, params)
+
+    def similar(self, text, k=5):
+        """Up to k entries most like text, best first, with a similarity column"""
+        return similar_frame(self, self.similar_index.similar(text, k))
+
+    def daily_rollups(self, start=None, end=None):
+        """Rollup rows with start <= day < end"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(_format_day(start))
+        if end is not None:
+            clauses.append("day < ?")
+            params.append(_format_day(end))
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return pd.read_sql_query(
+            f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM daily_rollup{where} ORDER BY day, emotion",
+            self._conn(), params=params
+        )
+
+    def rollups(self, resolution='day', start=None, end=None):
+        """PERIOD_COLUMNS rows for the periods overlapping [start, end), oldest first"""
+        first, last = period_bounds(start, end, resolution)
+        if resolution == 'day':
+            sql = "SELECT day AS period, emotion, count, confidence_sum, confidence_sq_sum FROM daily_rollup"
+            clauses, params, column = [], [], "day"
+        else:
+            sql = f"SELECT {', '.join(PERIOD_COLUMNS)} FROM period_rollup"
+            clauses, params, column = ["resolution = ?"], [resolution], "period"
+        if first is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(first)
+        if last is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(last)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return pd.read_sql_query(f"{sql}{where} ORDER BY {column}, emotion", self._conn(), params=params)
+
+    def rebuild_rollups(self):
+        """Regenerate every rollup from raw history; returns the daily row count"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM daily_rollup")
+            conn.execute(
+                """
+                INSERT INTO daily_rollup (day, emotion, count, confidence_sum, confidence_sq_sum)
+                SELECT substr(timestamp, 1, 10), emotion, COUNT(*),
+                       SUM(confidence), SUM(confidence * confidence)
+                FROM entries GROUP BY substr(timestamp, 1, 10), emotion
+                """
+            )
+            conn.execute("DELETE FROM period_rollup")
+            for resolution, expression in self.PERIOD_EXPRESSIONS.items():
+                conn.execute(
+                    f"""
+                    INSERT INTO period_rollup
+                        (resolution, period, emotion, count, confidence_sum, confidence_sq_sum)
+                    SELECT ?, {expression}, emotion, COUNT(*),
+                           SUM(confidence), SUM(confidence * confidence)
+                    FROM entries GROUP BY {expression}, emotion
+                    """,
+                    (resolution,)
+                )
+            return conn.execute("SELECT COUNT(*) FROM daily_rollup").fetchone()[0]
+
+    def probabilities(self, start=None, end=None):
+        """PROB_DTYPE records of entries logged with probabilities, start <= timestamp < end"""
+        where, params = self._range(start, end)
+        has_probs = f"{self.PROB_COLUMNS[0]} IS NOT NULL"
+        where = f"{where} AND {has_probs}" if where else f" WHERE {has_probs}"
+        # Epoch seconds and the label columns come back as plain numbers, so
+        # NumPy converts the whole result at once
+        rows = self._conn().execute(
+            f"SELECT CAST(strftime('%s', timestamp) AS INTEGER), "
+            f"{', '.join(f'COALESCE({column}, 0)' for column in self.PROB_COLUMNS)} "
+            f"FROM entries{where} ORDER BY timestamp", params
+        ).fetchall()
+        if not rows:
+            return empty_probabilities()
+        values = np.array(rows, dtype=np.float64)
+        out = np.empty(len(rows), dtype=PROB_DTYPE)
+        out['timestamp'] = values[:, 0].astype(np.int64).astype('M8[s]')
+        out['probs'] = values[:, 1:]
+        return out
+
+    def entries(self, start=None, end=None):
+        """Entries with start <= timestamp < end, oldest first"""
+        where, params = self._range(start, end)
+        return self._frame(
+            f"SELECT timestamp, emotion, confidence, text FROM entries{where} ORDER BY timestamp",
+            params
+        )
+
+    def entries_at(self, timestamps, rows=None):
+        """Entries logged at any of the given timestamps (strings), in insertion order; rows are not used"""
+        timestamps = sorted(set(timestamps))
+        if not timestamps:
+            return empty_journal_frame()
+        return self._frame(
+            f"SELECT timestamp, emotion, confidence, text FROM entries "
+            f"WHERE timestamp IN ({', '.join('?' * len(timestamps))}) ORDER BY id",
+            timestamps
+        )
+
+    def latest(self, n=20):
+        """The n most recent entries, newest first"""
+        return self.page(n)[0]
+
+    def page(self, n=20, before=None):
+        """
+        n entries older than cursor `before` (newest first when None), as
+        (frame, cursor for the next older page or None). Keyset pagination
+        on (timestamp, id), so every page is one index range scan.
+        """
+        where, params = "", []
+        if before is not None:
+            where = " WHERE (timestamp, id) < (?, ?)"
+            params = list(before)
+        rows = self._conn().execute(
+            f"SELECT id, timestamp, emotion, confidence, text FROM entries{where} "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            params + [int(n)]
+        ).fetchall()
+        if not rows:
+            return empty_journal_frame(), None
+        frame = pd.DataFrame([row[1:] for row in rows], columns=JOURNAL_COLUMNS)
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], format=TIMESTAMP_FORMAT)
+        frame['emotion'] = emotion_categorical(frame['emotion'])
+        frame['confidence'] = frame['confidence'].astype('float32')
+        cursor = (rows[-1][1], rows[-1][0]) if len(rows) == n else None
+        return frame, cursor
+
+    def emotion_counts(self, start=None, end=None):
+        """{emotion: count} for the range, most frequent first"""
+        where, params = self._range(start, end)
+        rows = self._conn().execute(
+            f"SELECT emotion, COUNT(*) AS n FROM entries{where} GROUP BY emotion ORDER BY n DESC",
+            params
+        ).fetchall()
+        return dict(rows)
+
+    def mean_confidence(self, start=None, end=None):
+        """Average confidence over the range (None when empty)"""
+        where, params = self._range(start, end)
+        return self._conn().execute(f"SELECT AVG(confidence) FROM entries{where}", params).fetchone()[0]
+
+    def import_csv(self, csv_path=CSV_PATH, chunksize=50_000, force=False):
+        """
+        One-shot import of an existing CSV journal.
+
+        Returns the number of rows imported (0 if this file was already
+        imported, unless force=True).
+        """
+        csv_path = Path(csv_path)
+        marker = f"imported:{csv_path.resolve()}"
+        conn = self._conn()
+        if not force and conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+            return 0
+
+        total = 0
+        with conn:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, on_bad_lines='skip'):
+                chunk = chunk.rename(columns=LEGACY_COLUMNS)
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], errors='coerce')
+                chunk = chunk.dropna(subset=['timestamp', 'emotion'])
+                conn.executemany(
+                    "INSERT INTO entries (timestamp, emotion, confidence, text) VALUES (?, ?, ?, ?)",
+                    zip(
+                        chunk['timestamp'].dt.strftime(TIMESTAMP_FORMAT),
+                        chunk['emotion'].astype(str).map(canonical),
+                        pd.to_numeric(chunk['confidence'], errors='coerce').fillna(0.0),
+                        chunk['text'].fillna('').astype(str)
+                    )
+                )
+                total += len(chunk)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (marker, datetime.now().strftime(TIMESTAMP_FORMAT))
+            )
+        self.rebuild_rollups()
+        return total
+
+
+def open_journal_store(backend=None):
+    """
+    Build the configured store: "csv", "sqlite" or "partitioned" (per-user
+    monthly CSV partitions), from env EMOTION_JOURNAL_BACKEND by default.
+    """
+    backend = (backend or os.environ.get("EMOTION_JOURNAL_BACKEND", "csv")).lower()
+    if backend == "sqlite":
+        return SqliteJournalStore()
+    if backend == "partitioned":
+        from .journal_partitions import get_partitioned_store
+        return get_partitioned_store()
+    if backend == "csv":
+        return CsvJournalStore()
+    raise ValueError(f"Unknown journal backend: {backend!r}")
+
+
+def summarize_rollups(rollups):
+    """Per-emotion counts (most frequent first) and overall mean confidence"""
+    if rollups.empty:
+        return {}, None
+    # Rollups written before labels were canonical may still hold aliases
+    counts = rollups.groupby(rollups['emotion'].map(canonical))['count'].sum().sort_values(ascending=False)
+    mean = rollups['confidence_sum'].sum() / rollups['count'].sum()
+    return {emotion: int(n) for emotion, n in counts.items()}, float(mean)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Journal storage maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="import the CSV journal into SQLite")
+    import_cmd.add_argument("csv", nargs="?", default=str(CSV_PATH))
+    import_cmd.add_argument("--db", default=str(SQLITE_PATH))
+    import_cmd.add_argument("--force", action="store_true", help="import again even if already imported")
+
+    rebuild_cmd = commands.add_parser("rebuild-rollups", help="regenerate daily rollups from raw history")
+    rebuild_cmd.add_argument("--backend", choices=["csv", "sqlite", "partitioned"], default=None)
+
+    args = parser.parse_args()
+    if args.command == "import":
+        rows = SqliteJournalStore(args.db).import_csv(args.csv, force=args.force)
+        print(f"✅ Imported {rows} rows into {args.db}" if rows else "ℹ️ Nothing imported (already done?)")
+    else:
+        rows = open_journal_store(args.backend).rebuild_rollups()
+        print(f"✅ Rebuilt {rows} daily rollup rows")
@@ -0,0 +1,168 @@
+"""
+Constant-time "latest N entries" reads for the append-only CSV journal
+
+A sidecar file next to the journal stores the byte offset where each complete
+row ends, as little-endian uint64s. Entry 0 is the end of the header, entry k
+the end of data row k, so data row k occupies bytes [E[k-1], E[k]). Reading a
+page of rows needs two index lookups and one contiguous read, no matter how
+long the journal is.
+
+The index is caught up lazily: refresh() scans only the bytes appended since
+the last indexed row. Quoted fields may contain newlines, so row boundaries
+are found by tracking quote parity rather than by splitting on newlines.
+
+A second sidecar, <stem>.offsets.json, records the inode and a hash of the
+head and of the bytes before the indexed end. If the journal no longer
+matches it, the journal was rewritten rather than appended to and the index
+is rebuilt.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+
+ENTRY = struct.Struct('<Q')
+
+# Bytes hashed at the start of the journal and before the indexed end
+FINGERPRINT_BYTES = 4096
+
+
+def _scan_row_ends(f, start):
+    """Offsets just past every complete row from start to EOF"""
+    ends = []
+    in_quotes = False
+    pos = start
+    f.seek(start)
+    for line in f:
+        pos += len(line)
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        # A final line without its newline is a row still being written
+        if not in_quotes and line.endswith(b"\n"):
+            ends.append(pos)
+    return ends
+
+
+def _fingerprint(f, end):
+    """Hash of the first and the last FINGERPRINT_BYTES before end"""
+    f.seek(0)
+    digest = hashlib.blake2b(f.read(min(end, FINGERPRINT_BYTES)), digest_size=16)
+    tail = max(end - FINGERPRINT_BYTES, 0)
+    f.seek(tail)
+    digest.update(f.read(end - tail))
+    return digest.hexdigest()
+
+
+class JournalTailIndex:
+    """Sidecar row-offset index over a CSV journal"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(f"{self.path.stem}.offsets")
+        self.check_path = self.path.with_name(f"{self.path.stem}.offsets.json")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry(idx, i):
+        idx.seek(i * ENTRY.size)
+        return ENTRY.unpack(idx.read(ENTRY.size))[0]
+
+    def _matches(self, f, stat, start):
+        """True if the indexed bytes up to start are still the journal's"""
+        try:
+            check = json.loads(self.check_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return False
+        if check['inode'] != stat.st_ino or not check['end'] <= start <= stat.st_size:
+            return False
+        f.seek(max(start - 1, 0))
+        return f.read(1) == b"\n" and _fingerprint(f, check['end']) == check['fingerprint']
+
+    def _write_check(self, f, stat, end):
+        tmp = self.check_path.with_name(f"{self.check_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({'inode': stat.st_ino, 'end': end, 'fingerprint': _fingerprint(f, end)}))
+        os.replace(tmp, self.check_path)
+
+    def refresh(self):
+        """Index rows appended since the last call; returns the data row count"""
+        if not self.path.exists():
+            return 0
+        with self._lock, open(self.index_path, 'a+b') as idx, open(self.path, 'rb') as f:
+            count = idx.seek(0, os.SEEK_END) // ENTRY.size
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            start = 0
+            if count:
+                start = self._entry(idx, count - 1)
+                if not self._matches(f, stat, start):
+                    # Journal was rewritten underneath us (repair, restore...)
+                    idx.truncate(0)
+                    count, start = 0, 0
+            if start < size:
+                ends = _scan_row_ends(f, start)
+                # Another process may have indexed the same rows meanwhile
+                total = idx.seek(0, os.SEEK_END) // ENTRY.size
+                if total > count:
+                    last = self._entry(idx, total - 1)
+                    ends = [end for end in ends if end > last]
+                    count = total
+                idx.seek(0, os.SEEK_END)
+                idx.write(b"".join(ENTRY.pack(end) for end in ends))
+                count += len(ends)
+                if count:
+                    idx.flush()
+                    self._write_check(f, stat, self._entry(idx, count - 1))
+            return max(count - 1, 0)
+
+    def byte_range(self, start_row, end_row):
+        """(start, end) byte offsets of data rows [start_row, end_row), after refresh()"""
+        with open(self.index_path, 'rb') as idx:
+            return self._entry(idx, start_row), self._entry(idx, end_row)
+
+    def rows_at(self, row_numbers):
+        """
+        Data rows by row number, each read with one seek, as (header,
+        [(row number, fields)]) in journal order. Numbers past the end are
+        skipped.
+        """
+        total = self.refresh()
+        wanted = sorted({int(r) for r in row_numbers if 0 <= int(r) < total})
+        if not wanted:
+            return [], []
+        found = []
+        with open(self.index_path, 'rb') as idx, open(self.path, 'rb') as f:
+            header_end = self._entry(idx, 0)
+            header = next(csv.reader([f.read(header_end).decode('utf-8').strip()]))
+            for row in wanted:
+                start, end = self._entry(idx, row), self._entry(idx, row + 1)
+                f.seek(start)
+                block = f.read(end - start).decode('utf-8', errors='replace')
+                found.append((row, next(csv.reader(io.StringIO(block, newline='')), [])))
+        return header, found
+
+    def page(self, n=20, before=None):
+        """
+        Up to n data rows ending just before row index `before` (default: the
+        newest row), oldest first, as (header, rows, cursor). cursor is the
+        `before` value for the next older page, or None at the beginning.
+        """
+        total = self.refresh()
+        end_row = total if before is None else min(int(before), total)
+        start_row = max(end_row - n, 0)
+        if end_row <= 0:
+            return [], [], None
+
+        with open(self.index_path, 'rb') as idx, open(self.path, 'rb') as f:
+            header_end = self._entry(idx, 0)
+            start = self._entry(idx, start_row)
+            end = self._entry(idx, end_row)
+            header = next(csv.reader([f.read(header_end).decode('utf-8').strip()]))
+            f.seek(start)
+            block = f.read(end - start).decode('utf-8', errors='replace')
+
+        rows = list(csv.reader(io.StringIO(block, newline='')))
+        return header, rows, (start_row if start_row > 0 else None)
@@ -0,0 +1,87 @@
+"""
+Canonical emotion labels: every spelling and alias resolves to one small
+integer ID, and content tables are tuples indexed by ID
+"""
+import logging
+from numbers import Integral
+
+log = logging.getLogger(__name__)
+
+# The ID is the index; journal frames use this order for their category codes
+LABELS = ('neutral', 'happy', 'sad', 'anxious', 'angry', 'love', 'surprise')
+NEUTRAL, HAPPY, SAD, ANXIOUS, ANGRY, LOVE, SURPRISE = range(len(LABELS))
+
+ALIASES = {
+    'joy': HAPPY,
+    'happiness': HAPPY,
+    'sadness': SAD,
+    'fear': ANXIOUS,
+    'anxiety': ANXIOUS,
+    'worry': ANXIOUS,
+    'anger': ANGRY,
+    'calm': NEUTRAL,
+}
+
+# Content tables only need entries for the core labels; these borrow theirs
+CONTENT_FALLBACK = {LOVE: HAPPY, SURPRISE: NEUTRAL}
+
+# Emotions the Home page offers a breathing exercise for
+DISTRESS = frozenset({SAD, ANXIOUS, ANGRY})
+
+_ids = {name: i for i, name in enumerate(LABELS)}
+_ids.update(ALIASES)
+_unknown = set()
+# Labels come from models and old journals; stop recording (and warning
+# about) new unknown spellings past this many
+MAX_UNKNOWN = 256
+
+
+def label_id(label):
+    """Label, alias or ID (any case) -> canonical ID; unknown labels are NEUTRAL"""
+    if isinstance(label, Integral):
+        return int(label) if 0 <= label < len(LABELS) else NEUTRAL
+    found = _ids.get(label)
+    if found is not None:
+        return found
+    key = str(label).strip().lower()
+    found = _ids.get(key)
+    if found is not None:
+        return found
+    if key not in _unknown and len(_unknown) < MAX_UNKNOWN:
+        _unknown.add(key)
+        log.warning("Unknown emotion label %r; treating it as neutral", label)
+    return NEUTRAL
+
+
+def label_name(label):
+    """Canonical name for a label, alias or ID"""
+    return LABELS[label_id(label)]
+
+
+def canonical(label):
+    """Canonical name if the label is registered, else the label unchanged"""
+    found = _ids.get(label)
+    if found is None:
+        found = _ids.get(str(label).strip().lower())
+    return LABELS[found] if found is not None else label
+
+
+def by_label(table):
+    """
+    {label or alias: value} -> tuple of values indexed by ID. IDs missing
+    from the table take their CONTENT_FALLBACK label's value; a table that
+    still leaves an ID uncovered is a bug and raises.
+    """
+    values = [None] * len(LABELS)
+    for label, value in table.items():
+        found = _ids.get(str(label).strip().lower())
+        if found is None:
+            raise ValueError(f"Unknown emotion label {label!r}")
+        values[found] = value
+    for i, fallback in CONTENT_FALLBACK.items():
+        if values[i] is None:
+            values[i] = values[fallback]
+    missing = [LABELS[i] for i, value in enumerate(values) if value is None]
+    if missing:
+        raise ValueError(f"No entry for {', '.join(missing)}")
+    return tuple(values)
@@ -0,0 +1,250 @@
+"""
+Timing spans and counters for the app's hot paths, in Prometheus text format
+
+Instrumented code wraps work in `with span("predict"):` or decorates a
+function with `@traced("figure_timeline")`. Every span feeds a per-process
+latency histogram (emotionllm_span_seconds{span="..."}); count() bumps a
+counter (emotionllm_<name>_total). Both are served as Prometheus text:
+
+* EMOTION_METRICS=1 turns collection on (or set_enabled() at runtime)
+* EMOTION_METRICS_PORT=9108 serves GET /metrics on 127.0.0.1 (implies on)
+* EMOTION_METRICS_FILE=path rewrites the file every few seconds, for the
+  node_exporter textfile collector (implies on)
+
+With collection off, span() hands back one shared no-op context manager and
+traced() wrappers cost a flag check, so instrumented code pays next to
+nothing.
+"""
+import atexit
+import bisect
+import os
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PREFIX = "emotionllm"
+# Upper bounds in seconds: sub-millisecond cache hits up to multi-second cold loads
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DUMP_INTERVAL = 15.0
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_server = None
+_dumper = None
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    """Turn collection on or off for this process (already collected data is kept)"""
+    global _enabled
+    _enabled = bool(flag)
+
+
+def observe(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name, value=1):
+    """Add value to counter `name` (no-op with collection off)"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            count(f"{self.name}_errors")
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """Context manager timing its body into the `name` histogram"""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def traced(name):
+    """Decorator: time every call of the function as span `name`"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """{span: {count, sum, p50, p99}} and {counter: value}, for display"""
+    with _lock:
+        spans = {
+            name: {
+                'count': h.count,
+                'sum_seconds': h.sum,
+                'p50_seconds': h.quantile(0.5),
+                'p99_seconds': h.quantile(0.99),
+            }
+            for name, h in sorted(_histograms.items())
+        }
+        counters = dict(sorted(_counters.items()))
+    return spans, counters
+
+
+def render_prometheus():
+    """Every histogram and counter in Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        if _histograms:
+            metric = f"{PREFIX}_span_seconds"
+            lines.append(f"# HELP {metric} Wall time of instrumented hot paths.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, h in sorted(_histograms.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets + (float('inf'),), h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {h.sum!r}')
+                lines.append(f'{metric}_count{{span="{name}"}} {h.count}')
+        for name, value in sorted(_counters.items()):
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    """Dump render_prometheus() to path (atomic, so scrapers never see half a file)"""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(render_prometheus(), encoding='utf-8')
+    os.replace(tmp, path)
+    return path
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Serve GET /metrics from a daemon thread (once per process); returns the server"""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    set_enabled(True)
+    return _server
+
+
+def start_metrics_dump(path, interval=DUMP_INTERVAL):
+    """Rewrite path every `interval` seconds and at exit (once per process)"""
+    global _dumper
+    with _lock:
+        if _dumper is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                write_metrics(path)
+
+        _dumper = threading.Thread(target=run, name="metrics-dump", daemon=True)
+        _dumper.start()
+    atexit.register(write_metrics, path)
+    set_enabled(True)
+
+
+def _configure_from_env():
+    if os.environ.get("EMOTION_METRICS", "").lower() in ("1", "true", "yes", "on"):
+        set_enabled(True)
+    if os.environ.get("EMOTION_METRICS_PORT"):
+        start_metrics_server(int(os.environ["EMOTION_METRICS_PORT"]))
+    if os.environ.get("EMOTION_METRICS_FILE"):
+        start_metrics_dump(os.environ["EMOTION_METRICS_FILE"])
+
+
+_configure_from_env()
@@ -0,0 +1,104 @@
+"""
+Bounded, thread-safe LRU cache for emotion predictions
+"""
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough fixed cost of one entry (key string, tuple, OrderedDict node) on top
+# of the probability array itself
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_text(text):
+    """Case-fold and collapse whitespace so trivial edits still hit"""
+    return " ".join(text.casefold().split())
+
+
+def cache_key(text, model_version):
+    """Hash of the normalized text plus the model version"""
+    digest = hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16)
+    digest.update(b"\0" + str(model_version).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    LRU cache of (label_id, confidence, probs) results.
+
+    Bounded both by entry count and by approximate bytes, with an optional
+    TTL in seconds. Safe to share between Streamlit session threads.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=8 * 2**20, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _sizeof(value):
+        label_id, confidence, probs = value
+        return ENTRY_OVERHEAD_BYTES + getattr(probs, 'nbytes', sys.getsizeof(probs))
+
+    def get(self, key):
+        """Return the cached value or None, refreshing its LRU position"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, size, stored_at = item
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries to fit"""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (used when the model is swapped)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -1,31 +1,170 @@
 """
 Emotion Sound System
+
+Every emotion sound is read once per process into an immutable bytes cache
+(capped at MAX_CACHE_BYTES; sounds past the cap are read from disk when
+played), and missing files are found when the cache is built rather than on
+each call. play_emotion_sound() hands the cached bytes to st.audio, so no
+file is re-read per detection. Emotions without a file of their own use
+their CONTENT_FALLBACK label's sound.
+
+A smaller variant <emotion>.small.mp3 next to the original, if present, is
+served instead to sessions that ask for it (small=True, the sidebar's
+low-data option). `python -m utils.sound_system transcode` writes those
+with ffmpeg.
 """
-import streamlit as st
+import argparse
+import logging
+import shutil
+import subprocess
+import sys
+import threading
 from pathlib import Path
+from types import MappingProxyType
+
+import streamlit as st
+
+from .labels import CONTENT_FALLBACK, LABELS, label_id
+from .metrics import traced
+
+log = logging.getLogger(__name__)
+
+SOUND_DIR = Path("assets/sounds")
+SOUND_FILES = {
+    "happy": "happy.mp3",
+    "sad": "sad.mp3",
+    "anger": "anger.mp3",
+    "fear": "fear.mp3",
+    "love": "love.mp3",
+    "surprise": "surprise.mp3",
+    "neutral": "neutral.mp3",
+}
+MAX_CACHE_BYTES = 8 * 2**20
+SMALL_BITRATE = "48k"
+
+
+def small_variant(path):
+    """assets/sounds/happy.mp3 -> assets/sounds/happy.small.mp3"""
+    return path.with_name(f"{path.stem}.small{path.suffix}")
+
+
+class SoundCache:
+    """Immutable (label ID, variant) -> mp3 bytes map, built once from sound_dir"""
+
+    def __init__(self, sound_dir=SOUND_DIR, files=SOUND_FILES, max_bytes=MAX_CACHE_BYTES):
+        paths = {}
+        for emotion, name in files.items():
+            for variant, path in (('full', Path(sound_dir) / name), ('small', small_variant(Path(sound_dir) / name))):
+                if path.is_file():
+                    paths[(label_id(emotion), variant)] = path
+        for i, fallback in CONTENT_FALLBACK.items():
+            if (i, 'full') not in paths:
+                for variant in ('full', 'small'):
+                    if (fallback, variant) in paths:
+                        paths[(i, variant)] = paths[(fallback, variant)]
+        self.missing = tuple(label for i, label in enumerate(LABELS) if (i, 'full') not in paths)
+        if self.missing:
+            log.info("No sound for %s in %s", ", ".join(self.missing), sound_dir)
+
+        # Small variants first: they are what slow clients wait on
+        data, by_path = {}, {}
+        used = 0
+        for key in sorted(paths, key=lambda k: k[1] != 'small'):
+            path = paths[key]
+            if path not in by_path:
+                size = path.stat().st_size
+                if used + size > max_bytes:
+                    continue
+                by_path[path] = path.read_bytes()
+                used += size
+            data[key] = by_path[path]
+        self.paths = MappingProxyType(paths)
+        self.data = MappingProxyType(data)
+        self.cached_bytes = used
 
+    def get(self, emotion, small=False):
+        """mp3 bytes (or, past the memory cap, the file path) for emotion; None if it has none"""
+        emotion = label_id(emotion)
+        keys = [(emotion, 'small'), (emotion, 'full')] if small else [(emotion, 'full')]
+        for key in keys:
+            if key in self.data:
+                return self.data[key]
+            if key in self.paths:
+                return str(self.paths[key])
+        return None
 
-def play_emotion_sound(emotion):
+    def stats(self):
+        return {
+            'sounds': len(self.paths),
+            'cached': len(self.data),
+            'cached_bytes': self.cached_bytes,
+            'missing': list(self.missing),
+        }
+
+
+_cache_lock = threading.Lock()
+_cache = None
+
+
+def get_sound_cache():
+    """Process-wide SoundCache, built on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SoundCache()
+    return _cache
+
+
+@traced("play_sound")
+def play_emotion_sound(emotion, small=False):
     """
     Play emotion-specific sound (if available)
-    For production, you'd load actual audio files from assets/sounds/
+    Sounds live in assets/sounds/; emotions without one play nothing.
+    small picks the .small.mp3 variant, for this session only
     """
-    sound_map = {
-        "happy": "assets/sounds/happy.mp3",
-        "sad": "assets/sounds/sad.mp3",
-        "anger": "assets/sounds/anger.mp3",
-        "fear": "assets/sounds/fear.mp3",
-        "love": "assets/sounds/love.mp3",
-        "neutral": "assets/sounds/neutral.mp3"
-    }
-    
-    sound_file = Path(sound_map.get(emotion, ""))
-    
-    if sound_file.exists():
-        try:
-            st.audio(str(sound_file), format='audio/mp3', autoplay=True)
-        except Exception as e:
-            pass  # Silently fail if sound doesn't work
-    else:
+    sound = get_sound_cache().get(emotion, small)
+    if sound is None:
         # No sound file found - that's okay, feature is optional
-        pass
\ No newline at end of file
+        return
+    try:
+        st.audio(sound, format='audio/mp3', autoplay=True)
+    except Exception:
+        pass  # Silently fail if sound doesn't work
+
+
+def transcode(sound_dir=SOUND_DIR, bitrate=SMALL_BITRATE, force=False):
+    """Write <emotion>.small.mp3 (mono, `bitrate`) next to each sound with ffmpeg"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found on PATH")
+    written = []
+    for name in SOUND_FILES.values():
+        source = Path(sound_dir) / name
+        target = small_variant(source)
+        if not source.is_file() or (target.exists() and not force):
+            continue
+        subprocess.run(
+            [ffmpeg, "-loglevel", "error", "-y", "-i", str(source), "-ac", "1", "-b:a", bitrate, str(target)],
+            check=True
+        )
+        written.append(target)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emotion sound assets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("transcode", help="write smaller .small.mp3 variants with ffmpeg")
+    convert.add_argument("--dir", type=Path, default=SOUND_DIR)
+    convert.add_argument("--bitrate", default=SMALL_BITRATE)
+    convert.add_argument("--force", action="store_true", help="overwrite existing variants")
+    args = parser.parse_args(argv)
+
+    for path in transcode(args.dir, args.bitrate, args.force):
+        print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
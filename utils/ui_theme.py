@@ -1,8 +1,22 @@
 """
 Dynamic UI themes that adapt to detected emotions
+
+Every EMOTION_THEMES variant is compiled once per process into a single
+stylesheet. Each theme becomes a block of CSS custom properties, selected by
+a marker element `<span class="emotion-theme" data-emotion="...">`. The file
+is named after its content hash and written to ./static. With Streamlit's
+static file serving enabled (.streamlit/config.toml), a rerun only sends a
+cached <link> and the marker. Otherwise the precompiled <style> is sent as
+it is. Either way, switching emotion never regenerates any CSS.
 """
+import hashlib
+import os
+from pathlib import Path
+
 import streamlit as st
 
+from .labels import LABELS, by_label, label_id
+
 # Emotion theme configurations
 EMOTION_THEMES = {
     "happy": {
@@ -57,115 +71,334 @@ EMOTION_THEMES = {
     }
 }
 
-def apply_emotion_theme(emotion):
-    """Apply dynamic CSS theme based on detected emotion"""
-    theme = EMOTION_THEMES.get(emotion.lower(), EMOTION_THEMES["neutral"])
-    
-    css = f"""
-    <style>
-    /* Main app background with smooth transition */
-    .stApp {{
-        background: {theme['gradient']} !important;
-        transition: background 2s ease-in-out;
-    }}
-    
-    /* Emotion display card */
-    .emotion-card {{
-        background: {theme['card_bg']};
-        border-radius: 20px;
-        padding: 30px;
-        text-align: center;
-        margin: 20px auto;
-        max-width: 600px;
-        box-shadow: 0 10px 40px rgba(0,0,0,0.15);
-        backdrop-filter: blur(10px);
-        animation: {theme['animation']} 2s ease-in-out;
-    }}
-    
-    .emotion-emoji {{
-        font-size: 80px;
-        animation: {theme['animation']} 2s ease-in-out infinite;
-        display: block;
-        margin: 0 auto 20px;
-    }}
-    
-    .emotion-message {{
-        color: {theme['text_color']};
-        font-size: 24px;
-        font-weight: 600;
-        margin: 20px 0;
-    }}
-    
-    .emotion-description {{
-        color: {theme['text_color']};
-        font-size: 14px;
-        opacity: 0.8;
-    }}
-    
-    /* Button styling */
-    .stButton>button {{
-        background: {theme['primary_color']} !important;
-        color: white !important;
-        border: none;
-        border-radius: 25px;
-        padding: 12px 30px;
-        font-weight: bold;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-    }}
-    
-    .stButton>button:hover {{
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(0,0,0,0.3);
-    }}
-    
-    /* Progress bar */
-    .stProgress > div > div {{
-        background-color: {theme['primary_color']} !important;
-    }}
-    
-    /* Animations */
-    @keyframes bounce {{
-        0%, 100% {{ transform: translateY(0); }}
-        50% {{ transform: translateY(-10px); }}
-    }}
-    
-    @keyframes fade {{
-        0%, 100% {{ opacity: 0.8; }}
-        50% {{ opacity: 1; }}
-    }}
-    
-    @keyframes breathe {{
-        0%, 100% {{ transform: scale(1); }}
-        50% {{ transform: scale(1.05); }}
-    }}
-    
-    @keyframes pulse-slow {{
-        0%, 100% {{ transform: scale(1); opacity: 0.9; }}
-        50% {{ transform: scale(1.02); opacity: 1; }}
-    }}
-    
-    /* Smooth transitions for all elements */
-    .element-container {{
-        transition: all 0.5s ease;
-    }}
-    
-    /* Info boxes */
-    .stAlert {{
-        background-color: {theme['card_bg']};
-        border-left: 4px solid {theme['primary_color']};
-        border-radius: 10px;
-    }}
-    
-    /* Metrics */
-    [data-testid="stMetricValue"] {{
-        color: {theme['primary_color']} !important;
-    }}
-    </style>
+
+# Theme fields exposed to the stylesheets as CSS custom properties
+# Indexed by canonical label ID (see labels.py)
+THEMES_BY_ID = by_label(EMOTION_THEMES)
+
+THEME_VARIABLES = {
+    '--emotion-gradient': 'gradient',
+    '--emotion-primary': 'primary_color',
+    '--emotion-text': 'text_color',
+    '--emotion-card-bg': 'card_bg',
+    '--emotion-animation': 'animation',
+}
+
+# The app's look before any emotion has been detected
+DEFAULT_THEME = {
+    "gradient": "linear-gradient(135deg, #0F172A 0%, #1E293B 100%)",
+    "primary_color": "#3B82F6",
+    "text_color": "#E2E8F0",
+    "card_bg": "rgba(30, 41, 59, 0.6)",
+    "emoji": "🧠",
+    "message": "Share your feelings",
+    "animation": "none",
+    "description": "Calm and focused"
+}
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+
+APP_CSS = """
+/* Main Background - Changes with emotion */
+.stApp {
+    background: var(--emotion-gradient) !important;
+    transition: background 1.5s ease-in-out;
+}
+
+/* Sidebar */
+[data-testid="stSidebar"] {
+    background: linear-gradient(180deg, #0F172A 0%, #1E293B 100%) !important;
+    border-right: 1px solid rgba(255,255,255,0.1);
+}
+
+[data-testid="stSidebar"] * {
+    color: #E2E8F0 !important;
+}
+
+/* Hide Streamlit branding */
+#MainMenu {visibility: hidden;}
+footer {visibility: hidden;}
+header {visibility: hidden;}
+
+/* Text colors for main content */
+.stMarkdown, .stMarkdown p, .stMarkdown h1, .stMarkdown h2, .stMarkdown h3 {
+    color: #E2E8F0 !important;
+}
+
+/* Input boxes */
+.stTextArea textarea {
+    background-color: rgba(30, 41, 59, 0.8) !important;
+    color: #E2E8F0 !important;
+    border: 1px solid rgba(255,255,255,0.2) !important;
+    border-radius: 16px !important;
+    font-size: 1.05rem !important;
+    backdrop-filter: blur(10px);
+}
+
+.stTextArea textarea:focus {
+    border-color: var(--emotion-primary) !important;
+    box-shadow: 0 0 0 1px var(--emotion-primary) !important;
+}
+
+/* Buttons */
+.stButton > button {
+    background: linear-gradient(135deg, var(--emotion-primary) 0%, #8B5CF6 100%) !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 12px !important;
+    padding: 0.75rem 2rem !important;
+    font-weight: 600 !important;
+    font-size: 1.05rem !important;
+    transition: all 0.3s ease !important;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.3) !important;
+    width: 100%;
+}
+
+.stButton > button:hover {
+    transform: translateY(-2px) !important;
+    box-shadow: 0 6px 20px rgba(0,0,0,0.4) !important;
+}
+
+/* Progress bars */
+.stProgress > div > div {
+    background-color: var(--emotion-primary) !important;
+}
+
+/* Metrics */
+[data-testid="stMetricValue"] {
+    color: var(--emotion-primary) !important;
+}
+
+/* Info/Success boxes */
+.stAlert {
+    background-color: rgba(30, 41, 59, 0.6) !important;
+    backdrop-filter: blur(10px) !important;
+    border-left: 4px solid var(--emotion-primary) !important;
+    color: #E2E8F0 !important;
+}
+
+/* Emotion card */
+.emotion-display-card {
+    background: rgba(255, 255, 255, 0.1);
+    backdrop-filter: blur(20px);
+    border: 1px solid rgba(255,255,255,0.2);
+    border-radius: 24px;
+    padding: 2.5rem;
+    text-align: center;
+    margin: 2rem auto;
+    max-width: 600px;
+    animation: fadeIn 0.6s ease;
+}
+
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(20px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+
+.emotion-emoji-large {
+    font-size: 5rem;
+    animation: bounce 2s ease-in-out infinite;
+    display: block;
+    margin-bottom: 1rem;
+}
+
+@keyframes bounce {
+    0%, 100% { transform: translateY(0); }
+    50% { transform: translateY(-15px); }
+}
+
+.emotion-title {
+    font-size: 2rem;
+    font-weight: 700;
+    color: #FFFFFF;
+    margin: 1rem 0;
+    text-shadow: 0 2px 10px rgba(0,0,0,0.3);
+}
+
+.emotion-subtitle {
+    font-size: 1.2rem;
+    color: rgba(255,255,255,0.9);
+    font-weight: 400;
+}
+
+/* Expander */
+.streamlit-expanderHeader {
+    background-color: rgba(30, 41, 59, 0.6) !important;
+    border-radius: 10px !important;
+    color: #E2E8F0 !important;
+}
+
+/* Radio buttons */
+.stRadio > label {
+    color: #E2E8F0 !important;
+}
+
+/* Tabs */
+.stTabs [data-baseweb="tab"] {
+    color: #94A3B8 !important;
+}
+
+.stTabs [aria-selected="true"] {
+    color: var(--emotion-primary) !important;
+}
+
+/* Scrollbar */
+::-webkit-scrollbar {
+    width: 10px;
+}
+
+::-webkit-scrollbar-track {
+    background: #1E293B;
+}
+
+::-webkit-scrollbar-thumb {
+    background: var(--emotion-primary);
+    border-radius: 5px;
+}
+"""
+
+# The page-wide rules (.stApp background, buttons, progress bars, metrics)
+# are APP_CSS's; this sheet only adds the emotion card
+CARD_CSS = """
+/* Emotion display card */
+.emotion-card {
+    background: var(--emotion-card-bg);
+    border-radius: 20px;
+    padding: 30px;
+    text-align: center;
+    margin: 20px auto;
+    max-width: 600px;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.15);
+    backdrop-filter: blur(10px);
+    animation: var(--emotion-animation) 2s ease-in-out;
+}
+
+.emotion-emoji {
+    font-size: 80px;
+    animation: var(--emotion-animation) 2s ease-in-out infinite;
+    display: block;
+    margin: 0 auto 20px;
+}
+
+.emotion-message {
+    color: var(--emotion-text);
+    font-size: 24px;
+    font-weight: 600;
+    margin: 20px 0;
+}
+
+.emotion-description {
+    color: var(--emotion-text);
+    font-size: 14px;
+    opacity: 0.8;
+}
+
+/* Animations */
+@keyframes bounce {
+    0%, 100% { transform: translateY(0); }
+    50% { transform: translateY(-10px); }
+}
+
+@keyframes fade {
+    0%, 100% { opacity: 0.8; }
+    50% { opacity: 1; }
+}
+
+@keyframes breathe {
+    0%, 100% { transform: scale(1); }
+    50% { transform: scale(1.05); }
+}
+
+@keyframes pulse-slow {
+    0%, 100% { transform: scale(1); opacity: 0.9; }
+    50% { transform: scale(1.02); opacity: 1; }
+}
+
+/* Smooth transitions for all elements */
+.element-container {
+    transition: all 0.5s ease;
+}
+
+/* Info boxes */
+.stAlert {
+    background-color: var(--emotion-card-bg);
+    border-left: 4px solid var(--emotion-primary);
+    border-radius: 10px;
+}
+"""
+
+
+class ThemeStylesheet:
+    """One template compiled against every theme, identified by its content hash"""
+
+    def __init__(self, name, template, default_theme):
+        self.name = name
+        rules = [f":root {{ {self._variables(default_theme)} }}"]
+        for emotion, theme in zip(LABELS, THEMES_BY_ID):
+            # :has() lets the marker anywhere on the page restyle the whole document
+            rules.append(
+                f':root:has(.emotion-theme[data-emotion="{emotion}"]) {{ {self._variables(theme)} }}'
+            )
+        self.css = "\n".join(rules) + "\n" + template
+        self.digest = hashlib.sha256(self.css.encode('utf-8')).hexdigest()[:12]
+        self.filename = f"emotion-{name}.{self.digest}.css"
+        self.inline = f"<style>{self.css}</style>"
+        self._href = None
+
+    @staticmethod
+    def _variables(theme):
+        return " ".join(f"{var}: {theme[key]};" for var, key in THEME_VARIABLES.items())
+
+    def head(self):
+        """<link> to the published file, or the inline <style> without static serving"""
+        if self._href is None:
+            self._href = self._publish() or ""
+        return f'<link rel="stylesheet" href="{self._href}">' if self._href else self.inline
+
+    def _publish(self):
+        try:
+            if not st.get_option("server.enableStaticServing"):
+                return None
+            path = STATIC_DIR / self.filename
+            if not path.exists():
+                STATIC_DIR.mkdir(exist_ok=True)
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                tmp.write_text(self.css, encoding='utf-8')
+                os.replace(tmp, path)
+        except (OSError, RuntimeError):
+            return None
+        return f"app/static/{self.filename}"
+
+
+APP_STYLESHEET = ThemeStylesheet("app", APP_CSS, DEFAULT_THEME)
+CARD_STYLESHEET = ThemeStylesheet("card", CARD_CSS, EMOTION_THEMES["neutral"])
+
+
+def theme_for(emotion):
+    """Theme dict for an emotion label, alias or ID"""
+    return THEMES_BY_ID[label_id(emotion)]
+
+
+def _apply(stylesheet, emotion, container):
+    marker = f'<span class="emotion-theme" data-emotion="{emotion or "default"}"></span>'
+    (container or st).markdown(stylesheet.head() + marker, unsafe_allow_html=True)
+
+
+def apply_app_theme(emotion=None, container=None):
     """
-    
-    st.markdown(css, unsafe_allow_html=True)
-    
+    Style the whole app for `emotion` (the dark default for None).
+    Pass the same st.empty() container on every call in a run so a later
+    call replaces the earlier marker instead of adding a second one.
+    """
+    _apply(APP_STYLESHEET, LABELS[label_id(emotion)] if emotion is not None else None, container)
+
+
+def apply_emotion_theme(emotion, container=None):
+    """Apply dynamic CSS theme based on detected emotion"""
+    emotion = LABELS[label_id(emotion)]
+    theme = theme_for(emotion)
+    _apply(CARD_STYLESHEET, emotion, container)
+
     # Display emotion card
     st.markdown(f"""
     <div class="emotion-card">
@@ -174,5 +407,5 @@ def apply_emotion_theme(emotion):
         <div class="emotion-description">{theme['description']}</div>
     </div>
     """, unsafe_allow_html=True)
-    
-    return theme
\ No newline at end of file
+
+    return theme